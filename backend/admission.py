@@ -0,0 +1,218 @@
+import functools
+import math
+import os
+import threading
+import time
+
+from flask import g, jsonify
+
+# Estimated peak working memory, measured with benchmarks/memory_profile.py.
+# Per 8-bit cover sample (pixels x channels) for each kind of work...
+SAMPLE_COSTS = {
+    'embed': 4,     # decode, stego copy, PNG encode and base64
+    'metrics': 60,  # float copies for MSE/PSNR and SSIM's filtered images
+    'extract': 4,
+    'rounds': 9,    # histogram sweep
+    'scan': 13,     # int16 planes for RS and sample-pair analysis
+}
+# ...and per payload byte (bit arrays, compression and encryption copies)
+PAYLOAD_COSTS = {'embed': 28, 'extract': 16, 'rounds': 2}
+# Per byte a compressed payload decompresses to (the decompressor's output and the message cut from it)
+DECOMPRESSED_COST = 2
+
+
+def default_budget():
+    """Half the machine's physical memory, or 2GB where that can't be read."""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // 2
+    except (AttributeError, ValueError, OSError):
+        return 2 * 1024**3
+
+
+def estimate_cost(operation, samples, payload_bytes=0, metrics=False, decompressed_bytes=0):
+    """
+    Estimated peak memory of a request in bytes, from metadata only.
+
+    Rounds don't appear here: every layer is written through the same buffers,
+    so they change the capacity check but not the working set.
+    Args:
+        operation (str): A key of SAMPLE_COSTS.
+        samples (int): Cover samples (pixels x channels), e.g. from MultiLayerLSB.sample_count.
+        payload_bytes (int, optional): Payload size before compression.
+        metrics (bool, optional): Whether quality metrics are computed on the result.
+        decompressed_bytes (int, optional): Most an extracted payload may decompress to.
+    Returns:
+        int: Estimated cost in bytes.
+    """
+    cost = samples * SAMPLE_COSTS[operation] + payload_bytes * PAYLOAD_COSTS.get(operation, 0)
+    cost += decompressed_bytes * DECOMPRESSED_COST
+    if metrics:
+        cost += samples * SAMPLE_COSTS['metrics']
+    return cost
+
+
+class Ticket:
+    """A request's place in the admission controller: a per-client slot and, once acquired, a share of the budget."""
+
+    def __init__(self, controller, client):
+        self.controller = controller
+        self.client = client
+        self.cost = 0
+        self._released = False
+
+    def acquire(self, cost):
+        """
+        Wait for `cost` bytes of budget.
+        Returns:
+            None once admitted, or an error response (413 or 503) to return instead.
+        """
+        return self.controller._acquire(self, cost)
+
+    def release(self):
+        """Give back the budget and the client slot. Safe to call more than once."""
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+
+class AdmissionControl:
+    """
+    Bounds the heavy work (decoding, embedding, metrics, scans) running in this worker process.
+
+    Views decorated with `limit` go through two gates:
+        - a per-client limit on requests in flight, checked before the request
+          body is parsed. Over the limit answers 429.
+        - admit(cost), called by the view once it has estimated its cost from
+          the upload metadata: the estimate is taken from a shared budget.
+          Requests that can never fit answer 413 straight away; otherwise they
+          queue until budget frees up. A full queue, or waiting longer than the
+          queue timeout, answers 503.
+    Rejections carry a Retry-After header.
+
+    Config:
+        ADMISSION_BUDGET (bytes of estimated working memory per worker process, 0 disables admission control)
+        ADMISSION_MAX_REQUEST_COST (bytes; larger requests are refused, defaults to the budget)
+        ADMISSION_CLIENT_CONCURRENCY (heavy requests one user or address may have in flight, 0 for no limit)
+        ADMISSION_QUEUE_SIZE (requests that may wait for budget)
+        ADMISSION_QUEUE_TIMEOUT (seconds a request waits for budget)
+        ADMISSION_RETRY_AFTER (seconds clients are told to wait)
+    """
+
+    def __init__(self, app, client_key):
+        """
+        Args:
+            app (Flask): The application; settings are read from its config.
+            client_key (callable): Returns the key the per-client limit applies to for the current request.
+        """
+        self.app = app
+        self.client_key = client_key
+        self.in_use = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._freed = threading.Condition(self._lock)
+
+    @property
+    def enabled(self):
+        return self.app.config['ADMISSION_BUDGET'] > 0
+
+    def _reject(self, status, message, retry_after=None):
+        # Called with the lock held
+        self.rejected += 1
+        response = jsonify({'error': message})
+        if retry_after is not None:
+            response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response, status
+
+    def enter(self, client):
+        """
+        Take one of the client's concurrency slots.
+        Args:
+            client: Key the per-client limit applies to, e.g. the user id or remote address.
+        Returns:
+            tuple: (Ticket, None), or (None, 429 error response).
+        """
+        config = self.app.config
+        limit = config['ADMISSION_CLIENT_CONCURRENCY']
+        with self._lock:
+            active = self._clients.get(client, 0)
+            if self.enabled and limit > 0 and active >= limit:
+                return None, self._reject(429, 'Too many requests in progress, try again shortly',
+                                          config['ADMISSION_RETRY_AFTER'])
+            self._clients[client] = active + 1
+        return Ticket(self, client), None
+
+    def limit(self, view):
+        """Decorator: hold a client slot for the duration of the view."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            ticket, error = self.enter(self.client_key())
+            if error:
+                return error
+            g.admission_ticket = ticket
+            try:
+                return view(*args, **kwargs)
+            finally:
+                ticket.release()
+        return wrapper
+
+    def admit(self, cost):
+        """
+        Reserve `cost` bytes of budget for the current request until it finishes. Calling it again
+        reserves more, e.g. once a decoded header shows what the rest of the request costs.
+        Returns:
+            None once admitted, or an error response (413 or 503) to return instead.
+        """
+        return g.admission_ticket.acquire(cost)
+
+    def _acquire(self, ticket, cost):
+        if not self.enabled:
+            return None
+        config = self.app.config
+        budget = config['ADMISSION_BUDGET']
+        max_cost = min(config['ADMISSION_MAX_REQUEST_COST'] or budget, budget)
+        deadline = time.monotonic() + config['ADMISSION_QUEUE_TIMEOUT']
+        with self._lock:
+            if ticket.cost + cost > max_cost:
+                return self._reject(413, f'Request too large to process: needs about '
+                                         f'{(ticket.cost + cost) / 2**20:.1f} MB, limit is {max_cost / 2**20:.1f} MB')
+            if self.in_use + cost > budget:
+                if self.waiting >= config['ADMISSION_QUEUE_SIZE']:
+                    return self._reject(503, 'Server busy, try again shortly', config['ADMISSION_RETRY_AFTER'])
+                self.waiting += 1
+                try:
+                    while self.in_use + cost > budget:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return self._reject(503, 'Server busy, try again shortly',
+                                                config['ADMISSION_RETRY_AFTER'])
+                        self._freed.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.in_use += cost
+            ticket.cost += cost
+        return None
+
+    def _release(self, ticket):
+        with self._lock:
+            if ticket.cost:
+                self.in_use -= ticket.cost
+                ticket.cost = 0
+                self._freed.notify_all()
+            active = self._clients.get(ticket.client, 0) - 1
+            if active > 0:
+                self._clients[ticket.client] = active
+            else:
+                self._clients.pop(ticket.client, None)
+
+    def stats(self):
+        """Budget in use, queued requests and rejections so far."""
+        with self._lock:
+            return {
+                'budget': self.app.config['ADMISSION_BUDGET'],
+                'in_use': self.in_use,
+                'waiting': self.waiting,
+                'active_clients': len(self._clients),
+                'rejected': self.rejected,
+            }
@@ -1,34 +1,90 @@
-from flask import Flask, jsonify, request, session, abort, url_for, send_file, send_from_directory
+from flask import Flask, Response, jsonify, request, session, url_for, redirect, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
-from flask_admin import Admin
-from flask_admin.contrib.sqla import ModelView
 from flask_cors import CORS
-import base64
-import requests
-from authlib.integrations.flask_client import OAuth
 
+import functools
+import io
+import mimetypes
 import os
 import base64
 from werkzeug.utils import secure_filename
+from ingest import SpooledRequest, Upload, persist_async
+from lifecycle import StorageLifecycle
+from export import stream_zip
+from admission import AdmissionControl, default_budget, estimate_cost
+from cache import LRUBackend, ResponseCache
+from blobstore import blob_key, create_store, upload_key, upload_name
+from previews import PREVIEW_FORMATS, PREVIEW_SIZES, PreviewStore, content_hash
+from memo import EmbedMemo, request_key, upload_hash
+from deltas import StegoDeltas, DELTA_SUFFIX, is_delta
+from progress import ProgressBroker
+import ast
+import json
+import re
 import sys
 sys.path.append('..')
 from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB
+from mlsb_algo_api.StegScanner import StegScanner
 import secrets
 
 
 
 app = Flask(__name__)
+app.request_class = SpooledRequest
 CORS(app, supports_credentials=True, resources={r"/api/*": {"origins": "http://localhost:3000"}})
 
 # CHANGE SECRET KEY CHANGE SECRET KEY CHANGE SECRET KEY CHANGE SECRET KEY CHANGE SECRET KEY CHANGE SECRET KEY
 app.config['SECRET_KEY'] = '123'    
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///database.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 20MB max file size
+app.config['UPLOAD_SPOOL_THRESHOLD'] = 4 * 1024 * 1024  # uploads above this are spooled to disk
+# Where uploads and generated files live: 'local' (UPLOAD_FOLDER) or 's3' (needs boto3); see blobstore.py
+app.config['BLOB_STORAGE'] = os.getenv('BLOB_STORAGE', 'local')
+app.config['BLOB_S3_BUCKET'] = os.getenv('BLOB_S3_BUCKET')
+app.config['BLOB_S3_PREFIX'] = os.getenv('BLOB_S3_PREFIX', '')
+app.config['BLOB_S3_ENDPOINT_URL'] = os.getenv('BLOB_S3_ENDPOINT_URL')
+app.config['BLOB_S3_REGION'] = os.getenv('BLOB_S3_REGION')
+app.config['BLOB_S3_POOL_SIZE'] = int(os.getenv('BLOB_S3_POOL_SIZE', 32))
+# The admin panel pulls in flask_admin and WTForms; only load it when asked for
+app.config['ENABLE_ADMIN'] = os.getenv('ENABLE_ADMIN', '0').lower() in ['true', '1', 'yes']
+# Worker processes for batch steganalysis (POST /api/scan)
+app.config['SCAN_WORKERS'] = int(os.getenv('SCAN_WORKERS', os.cpu_count() or 1))
+# Largest payload an extract may decompress to; compressed payloads are also held to 32x the image's capacity
+app.config['EXTRACT_MAX_BYTES'] = int(os.getenv('EXTRACT_MAX_BYTES', app.config['MAX_CONTENT_LENGTH']))
+# Threads one embed or extract splits a large image across; the output is the same for any value
+app.config['EMBED_WORKERS'] = int(os.getenv('EMBED_WORKERS', 1))
+# Admission control for heavy requests (embed, extract, scans); see admission.py
+app.config['ADMISSION_BUDGET'] = int(os.getenv('ADMISSION_BUDGET', default_budget()))  # bytes, 0 disables
+app.config['ADMISSION_MAX_REQUEST_COST'] = int(os.getenv('ADMISSION_MAX_REQUEST_COST', 0))  # bytes, 0 = the budget
+app.config['ADMISSION_CLIENT_CONCURRENCY'] = int(os.getenv('ADMISSION_CLIENT_CONCURRENCY', 2))
+app.config['ADMISSION_QUEUE_SIZE'] = int(os.getenv('ADMISSION_QUEUE_SIZE', 8))
+app.config['ADMISSION_QUEUE_TIMEOUT'] = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 10))
+app.config['ADMISSION_RETRY_AFTER'] = int(os.getenv('ADMISSION_RETRY_AFTER', 5))
+# Cached room reads: entries kept in this process, or a shared Redis (redis://...) for several workers
+app.config['RESPONSE_CACHE_SIZE'] = int(os.getenv('RESPONSE_CACHE_SIZE', 1024))
+app.config['RESPONSE_CACHE_URL'] = os.getenv('RESPONSE_CACHE_URL')
+# Storage garbage collection (seconds)
+app.config['LIFECYCLE_SWEEP_INTERVAL'] = int(os.getenv('LIFECYCLE_SWEEP_INTERVAL', 15 * 60))
+app.config['LIFECYCLE_ORPHAN_GRACE'] = int(os.getenv('LIFECYCLE_ORPHAN_GRACE', 60 * 60))
+app.config['LIFECYCLE_TRANSIENT_RETENTION'] = int(os.getenv('LIFECYCLE_TRANSIENT_RETENTION', 60 * 60))
+app.config['LIFECYCLE_DEMO_RETENTION'] = int(os.getenv('LIFECYCLE_DEMO_RETENTION', 24 * 60 * 60))
+# Downscaled previews; unused ones are removed by the sweeper and re-rendered on demand
+app.config['PREVIEW_WORKERS'] = int(os.getenv('PREVIEW_WORKERS', 1))
+app.config['PREVIEW_RETENTION'] = int(os.getenv('PREVIEW_RETENTION', 7 * 24 * 60 * 60))
+# Seconds a finished operation's progress events stay available to reconnecting clients
+app.config['PROGRESS_RETENTION'] = int(os.getenv('PROGRESS_RETENTION', 5 * 60))
+# Memoized embed results for repeated requests and Idempotency-Key retries; see memo.py
+app.config['EMBED_MEMO_BYTES'] = int(os.getenv('EMBED_MEMO_BYTES', 256 * 1024 * 1024))
+app.config['EMBED_MEMO_ENTRIES'] = int(os.getenv('EMBED_MEMO_ENTRIES', 256))
+app.config['IDEMPOTENCY_WAIT'] = float(os.getenv('IDEMPOTENCY_WAIT', 30))
+# 'full' stores every stego as a PNG; 'delta' stores its changed bit planes against the cover (see deltas.py)
+app.config['STEGO_STORAGE'] = os.getenv('STEGO_STORAGE', 'full')
+# Rebuilt delta-stored stegos kept in memory for repeated reads
+app.config['STEGO_CACHE_BYTES'] = int(os.getenv('STEGO_CACHE_BYTES', 128 * 1024 * 1024))
 
 db = SQLAlchemy(app)
-oauth = OAuth(app)
 
 class User(db.Model):
     __tablename__ = 'user'
@@ -65,27 +121,107 @@ class MLSBDemo(db.Model):
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 # FOR TESTING FOR TESTINGFOR TESTINGFOR TESTINGFOR TESTINGFOR TESTINGFOR TESTING
 
-admin = Admin(app, name='Admin Panel', template_mode='bootstrap3')
-admin.add_view(ModelView(User, db.session))
-admin.add_view(ModelView(StegoRoom, db.session))
-admin.add_view(ModelView(MLSBDemo, db.session))
+if app.config['ENABLE_ADMIN']:
+    from flask_admin import Admin
+    from flask_admin.contrib.sqla import ModelView
+
+    admin = Admin(app, name='Admin Panel', template_mode='bootstrap3')
+    admin.add_view(ModelView(User, db.session))
+    admin.add_view(ModelView(StegoRoom, db.session))
+    admin.add_view(ModelView(MLSBDemo, db.session))
 
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
 
-google = oauth.register(
-    name='google',
-    client_id=os.getenv('GOOGLE_CLIENT_ID'),
-    client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
-    authorize_url='https://accounts.google.com/o/oauth2/auth',
-    access_token_url='https://accounts.google.com/o/oauth2/token',
-    api_base_url='https://www.googleapis.com/oauth2/v1/',
-    redirect_uri='http://localhost:5000/api/google/callback',
-    client_kwargs={
-        'scope': 'openid email profile',
-    },
+blob_store = create_store(app.config)
+
+# Previews are a cache each node keeps locally, re-rendered from the blob store when missing
+previews = PreviewStore(os.path.join(app.config['UPLOAD_FOLDER'], 'previews'),
+                        workers=app.config['PREVIEW_WORKERS'])
+
+def rebuild_stego(cover, delta):
+    """Encoded stego from the bytes of its cover and a stego delta, as the embed views encoded it."""
+    image = MultiLayerLSB.load_frames(cover) if MultiLayerLSB.frame_count(cover) > 1 else \
+        MultiLayerLSB.load_image(cover)
+    return encode_stego(MultiLayerLSB.apply_delta(image, delta)).getbuffer()
+
+stego_deltas = StegoDeltas(blob_store, rebuild_stego, max_bytes=app.config['STEGO_CACHE_BYTES'])
+
+storage = StorageLifecycle(
+    app, db, blob_store,
+    file_columns=[StegoRoom.cover_image, StegoRoom.message_file, StegoRoom.stego_image,
+                  MLSBDemo.cover_image, MLSBDemo.message_file, MLSBDemo.stego_image],
+    expiring=[(MLSBDemo, MLSBDemo.created_at, 'LIFECYCLE_DEMO_RETENTION')],
+    transient_prefixes=['extracted_message'],
+    sweep_hooks=[lambda: previews.prune(app.config['PREVIEW_RETENTION'], storage.referenced_keys())]
 )
 
+def make_cache_backend():
+    """Backend for the response cache; Redis needs the optional redis package."""
+    if app.config['RESPONSE_CACHE_URL']:
+        import redis
+        return redis.Redis.from_url(app.config['RESPONSE_CACHE_URL'])
+    return LRUBackend(app.config['RESPONSE_CACHE_SIZE'])
+
+response_cache = ResponseCache(make_cache_backend())
+
+def client_key():
+    """Signed-in users are identified by account, everyone else by address."""
+    return session.get('user_id') or request.remote_addr
+
+admission = AdmissionControl(app, client_key=client_key)
+operations = ProgressBroker(client_key, retention=app.config['PROGRESS_RETENTION'])
+embed_memo = EmbedMemo(client_key, max_bytes=app.config['EMBED_MEMO_BYTES'],
+                       max_entries=app.config['EMBED_MEMO_ENTRIES'], wait_timeout=app.config['IDEMPOTENCY_WAIT'])
+
+@app.cli.command('sweep-storage')
+def sweep_storage():
+    """Remove expired demo runs, stale extraction outputs and orphaned uploads."""
+    report = storage.sweep()
+    print(f"Removed {report['expired_rows']} expired rows and {report['files']} files, "
+          f"reclaimed {report['bytes']} bytes")
+
+@app.cli.command('storage-sweeper')
+def storage_sweeper():
+    """Sweep storage every LIFECYCLE_SWEEP_INTERVAL seconds, in the foreground, until interrupted."""
+    interval = app.config['LIFECYCLE_SWEEP_INTERVAL']
+    if interval <= 0:
+        print("LIFECYCLE_SWEEP_INTERVAL is 0; nothing to do")
+        return
+    storage.run(interval)
+
+_scan_pool = None
+
+def get_scan_pool():
+    """Process pool for batch scans, started on the first batch."""
+    global _scan_pool
+    if _scan_pool is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _scan_pool = ProcessPoolExecutor(max_workers=app.config['SCAN_WORKERS'])
+    return _scan_pool
+
+_google = None
+
+def get_google_client():
+    """Register the Google OAuth client on first use; authlib is slow to import."""
+    global _google
+    if _google is None:
+        from authlib.integrations.flask_client import OAuth
+        oauth = OAuth(app)
+        _google = oauth.register(
+            name='google',
+            client_id=os.getenv('GOOGLE_CLIENT_ID'),
+            client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
+            authorize_url='https://accounts.google.com/o/oauth2/auth',
+            access_token_url='https://accounts.google.com/o/oauth2/token',
+            api_base_url='https://www.googleapis.com/oauth2/v1/',
+            redirect_uri='http://localhost:5000/api/google/callback',
+            client_kwargs={
+                'scope': 'openid email profile',
+            },
+        )
+    return _google
+
 @app.route('/')
 def index():
     return "Flask app with SQLite is set up!"
@@ -116,6 +252,7 @@ def google_callback():
             raise ValueError("Invalid nonce")
 
         # Verify the token using Google's OAuth 2.0 tokeninfo endpoint
+        import requests
         response = requests.get(f'https://oauth2.googleapis.com/tokeninfo?id_token={token}')
         if response.status_code != 200:
             raise ValueError("Invalid token")
@@ -175,9 +312,12 @@ def get_steg_rooms():
         return jsonify({"error": "Unauthorized"}), 401
 
     user_id = session['user_id']
+    return response_cache.respond(f'steg_rooms:{user_id}', lambda: steg_rooms_payload(user_id))
+
+def steg_rooms_payload(user_id):
     stego_rooms = StegoRoom.query.filter_by(user_id=user_id).all()
     
-    rooms_list = [
+    return [
         {
             "id": room.id,
             "name": room.name,
@@ -190,7 +330,6 @@ def get_steg_rooms():
         }
         for room in stego_rooms
     ]
-    return jsonify(rooms_list)
 
 @app.route('/api/current_user', methods=['GET'])
 def current_user():
@@ -209,6 +348,9 @@ def current_user():
     })
 
 @app.route("/api/create_stego_room", methods=["POST"])
+@operations.track
+@embed_memo.idempotent
+@admission.limit
 def create_stego_room():
     if "user_id" not in session:
         return jsonify({"error": "Unauthorized"}), 401
@@ -218,40 +360,37 @@ def create_stego_room():
     store_key_str = request.form.get("storeKey", "false")
     is_encrypted = encrypted_str.lower() in ["true", "1", "yes"]
     store_key = store_key_str.lower() in ["true", "1", "yes"]
+    compression = parse_compression(request.form.get("compression"))
+    if compression is None:
+        return jsonify({"error": "compression must be 'auto', 'none', 'zlib', 'lzma' or 'bz2'"}), 400
+    rounds = parse_rounds(request.form.get("rounds"))
+    if rounds is None:
+        return jsonify({"error": "rounds must be 'auto' or between 1 and 8"}), 400
+    layout = request.form.get("layout", "plane").lower()
+    if layout not in MultiLayerLSB.LAYOUTS:
+        return jsonify({"error": "layout must be 'plane' or 'pixel'"}), 400
 
     cover_image_file = request.files.get("image")
     message_file = request.files.get("message")
     if not cover_image_file or not message_file:
         return jsonify({"error": "Missing files"}), 400
 
-    # Save files to disk
-    cover_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(cover_image_file.filename))
-    message_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(message_file.filename))
-    stego_path = os.path.join(app.config['UPLOAD_FOLDER'], f"stego_{cover_image_file.filename}")
-
-    cover_image_file.save(cover_path)
-    message_file.save(message_path)
+    cover_upload = Upload(cover_image_file)
+    message_upload = Upload(message_file)
+    cover_key = upload_key(cover_upload.filename)
+    message_key = upload_key(message_upload.filename)
+    stego_key = upload_key(f"stego_{cover_upload.filename}")
 
     try:
-        # Embed the message using MultiLayerLSB
-        stego_path, key, iv = MultiLayerLSB.embed_message(
-            cover_path,
-            stego_path,
-            message_path,
-            is_encrypted=is_encrypted
-        )
-
-        with open(stego_path, 'rb') as f:
-            stego_image_b64 = base64.b64encode(f.read()).decode('utf-8')
-
-        metrics = {
-            'psnr': MultiLayerLSB.calculate_psnr(cover_path, stego_path),
-            'mse': MultiLayerLSB.calculate_mse(cover_path, stego_path),
-            'ssim': MultiLayerLSB.calculate_ssim(cover_path, stego_path),
-            'bpp': MultiLayerLSB.calculate_bpp(message_path, cover_path),
-            'capacity': MultiLayerLSB.calculate_capacity(cover_path),
-            'message_size': os.path.getsize(message_path)
-        }
+        result, error = run_embed(cover_upload, message_upload, ('image', 'message'), rounds, layout, is_encrypted,
+                                  compression)
+        if error:
+            return error
+        stego_key, stego_data = stego_blob(stego_key, cover_key, result)
+        stego_png = result['stego_png']
+        metrics = result['metrics']
+        key, iv = result['key'], result['iv']
+        stego_image_b64 = base64.b64encode(stego_png).decode('utf-8')
 
         user_id = session["user_id"]
 
@@ -261,15 +400,24 @@ def create_stego_room():
             is_encrypted=is_encrypted,
             key=key.hex() if key else None,
             iv=iv.hex() if iv else None,
-            message_file=message_path,
-            cover_image=cover_path,
-            stego_image=stego_path,
+            message_file=message_key,
+            cover_image=cover_key,
+            stego_image=stego_key,
             metrics=str(metrics),
             user_id=user_id,
             is_key_stored=store_key
         )
         db.session.add(new_room)
         db.session.commit()
+        response_cache.invalidate(f'steg_rooms:{user_id}')
+
+        # Previews are rendered in the background from the decoded arrays
+        cover_preview, stego_preview = submit_previews(cover_upload, cover_key, stego_key, result)
+
+        # The response doesn't depend on the files, so write them after it
+        cover_upload.persist(blob_store, cover_key)
+        message_upload.persist(blob_store, message_key)
+        persist_async(blob_store, stego_key, stego_data)
 
         return jsonify({
             "message": "Stego room created successfully!",
@@ -279,19 +427,27 @@ def create_stego_room():
                 "is_encrypted": new_room.is_encrypted,
                 "key": new_room.key,
                 "iv": new_room.iv,
-                "cover_image": cover_path,
+                "cover_image": cover_key,
                 "stego_image": stego_image_b64,
                 "metrics": metrics,
-                "user_id": new_room.user_id
+                "user_id": new_room.user_id,
+                "previews": {"cover": preview_urls(cover_preview), "stego": preview_urls(stego_preview)}
             }
         }), 200
     except Exception as e:
             # Optionally log the error here
             return jsonify({'error': str(e)}), 500
+    finally:
+        cover_upload.close()
+        message_upload.close()
 
 
 @app.route('/api/stegorooms/<int:room_id>', methods=['GET'])
 def get_stegoroom(room_id):
+    # Rooms never change after creation, so the entry lives until the room is deleted
+    return response_cache.respond(f'stegoroom:{room_id}', lambda: stegoroom_payload(room_id))
+
+def stegoroom_payload(room_id):
     # Fetch the StegoRoom entry from the database (404 if not found)
     room = StegoRoom.query.get_or_404(room_id)
 
@@ -328,14 +484,17 @@ def get_stegoroom(room_id):
         room_info['key'] = room.key
         room_info['iv'] = room.iv
 
-    return jsonify({
+    return {
         "text": response_text,
         "room": room_info
-    })
+    }
     
 # FOR TESTING FOR TESTINGFOR TESTINGFOR TESTINGFOR TESTINGFOR TESTINGFOR TESTING
 
 @app.route('/api/mlsb/embed', methods=['POST'])
+@operations.track
+@embed_memo.idempotent
+@admission.limit
 def embed_message():
     if 'cover_image' not in request.files or 'message_file' not in request.files:
         return jsonify({'error': 'Missing required files'}), 400
@@ -343,53 +502,58 @@ def embed_message():
     cover_image = request.files['cover_image']
     message_file = request.files['message_file']
     is_encrypted = request.form.get('is_encrypted', 'true').lower() == 'true'
+    compression = parse_compression(request.form.get('compression'))
+    if compression is None:
+        return jsonify({'error': "compression must be 'auto', 'none', 'zlib', 'lzma' or 'bz2'"}), 400
+    rounds = parse_rounds(request.form.get('rounds'))
+    if rounds is None:
+        return jsonify({'error': "rounds must be 'auto' or between 1 and 8"}), 400
+    layout = request.form.get('layout', 'plane').lower()
+    if layout not in MultiLayerLSB.LAYOUTS:
+        return jsonify({'error': "layout must be 'plane' or 'pixel'"}), 400
 
     if cover_image.filename == '' or message_file.filename == '':
         return jsonify({'error': 'No selected files'}), 400
 
+    cover_upload = Upload(cover_image)
+    message_upload = Upload(message_file)
     try:
-        cover_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(cover_image.filename))
-        message_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(message_file.filename))
-        stego_path = os.path.join(app.config['UPLOAD_FOLDER'], f'stego_{cover_image.filename}')
-
-        cover_image.save(cover_path)
-        message_file.save(message_path)
-
-        # Let the MultiLayerLSB class handle key and IV generation
-        stego_path, key, iv = MultiLayerLSB.embed_message(
-            cover_path, 
-            stego_path, 
-            message_path, 
-            is_encrypted=is_encrypted
-        )
-
-        with open(stego_path, 'rb') as f:
-            stego_image = base64.b64encode(f.read()).decode('utf-8')
-
-        message_size = os.path.getsize(message_path)
-        metrics = {
-            'psnr': MultiLayerLSB.calculate_psnr(cover_path, stego_path),
-            'mse': MultiLayerLSB.calculate_mse(cover_path, stego_path),
-            'ssim': MultiLayerLSB.calculate_ssim(cover_path, stego_path),
-            'bpp': MultiLayerLSB.calculate_bpp(message_path, cover_path),
-            'capacity': MultiLayerLSB.calculate_capacity(cover_path),
-            'message_size': message_size
-        }
+        cover_key = upload_key(cover_upload.filename)
+        message_key = upload_key(message_upload.filename)
+        stego_key = upload_key(f'stego_{cover_upload.filename}')
+
+        result, error = run_embed(cover_upload, message_upload, ('cover_image', 'message_file'), rounds, layout,
+                                  is_encrypted, compression)
+        if error:
+            return error
+        stego_key, stego_data = stego_blob(stego_key, cover_key, result)
+        stego_png = result['stego_png']
+        metrics = result['metrics']
+        key, iv = result['key'], result['iv']
+        stego_image = base64.b64encode(stego_png).decode('utf-8')
 
         demo = MLSBDemo(
-            cover_image=cover_path,
-            message_file=message_path,
-            stego_image=stego_path,
+            cover_image=cover_key,
+            message_file=message_key,
+            stego_image=stego_key,
             is_encrypted=is_encrypted,
+            rounds=metrics['rounds'],
             metrics=str(metrics)
         )
         db.session.add(demo)
         db.session.commit()
 
+        cover_preview, stego_preview = submit_previews(cover_upload, cover_key, stego_key, result)
+
+        cover_upload.persist(blob_store, cover_key)
+        message_upload.persist(blob_store, message_key)
+        persist_async(blob_store, stego_key, stego_data)
+
         response = {
             'success': True,
             'stego_image': stego_image,
-            'metrics': metrics
+            'metrics': metrics,
+            'previews': {'cover': preview_urls(cover_preview), 'stego': preview_urls(stego_preview)}
         }
 
         if is_encrypted:
@@ -400,11 +564,297 @@ def embed_message():
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        cover_upload.close()
+        message_upload.close()
+
+def parse_rounds(value):
+    """Parse a `rounds` form field: 'auto' (the default) or an int from 1 to 8. Returns None if invalid."""
+    if value is None or value.strip().lower() in ('', 'auto'):
+        return 'auto'
+    try:
+        rounds = int(value)
+    except ValueError:
+        return None
+    return rounds if 1 <= rounds <= 8 else None
+
+def parse_compression(value):
+    """Parse a `compression` form field: 'none' (the default), 'auto' or one of MultiLayerLSB.CODECS. Returns None if invalid."""
+    if value is None or value.strip() == '':
+        return 'none'
+    value = value.strip().lower()
+    return value if value == 'auto' or value in MultiLayerLSB.CODECS else None
+
+def decode_cover(upload):
+    """
+    Decode an uploaded cover: animated GIF/PNG/WebP and multi-page TIFF covers become a
+    (F, H, W, C) frame stack, which embed_data stripes the payload across.
+    """
+    if MultiLayerLSB.frame_count(upload.file()) > 1:
+        return MultiLayerLSB.load_frames(upload.file())
+    return MultiLayerLSB.load_image(upload.file())
+
+def encode_stego(stego):
+    """Encode a stego image as PNG, or a frame stack as an animated PNG. Returns a BytesIO."""
+    stego_png = io.BytesIO()
+    if stego.ndim == 4:
+        MultiLayerLSB.save_frames(stego, stego_png)
+    else:
+        MultiLayerLSB.save_image(stego, stego_png)
+    return stego_png
+
+def as_image(image):
+    """A frame stack as one tall image, so metrics and previews take it like any other; images pass through."""
+    if image.ndim != 4:
+        return image
+    tall = image.reshape(-1, *image.shape[2:])
+    return tall[..., 0] if tall.shape[-1] == 1 else tall
+
+def run_embed(cover_upload, message_upload, fields, rounds, layout, is_encrypted, compression):
+    """
+    Embed a message upload in a cover upload, encode the stego and measure it.
+
+    Unencrypted embeds are deterministic, so the result of an identical earlier
+    one (same cover, message and options) is taken from the memo instead.
+    Args:
+        fields (tuple): Form fields of the cover and message, for upload_hash.
+    Returns:
+        tuple: (result, None) or (None, error response). The result has 'stego_png' (bytes-like),
+            'metrics', 'key' and 'iv' (bytes or None), 'stego_delta' (bytes with STEGO_STORAGE=delta,
+            else None), and for previews the decoded 'cover' and 'stego' (None when memoized) and the
+            'digests' of both files if already known.
+    """
+    memo_key = None
+    cover_hash = None
+    if not is_encrypted:
+        cover_hash = upload_hash(fields[0], cover_upload)
+        memo_key = request_key('embed', cover_hash, upload_hash(fields[1], message_upload), message_upload.extension,
+                               rounds, layout, compression)
+        memoized = embed_memo.claim(memo_key)
+        if memoized is not None:
+            return dict(memoized, cover=None, stego=None, digests=(cover_hash, memoized['stego_hash'])), None
+    try:
+        error = capacity_error(cover_upload, message_upload, rounds, layout, is_encrypted, compression)
+        if error:
+            return None, error
+        cost = estimate_cost('embed', MultiLayerLSB.sample_count(cover_upload.file()), message_upload.size,
+                             metrics=True)
+        operation = operations.current()
+        operation.stage('queued')
+        error = admission.admit(cost)
+        if error:
+            return None, error
+
+        # Decode the cover once and embed straight from the upload buffers
+        cover = decode_cover(cover_upload)
+        stego, key, iv = MultiLayerLSB.embed_data(
+            cover,
+            message_upload.buffer,
+            rounds=rounds,
+            is_encrypted=is_encrypted,
+            compression=compression,
+            message_type=MultiLayerLSB.get_message_type(message_upload.filename),
+            file_extension=message_upload.extension,
+            layout=layout,
+            workers=app.config['EMBED_WORKERS'],
+            progress=operation.report
+        )
+
+        # Layers the payload actually occupies; 'auto' picks exactly these
+        rounds_used = MultiLayerLSB.rounds_used(stego)
+        # The header records the sealed payload's length, so bpp needn't compress the message again
+        _, _, header_length, message_length, _, _, _ = MultiLayerLSB.read_header(stego)
+        if rounds == 'auto':
+            rounds = rounds_used
+
+        operation.stage('encode')
+        stego_png = encode_stego(stego).getbuffer()
+
+        operation.stage('metrics')
+        metrics = {
+            'psnr': MultiLayerLSB.calculate_psnr(as_image(cover), as_image(stego)),
+            'mse': MultiLayerLSB.calculate_mse(as_image(cover), as_image(stego)),
+            'ssim': MultiLayerLSB.calculate_ssim(as_image(cover), as_image(stego)),
+            'bpp': MultiLayerLSB.calculate_bpp(message_upload.buffer, cover, bit_length=header_length + message_length),
+            'capacity': MultiLayerLSB.calculate_capacity(cover, rounds),
+            'rounds': rounds,
+            'rounds_used': rounds_used,
+            'layout': layout,
+            'message_size': message_upload.size
+        }
+        result = {'stego_png': stego_png, 'metrics': metrics, 'key': key, 'iv': iv, 'stego_delta': None}
+        if app.config['STEGO_STORAGE'] == 'delta':
+            result['stego_delta'] = MultiLayerLSB.stego_delta(cover, stego)
+        stego_hash = None
+        if memo_key:
+            stego_hash = content_hash(stego_png)
+            size = stego_png.nbytes + len(result['stego_delta'] or b'')
+            embed_memo.store(memo_key, dict(result, stego_hash=stego_hash), size)
+            memo_key = None
+        return dict(result, cover=cover, stego=stego, digests=(cover_hash, stego_hash)), None
+    finally:
+        if memo_key:
+            embed_memo.release(memo_key)
+
+def stego_blob(stego_key, cover_key, result):
+    """
+    Blob key and contents a new stego is stored as: the PNG, or with STEGO_STORAGE=delta
+    a delta against the cover, whose PNG is cached for the reads that follow.
+    """
+    if result['stego_delta'] is None:
+        return stego_key, result['stego_png']
+    key = StegoDeltas.key(stego_key)
+    stego_deltas.remember(key, result['stego_png'])
+    return key, StegoDeltas.pack(cover_key, result['stego_delta'])
+
+def submit_previews(cover_upload, cover_key, stego_key, result):
+    """Schedule previews of an embed's cover and stego. Returns their content hashes."""
+    cover, stego = result['cover'], result['stego']
+    if cover is None:
+        # A memoized result has no decoded images; the previews almost always exist already,
+        # and are otherwise rendered from copies of the files
+        cover = functools.partial(io.BytesIO, bytes(cover_upload.buffer))
+        stego = functools.partial(io.BytesIO, result['stego_png'])
+    else:
+        cover = as_image(cover[:1]) if cover.ndim == 4 else cover
+        stego = as_image(stego[:1]) if stego.ndim == 4 else stego
+    cover_hash, stego_hash = result['digests']
+    return (previews.submit(cover_upload.buffer, cover, cover_key, digest=cover_hash),
+            previews.submit(result['stego_png'], stego, stego_key, digest=stego_hash))
+
+# A payload's compressed size is estimated from a sample; it is refused only if it wouldn't fit even
+# compressing this many times better than the sample did
+COMPRESSION_ESTIMATE_MARGIN = 1.5
+
+def capacity_error(cover_upload, message_upload, rounds, layout, is_encrypted, compression):
+    """
+    Refuse a payload that cannot fit in the cover, from the image header alone.
+
+    A payload that fits uncompressed is admitted. One that doesn't, but will be
+    compressed, is judged by the ratio its codec reaches on a sample of it,
+    with COMPRESSION_ESTIMATE_MARGIN of slack for the rest of the payload
+    compressing better; embed_data makes the exact check on what is admitted.
+    Returns:
+        None, or a 413 error response.
+    """
+    bit_length = MultiLayerLSB.embedded_bit_length(
+        message_upload.buffer,
+        is_encrypted=is_encrypted,
+        message_type=MultiLayerLSB.get_message_type(message_upload.filename),
+        layout=layout
+    )
+    if fits_cover(cover_upload, bit_length, rounds, layout):
+        return None
+    if compression != 'none':
+        _, ratio = MultiLayerLSB.estimate_compression(message_upload.buffer, compression, message_upload.extension)
+        if fits_cover(cover_upload, int(bit_length * ratio / COMPRESSION_ESTIMATE_MARGIN), rounds, layout):
+            return None
+    return jsonify({'error': 'Message too long for cover image capacity'}), 413
+
+def fits_cover(cover_upload, bit_length, rounds, layout):
+    """Whether `bit_length` embedded bits fit in an uploaded cover at `rounds`, from its header."""
+    try:
+        needed = MultiLayerLSB.minimum_rounds(cover_upload.file(), bit_length, layout)
+    except ValueError:
+        return False
+    return rounds == 'auto' or needed <= rounds
+
+@app.route('/api/mlsb/rounds', methods=['POST'])
+@admission.limit
+def rounds_tradeoff():
+    """
+    Minimum rounds for a cover/message pair and the predicted MSE/PSNR of every rounds value,
+    computed from the cover's histogram without embedding.
+    """
+    if 'cover_image' not in request.files or 'message_file' not in request.files:
+        return jsonify({'error': 'Missing required files'}), 400
+
+    is_encrypted = request.form.get('is_encrypted', 'true').lower() == 'true'
+    compression = parse_compression(request.form.get('compression'))
+    if compression is None:
+        return jsonify({'error': "compression must be 'auto', 'none', 'zlib', 'lzma' or 'bz2'"}), 400
+    layout = request.form.get('layout', 'plane').lower()
+    if layout not in MultiLayerLSB.LAYOUTS:
+        return jsonify({'error': "layout must be 'plane' or 'pixel'"}), 400
+
+    cover_upload = Upload(request.files['cover_image'])
+    message_upload = Upload(request.files['message_file'])
+    try:
+        error = admission.admit(estimate_cost('rounds', MultiLayerLSB.sample_count(cover_upload.file()),
+                                              message_upload.size))
+        if error:
+            return error
+
+        cover = MultiLayerLSB.load_image(cover_upload.file())
+        bit_length = MultiLayerLSB.embedded_bit_length(
+            message_upload.buffer,
+            is_encrypted=is_encrypted,
+            compression=compression,
+            message_type=MultiLayerLSB.get_message_type(message_upload.filename),
+            file_extension=message_upload.extension,
+            layout=layout
+        )
+        try:
+            minimum_rounds = MultiLayerLSB.minimum_rounds(cover, bit_length, layout)
+        except ValueError:
+            minimum_rounds = None
+
+        return jsonify({
+            'success': True,
+            'bit_length': bit_length,
+            'minimum_rounds': minimum_rounds,
+            'sweep': MultiLayerLSB.rounds_sweep(cover, bit_length, layout)
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cover_upload.close()
+        message_upload.close()
+
+@app.route('/api/scan', methods=['POST'])
+@admission.limit
+def scan_images():
+    """
+    Scan uploaded images for LSB payloads (chi-square, RS, sample pairs and our header).
+    Send one or more files in the 'images' field.
+    """
+    images = [f for f in request.files.getlist('images') if f.filename]
+    if not images:
+        return jsonify({'error': 'No images uploaded'}), 400
+
+    uploads = [Upload(image) for image in images]
+    try:
+        # Workers get the encoded bytes and decode in parallel
+        sources = [(upload.filename, bytes(upload.buffer)) for upload in uploads]
+    finally:
+        for upload in uploads:
+            upload.close()
 
-@app.route('/api/mlsb/extract', methods=['POST'])
-def extract_message():
+    try:
+        pooled = len(sources) > 1 and app.config['SCAN_WORKERS'] > 0
+        # The encoded batch is held here while up to SCAN_WORKERS images are decoded at once
+        concurrent = min(len(sources), app.config['SCAN_WORKERS']) if pooled else 1
+        largest = max(MultiLayerLSB.sample_count(data) for _, data in sources)
+        error = admission.admit(sum(len(data) for _, data in sources)
+                                + concurrent * estimate_cost('scan', largest))
+        if error:
+            return error
+
+        report = StegScanner.scan_batch(sources, workers=0,
+                                        executor=get_scan_pool() if pooled else None)
+        return jsonify({'success': True, **report})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def extract_from_request():
+    """
+    Decode the uploaded stego image once and recover its payload.
+    Returns:
+        tuple: (payload bytes, media type, None) on success, or (None, None, error response).
+    """
     if 'stego_image' not in request.files:
-        return jsonify({'error': 'Missing stego image'}), 400
+        return None, None, (jsonify({'error': 'Missing stego image'}), 400)
 
     stego_image = request.files['stego_image']
     is_encrypted = request.form.get('is_encrypted', 'true').lower() == 'true'
@@ -412,38 +862,147 @@ def extract_message():
     iv = request.form.get('iv', '')
 
     if stego_image.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
+        return None, None, (jsonify({'error': 'No selected file'}), 400)
 
     if is_encrypted and (not key or not iv):
-        return jsonify({'error': 'Encryption key and IV are required when encryption is enabled'}), 400
+        return None, None, (jsonify({'error': 'Encryption key and IV are required when encryption is enabled'}), 400)
+
+    key_bytes = bytes.fromhex(key) if is_encrypted else None
+    iv_bytes = bytes.fromhex(iv) if is_encrypted else None
+
+    def extract(stego):
+        # extract_data reports the media type from the header it already parsed
+        try:
+            message, media_type = MultiLayerLSB.extract_data(
+                stego,
+                is_encrypted=is_encrypted,
+                key=key_bytes,
+                iv=iv_bytes,
+                workers=app.config['EMBED_WORKERS'],
+                progress=operation.report,
+                max_length=app.config['EXTRACT_MAX_BYTES']
+            )
+        except ValueError as e:
+            # A bad header, the wrong key or a payload expanding past the decompression limit
+            return None, None, (jsonify({'error': str(e)}), 400)
+        return message, media_type, None
+
+    # The stego upload is only needed for this request; decode it from memory, once
+    stego_upload = Upload(stego_image)
+    try:
+        samples = MultiLayerLSB.sample_count(stego_upload.file())
+        operation = operations.current()
+        operation.stage('queued')
+        if MultiLayerLSB.decodes_partially(stego_upload.file()):
+            # Non-interlaced PNGs decode just the rows holding the header, so the whole request is costed up front
+            try:
+                header = MultiLayerLSB.read_header(stego_upload.file())
+            except ValueError as e:
+                return None, None, (jsonify({'error': str(e)}), 400)
+            error = admission.admit(extract_cost(samples, header))
+            if error:
+                return None, None, error
+            operation.stage('decode')
+            stego = MultiLayerLSB.load_image(stego_upload.file())
+        else:
+            # Anything else decodes whole: admit the decode, then the payload its header describes
+            decode_cost = estimate_cost('extract', samples)
+            error = admission.admit(decode_cost)
+            if error:
+                return None, None, error
+            operation.stage('decode')
+            image = MultiLayerLSB.open_image(stego_upload.file())
+            stego = MultiLayerLSB.load_image(image)
+            try:
+                header = MultiLayerLSB.read_header(stego)
+            except ValueError as e:
+                return None, None, (jsonify({'error': str(e)}), 400)
+            error = admission.admit(extract_cost(samples, header) - decode_cost)
+            if error:
+                return None, None, error
+            if header[-1] is not None:
+                # Striped across frames: decode the frames after the first that hold payload
+                stego = MultiLayerLSB.load_frames(image, count=header[-1])
+    finally:
+        stego_upload.close()
+
+    return extract(stego)
+
+def extract_cost(samples, header):
+    """
+    Estimated cost of extracting the payload a stego header describes: its embedded bytes, and for
+    a compressed payload the worst case of its codec, up to the limit extract_data enforces.
+    """
+    _, codec, _, message_length, _, _, _ = header
+    # A header can claim more than the image holds; extract_data reads what is there
+    embedded = min(-(-message_length // 8), samples)
+    decompressed = 0
+    if codec != 'none':
+        decompressed = min(embedded * MultiLayerLSB.CODEC_MAX_EXPANSION[codec],
+                           MultiLayerLSB.decompression_limit(samples, app.config['EXTRACT_MAX_BYTES']))
+    return estimate_cost('extract', samples, embedded, decompressed_bytes=decompressed)
+
+# Leading bytes of the formats that are commonly hidden, checked in order
+PAYLOAD_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png', '.png'),
+    (b'\xff\xd8\xff', 'image/jpeg', '.jpg'),
+    (b'GIF8', 'image/gif', '.gif'),
+    (b'BM', 'image/bmp', '.bmp'),
+    (b'II*\x00', 'image/tiff', '.tiff'),
+    (b'MM\x00*', 'image/tiff', '.tiff'),
+    (b'ID3', 'audio/mpeg', '.mp3'),
+    (b'\xff\xfb', 'audio/mpeg', '.mp3'),
+    (b'\xff\xf3', 'audio/mpeg', '.mp3'),
+    (b'fLaC', 'audio/flac', '.flac'),
+    (b'OggS', 'audio/ogg', '.ogg'),
+]
+
+def payload_content_type(payload, media_type):
+    """
+    Content type and file extension for an extracted payload.
+    Args:
+        payload (bytes): The recovered payload.
+        media_type (str): Media type from the stego header ('text', 'image' or 'audio').
+    Returns:
+        tuple: (content type, extension)
+    """
+    if media_type == 'text':
+        # Flask appends charset=utf-8 to text/* types
+        return 'text/plain', '.txt'
+    head = bytes(payload[:12])
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'audio/wav', '.wav'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp', '.webp'
+    for signature, content_type, extension in PAYLOAD_SIGNATURES:
+        if head.startswith(signature):
+            return content_type, extension
+    fallback = {'image': ('image/png', '.png'), 'audio': ('audio/mpeg', '.mp3')}
+    return fallback.get(media_type, ('application/octet-stream', '.bin'))
 
+@app.route('/api/mlsb/extract', methods=['POST'])
+@operations.track
+@admission.limit
+def extract_message():
     try:
-        stego_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(stego_image.filename))
-        stego_image.save(stego_path)
+        message, media_type, error = extract_from_request()
+        if error:
+            return error
 
-        media_type = MultiLayerLSB.get_media_type(stego_path)
         extension_map = {
             'text': '.txt',
             'image': '.png',
             'audio': '.mp3'
         }
         ext = extension_map.get(media_type, '.bin')
-        output_path = os.path.join(app.config['UPLOAD_FOLDER'], f"extracted_message{ext}")
-
-        key_bytes = bytes.fromhex(key) if is_encrypted else None
-        iv_bytes = bytes.fromhex(iv) if is_encrypted else None
-
-        message, media_type = MultiLayerLSB.extract_message(
-            stego_path, 
-            output_path=output_path, 
-            is_encrypted=is_encrypted, 
-            key=key_bytes, 
-            iv=iv_bytes
-        )
+        # Kept for older clients; /api/mlsb/extract/stream returns the payload without touching disk.
+        # Every extract gets its own key, still under the transient 'extracted_message' prefix
+        output_key = f"extracted_message_{secrets.token_hex(8)}{ext}"
+        blob_store.put(output_key, message)
 
         response = {
             'success': True,
-            'output_path': output_path,
+            'output_path': output_key,
             'media_type': media_type
         }
         if media_type == 'text':
@@ -462,6 +1021,68 @@ def extract_message():
         print(f"Extraction error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/mlsb/extract/stream', methods=['POST'])
+@operations.track
+@admission.limit
+def extract_message_stream():
+    """
+    Extract and return the payload itself in the response body.
+
+    The stego image is decoded once and nothing is written to disk. Text is
+    served inline as UTF-8; images and audio are attachments with a content
+    type sniffed from the payload. The header's media type is echoed in
+    X-Media-Type.
+    """
+    try:
+        message, media_type, error = extract_from_request()
+        if error:
+            return error
+
+        content_type, ext = payload_content_type(message, media_type)
+        response = send_file(
+            io.BytesIO(message),
+            mimetype=content_type,
+            as_attachment=media_type != 'text',
+            download_name=f"extracted_message{ext}",
+            etag=False,
+            max_age=0
+        )
+        response.headers['Cache-Control'] = 'no-store'
+        response.headers['X-Media-Type'] = media_type
+        return response
+
+    except Exception as e:
+        print(f"Extraction error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/operations/<operation_id>/events', methods=['GET'])
+def operation_events(operation_id):
+    """
+    Server-Sent Events with the progress of a request sent with X-Operation-Id: <operation_id>.
+
+    'progress' events carry {stage, done, total, plane}; the stream ends with a
+    'done' event ({status}) or a 'failed' event ({status, error}). Reconnecting
+    with Last-Event-ID resumes after that event.
+    """
+    events = operations.stream(operation_id, request.headers.get('Last-Event-ID'))
+    if events is None:
+        return jsonify({'error': 'Unknown operation'}), 404
+    response = Response(events, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/admission', methods=['GET'])
+def admission_status():
+    """Budget in use, queued requests and rejections of this worker's admission control."""
+    return jsonify(admission.stats())
+
+@app.route('/api/memo', methods=['GET'])
+def memo_status():
+    """Size and hit rate of this worker's embed memo and of its cache of rebuilt delta-stored stegos."""
+    return jsonify(dict(embed_memo.stats(), stego_deltas=stego_deltas.stats()))
+
 @app.route('/api/mlsb/capacity', methods=['POST'])
 def calculate_capacity():
     if 'image' not in request.files:
@@ -473,20 +1094,21 @@ def calculate_capacity():
     if image.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
+    image_upload = Upload(image)
     try:
-        image_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(image.filename))
-        image.save(image_path)
-
-        mlsb = MultiLayerLSB(image_path, None)
-        capacity = mlsb.calculate_capacity(image_path, rounds)
+        # Only the image header is needed, so the upload is never written to disk
+        capacity = MultiLayerLSB.calculate_capacity(image_upload.file(), rounds)
 
         return jsonify({
             'success': True,
-            'capacity': capacity
+            'capacity': capacity,
+            **MultiLayerLSB.image_mode(image_upload.file())
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    finally:
+        image_upload.close()
 
 
 @app.route('/api/mlsb/download', methods=['GET'])
@@ -495,8 +1117,11 @@ def download_file():
     if not file_path:
         return jsonify({'error': 'No file path provided'}), 400
     
+    key = blob_key(file_path, app.config['UPLOAD_FOLDER'])
+    if not key:
+        return jsonify({'error': 'File not found'}), 404
     try:
-        return send_file(file_path, as_attachment=True)
+        return send_blob(key, as_attachment=True)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
@@ -526,13 +1151,18 @@ def signup():
 def add_cors_headers(response):
     response.headers['Access-Control-Allow-Origin'] = 'http://localhost:3000'
     response.headers['Access-Control-Allow-Credentials'] = 'true'
-    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type, X-Operation-Id, Idempotency-Key'
     response.headers['Access-Control-Allow-Methods'] = 'GET,POST,PUT,DELETE,OPTIONS'
+    response.headers['Access-Control-Expose-Headers'] = 'Content-Disposition, X-Media-Type, Retry-After, Idempotent-Replayed'
     return response
 
 @app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    # Blob keys are flat file names; other paths (subdirectories, '..') name no blob
+    key = blob_key(filename, app.config['UPLOAD_FOLDER'])
+    if not key:
+        return jsonify({"error": "File not found"}), 404
+    return send_blob(key)
 
 @app.route('/api/steg_rooms/<int:id>', methods=['DELETE'])
 def delete_room(id):
@@ -545,12 +1175,254 @@ def delete_room(id):
         return jsonify({"error": "Room not found or unauthorized"}), 404
 
     try:
-        # Delete the room from the database
-        db.session.delete(room)
-        db.session.commit()
-        return jsonify({"message": "Room deleted successfully"}), 200
+        # Delete the room, then the files no other room or demo still uses
+        reclaimed = storage.delete_with_files(room)
+        response_cache.invalidate(f'stegoroom:{id}', f"steg_rooms:{session['user_id']}")
+        return jsonify({"message": "Room deleted successfully", "reclaimed_bytes": reclaimed}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def parse_metrics(metrics):
+    """Metrics are stored as str(dict), possibly with np.float64(...) wrappers; return them as a dict."""
+    if not metrics:
+        return None
+    try:
+        return ast.literal_eval(re.sub(r'np\.float64\(([^)]*)\)', r'\1', metrics))
+    except (ValueError, SyntaxError):
+        return {'raw': metrics}
+
+def room_archive_entries(room, prefix=''):
+    """(arcname, source) pairs for a room's export: cover, stego, original message and metrics."""
+    entries = []
+    # Stego images are always written as PNG, whatever the cover's extension.
+    # Missing blobs are skipped, e.g. sample rooms whose message_file holds the message text.
+    members = [(room.cover_image, 'cover_{}'), (room.stego_image, 'stego.png'), (room.message_file, 'message_{}')]
+    for value, arcname in members:
+        key = blob_key(value, app.config['UPLOAD_FOLDER'])
+        if key:
+            entries.append((prefix + arcname.format(upload_name(key)), blob_source(key)))
+    info = {
+        "id": room.id,
+        "name": room.name,
+        "is_encrypted": room.is_encrypted,
+        "metrics": parse_metrics(room.metrics)
+    }
+    if room.is_key_stored:
+        info['key'] = room.key
+        info['iv'] = room.iv
+    entries.append((f"{prefix}metrics.json", json.dumps(info, indent=2, default=float).encode('utf-8')))
+    return entries
+
+def blob_source(key):
+    """Lazy stream_zip source for a blob: opened only when the archive reaches it."""
+    def open_blob():
+        info = blob_store.stat(key)
+        if info is None:
+            raise FileNotFoundError(key)
+        if is_delta(key):
+            stego = stego_deltas.read(key)
+            return io.BytesIO(stego), len(stego), info.mtime
+        return blob_store.open(key), info.size, info.mtime
+    return open_blob
+
+def send_blob(key, mimetype=None, download_name=None, as_attachment=False):
+    """
+    Serve a blob with conditional and range request support.
+
+    Local blobs go through send_file (sendfile where the server supports it);
+    remote ones are streamed, and a Range request fetches only that range.
+    Delta-stored stegos are served as the PNG they stand for.
+    """
+    if is_delta(key):
+        return send_stego_delta(key, download_name, as_attachment)
+    path = blob_store.local_path(key)
+    if path is not None:
+        if not os.path.isfile(path):
+            return jsonify({"error": "File not found"}), 404
+        return send_file(path, mimetype=mimetype, download_name=download_name or upload_name(key),
+                         as_attachment=as_attachment, conditional=True)
+
+    info = blob_store.stat(key)
+    if info is None:
+        return jsonify({"error": "File not found"}), 404
+    download_name = download_name or upload_name(key)
+    mimetype = mimetype or mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+    start, stop, status = 0, info.size, 200
+    byte_range = request.range
+    # If-Range: only honour the range if the client's copy is still current
+    if_range = request.if_range
+    if if_range.etag:
+        current = if_range.etag == info.etag
+    elif if_range.date:
+        current = int(info.mtime) <= if_range.date.timestamp()
+    else:
+        current = True
+    if byte_range is not None and current:
+        bounds = byte_range.range_for_length(info.size)
+        if bounds is None:
+            response = Response(status=416)
+            response.headers['Content-Range'] = f"bytes */{info.size}"
+            return response
+        (start, stop), status = bounds, 206
+
+    response = Response(blob_store.iter_range(key, start, stop), status=status, mimetype=mimetype,
+                        direct_passthrough=True)
+    response.content_length = stop - start
+    if status == 206:
+        response.headers['Content-Range'] = f"bytes {start}-{stop - 1}/{info.size}"
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                         filename=download_name)
+    response.set_etag(info.etag)
+    response.last_modified = int(info.mtime)
+    return response.make_conditional(request)
+
+def send_stego_delta(key, download_name=None, as_attachment=False):
+    """Serve a delta-stored stego as PNG, rebuilt from its cover unless it is cached."""
+    info = blob_store.stat(key)
+    if info is None:
+        return jsonify({"error": "File not found"}), 404
+    try:
+        stego = stego_deltas.read(key)
+    except FileNotFoundError:
+        return jsonify({"error": "Cover of the stego image not found"}), 404
+    download_name = download_name or upload_name(key[:-len(DELTA_SUFFIX)])
+    return send_file(io.BytesIO(stego), mimetype='image/png', download_name=download_name,
+                     as_attachment=as_attachment, conditional=True, etag=info.etag, last_modified=info.mtime)
+
+def zip_response(entries, filename):
+    return Response(
+        stream_with_context(stream_zip(entries, stored_extensions=MultiLayerLSB.COMPRESSED_EXTENSIONS)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@app.route('/api/steg_rooms/<int:id>/export', methods=['GET'])
+def export_room(id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    room = StegoRoom.query.filter_by(id=id, user_id=session['user_id']).first()
+    if not room:
+        return jsonify({"error": "Room not found or unauthorized"}), 404
+
+    return zip_response(room_archive_entries(room), f"stego_room_{room.id}.zip")
+
+@app.route('/api/steg_rooms/export', methods=['GET'])
+def export_rooms():
+    """Export several rooms in one archive: ?ids=1,2,3, or every room of the user if omitted."""
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    query = StegoRoom.query.filter_by(user_id=session['user_id'])
+    ids = request.args.get('ids')
+    if ids:
+        try:
+            ids = [int(room_id) for room_id in ids.split(',') if room_id.strip()]
+        except ValueError:
+            return jsonify({"error": "ids must be a comma-separated list of room IDs"}), 400
+        query = query.filter(StegoRoom.id.in_(ids))
+    rooms = query.order_by(StegoRoom.id).all()
+    if not rooms:
+        return jsonify({"error": "No rooms to export"}), 404
+
+    def entries():
+        for room in rooms:
+            folder = secure_filename(room.name or '') or 'room'
+            yield from room_archive_entries(room, prefix=f"{room.id}_{folder}/")
+
+    return zip_response(entries(), "stego_rooms.zip")
+
+@app.route('/api/steg_rooms/<int:id>/files/<kind>', methods=['GET'])
+def room_file(id, kind):
+    """Serve one room artifact as a file (sendfile where the server supports it) instead of base64 JSON."""
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    room = StegoRoom.query.filter_by(id=id, user_id=session['user_id']).first()
+    if not room:
+        return jsonify({"error": "Room not found or unauthorized"}), 404
+
+    paths = {'cover': room.cover_image, 'stego': room.stego_image, 'message': room.message_file}
+    if kind not in paths:
+        return jsonify({"error": "Unknown file kind"}), 400
+    key = blob_key(paths[kind], app.config['UPLOAD_FOLDER'])
+    if not key:
+        return jsonify({"error": "File not found"}), 404
+
+    download_name = 'stego.png' if kind == 'stego' else upload_name(key)
+    mimetype = 'image/png' if kind == 'stego' else None
+    return send_blob(key, mimetype=mimetype, download_name=download_name,
+                     as_attachment=request.args.get('download') == '1')
+
+def preview_source(key):
+    """Opener of a stored image for PreviewStore.ensure; delta stegos are rebuilt first."""
+    if is_delta(key):
+        return lambda: io.BytesIO(stego_deltas.read(key))
+    return lambda: blob_store.open(key)
+
+def preview_urls(digest):
+    """URL of every preview size of an image, by size name."""
+    return {size: url_for('preview_file', digest=digest, size=size) for size in PREVIEW_SIZES}
+
+@app.route('/api/previews/<digest>/<size>', methods=['GET'])
+def preview_file(digest, size):
+    """
+    A downscaled preview, WebP if the client accepts it and JPEG otherwise.
+    The URL names the source's content hash, so the response never changes and is cached for a year.
+    """
+    if size not in PREVIEW_SIZES or not re.fullmatch(r'[0-9a-f]{64}', digest):
+        return jsonify({"error": "Unknown preview"}), 404
+
+    fmt = 'webp' if request.accept_mimetypes['image/webp'] else 'jpg'
+    previews.wait(digest)
+    path = previews.path(digest, size, fmt)
+    if not os.path.isfile(path):
+        # Pruned after going unused (or never rendered on this node): render it again from its source
+        key = previews.source(digest)
+        if not key or not blob_store.exists(key):
+            return jsonify({"error": "Preview not found"}), 404
+        try:
+            previews.ensure(key, preview_source(key))
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+        if not os.path.isfile(path):
+            return jsonify({"error": "Preview not found"}), 404
+    previews.touch(path)
+
+    response = send_file(path, mimetype=PREVIEW_FORMATS[fmt][1], conditional=True, max_age=365 * 24 * 60 * 60)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add('Accept')
+    return response
+
+@app.route('/api/steg_rooms/<int:id>/preview/<kind>', methods=['GET'])
+def room_preview(id, kind):
+    """Redirect to the preview of a room's cover or stego image (?size=thumb or view), rendering it if needed."""
+    if 'user_id' not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    room = StegoRoom.query.filter_by(id=id, user_id=session['user_id']).first()
+    if not room:
+        return jsonify({"error": "Room not found or unauthorized"}), 404
+
+    paths = {'cover': room.cover_image, 'stego': room.stego_image}
+    size = request.args.get('size', 'thumb')
+    if kind not in paths or size not in PREVIEW_SIZES:
+        return jsonify({"error": "Unknown preview"}), 400
+    key = blob_key(paths[kind], app.config['UPLOAD_FOLDER'])
+    if not key or not blob_store.exists(key):
+        return jsonify({"error": "File not found"}), 404
+
+    try:
+        digest = previews.ensure(key, preview_source(key))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    response = redirect(url_for('preview_file', digest=digest, size=size))
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 if __name__ == '__main__':     
     with app.app_context():
@@ -577,4 +1449,5 @@ if __name__ == '__main__':
                 db.session.commit()
                 print("Sample user and stego rooms added.")
             
+    storage.start()
     app.run(debug=True)
\ No newline at end of file
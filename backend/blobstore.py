@@ -0,0 +1,393 @@
+import io
+import itertools
+import os
+import re
+import secrets
+import tempfile
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1024 * 1024
+
+# What list() and stat() report about a blob; mtime is a POSIX timestamp
+BlobInfo = namedtuple('BlobInfo', ['key', 'size', 'mtime', 'etag'])
+
+
+def blob_key(value, upload_folder):
+    """
+    Key of the blob a file column points at.
+
+    Rows written before blob storage hold a path inside the upload folder
+    ('uploads/cover.png'); newer rows hold the bare key ('cover.png').
+    Args:
+        value (str): Column value.
+        upload_folder (str): The legacy upload folder.
+    Returns:
+        str: The key, or None if the value doesn't name a managed blob.
+    """
+    if not value:
+        return None
+    if os.path.dirname(value):
+        if os.path.dirname(os.path.abspath(value)) != os.path.abspath(upload_folder):
+            return None
+        value = os.path.basename(value)
+    if value in ('', '.', '..'):
+        return None
+    return value
+
+
+# upload_key's token: 16 hex digits and an underscore in front of the filename
+UPLOAD_KEY_TOKEN = re.compile(r'^[0-9a-f]{16}_')
+
+
+def upload_key(filename):
+    """
+    Fresh key for a file an upload creates: the filename behind a random token.
+    Uploads sharing a filename get different keys, so a later one never overwrites
+    an earlier one's blobs, or the stego deltas built on them.
+    Args:
+        filename (str): Sanitised filename, e.g. 'cover.png' or 'stego_cover.png'.
+    Returns:
+        str: The key, e.g. '3f9c0a1b2d4e5f60_cover.png'.
+    """
+    return f"{secrets.token_hex(8)}_{filename}"
+
+
+def upload_name(key):
+    """Filename an upload_key was made from; keys without a token are returned unchanged."""
+    return UPLOAD_KEY_TOKEN.sub('', key, count=1)
+
+
+class BlobStore:
+    """
+    Flat key -> bytes storage for uploads and generated files.
+
+    Methods:
+        put(key, data): Store bytes-like data (or a binary file object) under key.
+        open(key): Binary file object streaming the blob. Raises FileNotFoundError.
+        read(key): The whole blob as bytes.
+        read_range(key, start, stop): Bytes [start, stop) of the blob.
+        iter_range(key, start, stop, chunk_size): Yields bytes [start, stop) in chunks.
+        stat(key): BlobInfo, or None if the blob doesn't exist.
+        delete(key): Remove the blob. Returns the bytes reclaimed (0 if it didn't exist).
+        list(): Yields a BlobInfo for every blob.
+        local_path(key): Filesystem path of the blob if it has one, else None.
+    """
+
+    def read(self, key):
+        with self.open(key) as f:
+            return f.read()
+
+    def iter_range(self, key, start, stop, chunk_size=CHUNK_SIZE):
+        for offset in range(start, stop, chunk_size):
+            yield self.read_range(key, offset, min(offset + chunk_size, stop))
+
+    def exists(self, key):
+        return self.stat(key) is not None
+
+    def local_path(self, key):
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs as files in one directory; writes go through a temporary file and an atomic rename."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key):
+        path = os.path.join(self.root, key)
+        if os.path.dirname(path) != self.root:
+            raise ValueError(f"Invalid blob key: {key}")
+        return path
+
+    def put(self, key, data):
+        path = self._path(key)
+        # A temporary file of its own per write, so concurrent puts of one key never share one
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if hasattr(data, 'read'):
+                    while True:
+                        chunk = data.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                else:
+                    f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def open(self, key):
+        return open(self._path(key), 'rb')
+
+    def read_range(self, key, start, stop):
+        with self.open(key) as f:
+            f.seek(start)
+            return f.read(max(stop - start, 0))
+
+    def iter_range(self, key, start, stop, chunk_size=CHUNK_SIZE):
+        with self.open(key) as f:
+            f.seek(start)
+            remaining = stop - start
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def stat(self, key):
+        try:
+            st = os.stat(self._path(key))
+        except (FileNotFoundError, ValueError):
+            return None
+        return BlobInfo(key, st.st_size, st.st_mtime, f"{st.st_mtime_ns:x}-{st.st_size:x}")
+
+    def delete(self, key):
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        return size
+
+    def list(self):
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                # Leftover .part files from interrupted writes are listed too, so the sweeper reclaims them
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat()
+                yield BlobInfo(entry.name, st.st_size, st.st_mtime, f"{st.st_mtime_ns:x}-{st.st_size:x}")
+
+    def local_path(self, key):
+        return self._path(key)
+
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs as objects in an S3-compatible bucket.
+
+    One boto3 client (thread-safe, with a pool of keep-alive connections) is
+    shared by all requests. Blobs above the multipart threshold are uploaded
+    in parts, several at a time; file objects are read a part at a time as
+    the parts are sent, so at most upload_concurrency + 1 parts of a blob are
+    in memory. Reads stream the response body, and range reads fetch only the
+    bytes asked for.
+    """
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, pool_size=32,
+                 multipart_threshold=16 * 1024 * 1024, part_size=8 * 1024 * 1024, upload_concurrency=4,
+                 client=None):
+        """
+        Args:
+            bucket (str): Bucket name.
+            prefix (str, optional): Prepended to every key, e.g. 'uploads/'.
+            endpoint_url (str, optional): For S3-compatible services other than AWS.
+            region (str, optional): Bucket region.
+            pool_size (int, optional): Maximum pooled HTTP connections. Default is 32.
+            multipart_threshold (int, optional): Blobs at least this large use multipart uploads. Default is 16MB.
+            part_size (int, optional): Multipart part size; S3 requires at least 5MB. Default is 8MB.
+            upload_concurrency (int, optional): Parts of one blob uploaded at a time. Default is 4.
+            client (optional): A ready boto3 S3 client; built from the other arguments if omitted.
+        """
+        self.bucket = bucket
+        self.prefix = prefix
+        self.multipart_threshold = multipart_threshold
+        self.part_size = part_size
+        self.upload_concurrency = upload_concurrency
+        if client is None:
+            import boto3
+            from botocore.config import Config
+            client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region, config=Config(
+                max_pool_connections=pool_size,
+                retries={'max_attempts': 5, 'mode': 'standard'}
+            ))
+        self.client = client
+        self._part_pool = None
+        self._lock = threading.Lock()
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def _parts(self):
+        with self._lock:
+            if self._part_pool is None:
+                self._part_pool = ThreadPoolExecutor(max_workers=self.upload_concurrency,
+                                                     thread_name_prefix='s3-part')
+            return self._part_pool
+
+    @staticmethod
+    def _missing(error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def put(self, key, data):
+        if hasattr(data, 'read'):
+            parts = self._read_parts(data)
+        else:
+            data = memoryview(data).cast('B')
+            parts = (data[offset:offset + self.part_size] for offset in range(0, data.nbytes, self.part_size))
+        # Read no further than the threshold before choosing between one request and a multipart upload
+        head = []
+        size = 0
+        for part in parts:
+            head.append(part)
+            size += len(part)
+            if size >= self.multipart_threshold:
+                self._put_multipart(self._key(key), itertools.chain(head, parts))
+                return
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=b''.join(head))
+
+    def _read_parts(self, f):
+        """Yield a file object's contents in part_size pieces; only the last may be shorter."""
+        while True:
+            part = f.read(self.part_size)
+            if not part:
+                return
+            # S3 refuses short parts other than the last, so top up short reads
+            while len(part) < self.part_size:
+                more = f.read(self.part_size - len(part))
+                if not more:
+                    break
+                part += more
+            yield part
+
+    def _put_multipart(self, key, parts):
+        upload_id = self.client.create_multipart_upload(Bucket=self.bucket, Key=key)['UploadId']
+
+        def upload_part(number, body):
+            # Slices of an in-memory buffer are copied out one part at a time per thread
+            response = self.client.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                               PartNumber=number, Body=bytes(body))
+            return {'PartNumber': number, 'ETag': response['ETag']}
+
+        pending = deque()
+        done = []
+        try:
+            for number, body in enumerate(parts, start=1):
+                # The next part is only read once one of upload_concurrency in flight has finished
+                if len(pending) >= self.upload_concurrency:
+                    done.append(pending.popleft().result())
+                pending.append(self._parts().submit(upload_part, number, body))
+            done.extend(future.result() for future in pending)
+            self.client.complete_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                                  MultipartUpload={'Parts': done})
+        except Exception:
+            for future in pending:
+                future.cancel()
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    def _get(self, key, byte_range=None):
+        from botocore.exceptions import ClientError
+        kwargs = {'Bucket': self.bucket, 'Key': self._key(key)}
+        if byte_range:
+            kwargs['Range'] = byte_range
+        try:
+            return self.client.get_object(**kwargs)['Body']
+        except ClientError as e:
+            if self._missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def open(self, key):
+        return _StreamingReader(self._get(key))
+
+    def read_range(self, key, start, stop):
+        if stop <= start:
+            return b''
+        body = self._get(key, f"bytes={start}-{stop - 1}")
+        try:
+            return body.read()
+        finally:
+            body.close()
+
+    def iter_range(self, key, start, stop, chunk_size=CHUNK_SIZE):
+        # One ranged GET, streamed, rather than a request per chunk
+        if stop <= start:
+            return
+        body = self._get(key, f"bytes={start}-{stop - 1}")
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def stat(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if self._missing(e):
+                return None
+            raise
+        return BlobInfo(key, head['ContentLength'], head['LastModified'].timestamp(), head['ETag'].strip('"'))
+
+    def delete(self, key):
+        info = self.stat(key)
+        if info is None:
+            return 0
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        return info.size
+
+    def list(self):
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get('Contents', []):
+                key = item['Key'][len(self.prefix):]
+                if key and '/' not in key:
+                    yield BlobInfo(key, item['Size'], item['LastModified'].timestamp(), item['ETag'].strip('"'))
+
+
+class _StreamingReader(io.RawIOBase):
+    """Read-only file object over a botocore StreamingBody."""
+
+    def __init__(self, body):
+        self._body = body
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._body.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def read(self, size=-1):
+        return self._body.read(None if size is None or size < 0 else size)
+
+    def close(self):
+        if not self.closed:
+            self._body.close()
+        super().close()
+
+
+def create_store(config):
+    """
+    Blob store described by the app config.
+
+    BLOB_STORAGE is 'local' (files in UPLOAD_FOLDER) or 's3' (BLOB_S3_BUCKET,
+    BLOB_S3_PREFIX, BLOB_S3_ENDPOINT_URL, BLOB_S3_REGION, BLOB_S3_POOL_SIZE).
+    The S3 backend needs the optional boto3 package; credentials come from the
+    usual AWS environment variables or config files.
+    """
+    backend = config['BLOB_STORAGE']
+    if backend == 'local':
+        return LocalBlobStore(config['UPLOAD_FOLDER'])
+    if backend == 's3':
+        return S3BlobStore(
+            config['BLOB_S3_BUCKET'],
+            prefix=config['BLOB_S3_PREFIX'],
+            endpoint_url=config['BLOB_S3_ENDPOINT_URL'],
+            region=config['BLOB_S3_REGION'],
+            pool_size=config['BLOB_S3_POOL_SIZE']
+        )
+    raise ValueError(f"Unknown BLOB_STORAGE backend: {backend}")
@@ -0,0 +1,99 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+from werkzeug.http import http_date
+
+
+class LRUBackend:
+    """
+    In-process cache backend: a bounded mapping that evicts the least recently used key.
+
+    Each worker process has its own copy, so invalidations made by one worker are
+    not seen by the others; run several workers against a shared backend instead.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class ResponseCache:
+    """
+    Cache of JSON GET responses with ETag/Last-Modified validators.
+
+    Entries are built on the first read after an invalidation and stay valid
+    until the view's writers invalidate them, so a poll that hits the cache
+    touches neither the database nor the JSON encoder, and a client that
+    revalidates with If-None-Match or If-Modified-Since gets a bodyless 304.
+
+    The backend is any object with get(key) -> bytes or None, set(key, value)
+    and delete(*keys), e.g. LRUBackend or a redis.Redis client.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _pack(etag, last_modified, body):
+        return f"{etag} {last_modified}\n".encode() + body
+
+    @staticmethod
+    def _unpack(value):
+        meta, body = bytes(value).split(b'\n', 1)
+        etag, last_modified = meta.decode().split(' ')
+        return etag, int(last_modified), body
+
+    def respond(self, key, build):
+        """
+        Serve the cached response for `key`, building and storing it on a miss.
+        Args:
+            key (str): Cache key; must cover everything the response depends on.
+            build (callable): Returns the JSON-serialisable payload.
+        Returns:
+            Response: 200 with the body, or 304 if the request's validators still match.
+        """
+        value = self.backend.get(key)
+        if value is not None:
+            etag, last_modified, body = self._unpack(value)
+        else:
+            body = current_app.json.dumps(build()).encode()
+            etag = hashlib.sha1(body).hexdigest()
+            last_modified = int(time.time())
+            self.backend.set(key, self._pack(etag, last_modified, body))
+
+        response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Last-Modified'] = http_date(last_modified)
+        # Per-user data: browsers may keep it but must revalidate on every use
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+    def invalidate(self, *keys):
+        """Drop the entries for `keys`; the next read rebuilds them."""
+        self.backend.delete(*keys)
@@ -0,0 +1,76 @@
+from memo import Memo
+
+# Suffix of stego blobs stored as a delta against their cover
+DELTA_SUFFIX = '.delta'
+
+
+def is_delta(key):
+    """True if a blob key names a delta-stored stego."""
+    return bool(key) and key.endswith(DELTA_SUFFIX)
+
+
+class StegoDeltas:
+    """
+    Stego images stored as a delta against their cover instead of a second full image.
+
+    A stego differs from its cover only in the low bit planes of the samples the
+    payload reached, so with STEGO_STORAGE=delta the embed views store the output
+    of MultiLayerLSB.stego_delta (about the size of the payload) under
+    '<stego key>.delta', prefixed with the key of the cover it applies to.
+
+    Reads rebuild the stego from the cover blob and encode it again; the encoded
+    stegos are kept in a Memo so hot rooms are rebuilt once, and concurrent reads
+    of one room wait for the same rebuild. A delta is only valid while its cover
+    blob is unchanged: apply_delta checks a CRC and the read fails otherwise.
+    """
+
+    def __init__(self, store, rebuild, max_bytes=128 * 1024 * 1024, max_entries=64):
+        """
+        Args:
+            store (BlobStore): Where the deltas and their covers are stored.
+            rebuild (callable): rebuild(cover bytes, delta) -> the encoded stego (bytes-like).
+            max_bytes (int, optional): Total size of the rebuilt stegos kept in memory.
+            max_entries (int, optional): Maximum number of rebuilt stegos kept.
+        """
+        self.store = store
+        self.rebuild = rebuild
+        self._cache = Memo(max_bytes=max_bytes, max_entries=max_entries)
+
+    @staticmethod
+    def key(stego_key):
+        """Blob key of the delta that stands in for `stego_key`."""
+        return f"{stego_key}{DELTA_SUFFIX}"
+
+    @staticmethod
+    def pack(cover_key, delta):
+        """Blob contents of a delta: the cover's key on the first line, then the delta."""
+        return cover_key.encode('utf-8') + b'\n' + bytes(delta)
+
+    def remember(self, key, stego):
+        """Cache the encoded stego of a delta just written, so the first reads don't rebuild it."""
+        self._cache.store(key, stego, len(stego))
+
+    def read(self, key):
+        """
+        The encoded stego a delta stands for, rebuilt unless it is cached.
+        Raises:
+            FileNotFoundError: If the delta or its cover is missing.
+            ValueError: If the cover has changed since the delta was made.
+        """
+        stego = self._cache.claim(key)
+        if stego is not None:
+            return stego
+        try:
+            blob = self.store.read(key)
+            split = blob.index(b'\n')
+            cover = self.store.read(blob[:split].decode('utf-8'))
+            stego = self.rebuild(cover, memoryview(blob)[split + 1:])
+            self._cache.store(key, stego, len(stego))
+            return stego
+        except BaseException:
+            self._cache.release(key)
+            raise
+
+    def stats(self):
+        """Rebuilt stegos in memory, their size, and cache hits and misses."""
+        return self._cache.stats()
@@ -0,0 +1,84 @@
+import io
+import os
+import time
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZipSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that ZipFile writes into and the generator drains."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries, stored_extensions=(), chunk_size=CHUNK_SIZE):
+    """
+    Build a ZIP archive on the fly and yield it in chunks.
+
+    Nothing is buffered beyond the current chunk and no archive is written to
+    disk: ZipFile writes into a non-seekable sink, so each member gets a data
+    descriptor instead of a back-patched header.
+    Args:
+        entries (iterable): (arcname, source) pairs. source is a file path (str), the member's bytes,
+            or a callable returning (binary file object, size, mtime), e.g. to stream from blob storage.
+            Paths and callables that raise FileNotFoundError are skipped.
+        stored_extensions (collection): Extensions of already-compressed formats; these members
+            are stored instead of deflated.
+        chunk_size (int, optional): Read size for file members. Default is 64KB.
+    Yields:
+        bytes: Consecutive pieces of the archive.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for arcname, source in entries:
+            if isinstance(source, str):
+                try:
+                    src = open(source, 'rb')
+                except FileNotFoundError:
+                    continue
+                size = os.fstat(src.fileno()).st_size
+                mtime = os.fstat(src.fileno()).st_mtime
+            elif callable(source):
+                try:
+                    src, size, mtime = source()
+                except FileNotFoundError:
+                    continue
+            else:
+                src = io.BytesIO(source)
+                size = len(source)
+                mtime = time.time()
+
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime(mtime)[:6])
+            extension = os.path.splitext(arcname)[1].lower()
+            if extension in stored_extensions:
+                info.compress_type = zipfile.ZIP_STORED
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+            with src, archive.open(info, 'w', force_zip64=size >= zipfile.ZIP64_LIMIT) as member:
+                while True:
+                    chunk = src.read(chunk_size)
+                    if not chunk:
+                        break
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    # Closing the archive writes the central directory
+    yield sink.drain()
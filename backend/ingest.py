@@ -0,0 +1,120 @@
+import io
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Request, current_app
+from werkzeug.utils import secure_filename
+
+# Uploads up to this size stay in memory; larger ones are spooled to a temp file
+DEFAULT_SPOOL_THRESHOLD = 4 * 1024 * 1024
+
+# Background writer for files that only need to hit the disk after the response
+_persist_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='persist')
+
+
+class SpooledRequest(Request):
+    """
+    Request class that keeps uploads below a configurable size in memory.
+
+    Werkzeug spools anything over 500KB to a temporary file. Covers are usually
+    bigger than that, so the threshold is read from the app's
+    UPLOAD_SPOOL_THRESHOLD setting instead.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        threshold = current_app.config.get('UPLOAD_SPOOL_THRESHOLD', DEFAULT_SPOOL_THRESHOLD)
+        if total_content_length is not None and total_content_length <= threshold:
+            return io.BytesIO()
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+
+class Upload:
+    """
+    An uploaded file that is read exactly once.
+
+    The upload takes ownership of the request's file stream, so the bytes can
+    outlive the request while they are persisted in the background. The
+    contents are exposed without copying: in-memory uploads as a view of the
+    BytesIO buffer, spooled uploads as a read-only memory map.
+    """
+
+    def __init__(self, storage):
+        self.filename = secure_filename(storage.filename or '')
+        self.extension = os.path.splitext(self.filename)[1].lower()
+        self._stream = storage.stream
+        # Request teardown closes storage.stream; hand it a dummy instead
+        storage.stream = io.BytesIO()
+        self._map = None
+        self._buffer = None
+        self._persisting = False
+
+    @property
+    def buffer(self):
+        """memoryview over the upload's bytes."""
+        if self._buffer is None:
+            if isinstance(self._stream, io.BytesIO):
+                self._buffer = self._stream.getbuffer()
+            else:
+                self._stream.seek(0, os.SEEK_END)
+                if self._stream.tell() == 0:
+                    self._buffer = memoryview(b'')
+                else:
+                    self._map = mmap.mmap(self._stream.fileno(), 0, access=mmap.ACCESS_READ)
+                    self._buffer = memoryview(self._map)
+        return self._buffer
+
+    @property
+    def size(self):
+        return self.buffer.nbytes
+
+    def file(self):
+        """Seekable file-like object over the upload, positioned at the start."""
+        self.buffer
+        source = self._map if self._map is not None else self._stream
+        source.seek(0)
+        return source
+
+    def persist(self, store, key):
+        """Write the upload to a blob store in the background and release it afterwards."""
+        self._persisting = True
+        return persist_async(store, key, self.buffer, on_done=self._release)
+
+    def close(self):
+        """Release the upload unless a background write still needs it."""
+        if not self._persisting:
+            self._release()
+
+    def _release(self):
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._stream.close()
+
+
+def persist_async(store, key, data, on_done=None):
+    """
+    Write bytes-like data to a blob store on the background writer.
+    Args:
+        store (BlobStore): Destination store.
+        key (str): Blob key.
+        data (bytes-like): Contents to write.
+        on_done (callable, optional): Called once the write has finished or failed.
+    Returns:
+        concurrent.futures.Future: Completes when the blob is stored.
+    """
+    def write():
+        try:
+            store.put(key, data)
+        except Exception as e:
+            print(f"Error persisting {key}: {e}")
+            raise
+        finally:
+            if on_done is not None:
+                on_done()
+
+    return _persist_pool.submit(write)
+
@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from blobstore import blob_key
+
+
+class StorageLifecycle:
+    """
+    Ties blobs in the blob store to the database rows that reference them.
+
+    A file is owned by every row whose file columns point at it. Files are only
+    removed once no row references them, and only after the deleting
+    transaction has committed; if removal fails the sweeper picks the file up
+    later as an orphan.
+
+    The background sweeper removes:
+        - rows past their retention (e.g. demo runs) together with their files,
+        - transient files (e.g. extraction outputs) older than their retention,
+        - orphans: files no row references, once they are older than the grace
+          period (so uploads that are still being persisted are left alone),
+        - whatever the sweep hooks clean up (e.g. derived files in subfolders).
+
+    Nothing runs on construction: call start() from the process entry point
+    for a background sweeper thread, or run() for a foreground one.
+
+    Config:
+        LIFECYCLE_SWEEP_INTERVAL (seconds, 0 disables the background sweeper)
+        LIFECYCLE_ORPHAN_GRACE (seconds)
+        LIFECYCLE_TRANSIENT_RETENTION (seconds)
+        plus one retention setting per entry in `expiring`.
+    """
+
+    # Values per IN (...) query in referenced_keys
+    IN_BATCH = 500
+
+    def __init__(self, app, db, store, file_columns, expiring=(), transient_prefixes=(), sweep_hooks=()):
+        """
+        Args:
+            app (Flask): The application; UPLOAD_FOLDER is where rows written before blob storage point.
+            db (SQLAlchemy): Database handle.
+            store (BlobStore): The managed blobs.
+            file_columns (list): Model columns holding blob keys, e.g. [StegoRoom.cover_image, ...].
+            expiring (list): (model, timestamp column, retention config key) for rows that expire.
+            transient_prefixes (list): Filename prefixes of files no row ever owns.
+            sweep_hooks (list): Callables run at the end of each sweep, returning (files removed, bytes reclaimed).
+        """
+        self.app = app
+        self.db = db
+        self.store = store
+        self.file_columns = list(file_columns)
+        self.expiring = list(expiring)
+        self.transient_prefixes = tuple(transient_prefixes)
+        self.sweep_hooks = list(sweep_hooks)
+        self.reclaimed_files = 0
+        self.reclaimed_bytes = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _managed_key(self, value):
+        """Blob key a column value refers to, or None."""
+        return blob_key(value, self.app.config['UPLOAD_FOLDER'])
+
+    def files_of(self, row):
+        """Keys of the managed blobs referenced by a row."""
+        keys = set()
+        for column in self.file_columns:
+            if column.class_ is type(row):
+                key = self._managed_key(getattr(row, column.key))
+                if key:
+                    keys.add(key)
+        return keys
+
+    def _stored_values(self, key):
+        """Column values that can refer to a key: the key itself or a legacy upload folder path."""
+        folder = self.app.config['UPLOAD_FOLDER']
+        return {key, os.path.join(folder, key), os.path.join(os.path.abspath(folder), key)}
+
+    def referenced_keys(self, keys=None):
+        """
+        Managed blob keys referenced by any row.
+        Args:
+            keys (iterable, optional): Only look these keys up (an indexed IN query per column)
+                instead of reading every row. Default is every referenced key.
+        Returns:
+            set: The referenced keys.
+        """
+        if keys is not None:
+            values = sorted({value for key in keys for value in self._stored_values(key)})
+        referenced = set()
+        for column in self.file_columns:
+            query = self.db.session.query(column).filter(column.isnot(None))
+            if keys is None:
+                batches = [query.distinct()]
+            else:
+                # Batched to stay under the database's bound-parameter limit
+                batches = [query.filter(column.in_(values[start:start + self.IN_BATCH])).distinct()
+                           for start in range(0, len(values), self.IN_BATCH)]
+            for batch in batches:
+                for (value,) in batch:
+                    key = self._managed_key(value)
+                    if key:
+                        referenced.add(key)
+        return referenced
+
+    def delete_with_files(self, *rows):
+        """
+        Delete rows and then the blobs only they referenced.
+        Returns:
+            int: Bytes reclaimed.
+        """
+        keys = set()
+        for row in rows:
+            keys |= self.files_of(row)
+            self.db.session.delete(row)
+        self.db.session.commit()
+        return self.release(keys)
+
+    def release(self, keys):
+        """Remove the given blobs unless a row still references them. Returns bytes reclaimed."""
+        keys = set(keys)
+        if not keys:
+            return 0
+        referenced = self.referenced_keys(keys)
+        _, reclaimed = self._remove(key for key in keys if key not in referenced)
+        return reclaimed
+
+    def _remove(self, keys):
+        reclaimed = 0
+        files = 0
+        for key in keys:
+            try:
+                size = self.store.delete(key)
+            except Exception as e:
+                print(f"Could not remove {key}: {e}")
+                continue
+            if not size:
+                continue
+            reclaimed += size
+            files += 1
+        with self._lock:
+            self.reclaimed_files += files
+            self.reclaimed_bytes += reclaimed
+        return files, reclaimed
+
+    def sweep(self):
+        """
+        Run one garbage-collection pass.
+        Returns:
+            dict: Counts of expired rows and removed files, and bytes reclaimed.
+        """
+        config = self.app.config
+        now = time.time()
+        report = {'expired_rows': 0, 'files': 0, 'bytes': 0}
+
+        # Expired rows go first so their files become orphans below
+        utcnow = datetime.now(timezone.utc).replace(tzinfo=None)
+        released = set()
+        for model, timestamp_column, retention_key in self.expiring:
+            cutoff = utcnow - timedelta(seconds=config[retention_key])
+            rows = model.query.filter(timestamp_column < cutoff).all()
+            for row in rows:
+                released |= self.files_of(row)
+                self.db.session.delete(row)
+            report['expired_rows'] += len(rows)
+        self.db.session.commit()
+
+        referenced = self.referenced_keys()
+        grace = config['LIFECYCLE_ORPHAN_GRACE']
+        transient_retention = config['LIFECYCLE_TRANSIENT_RETENTION']
+        doomed = []
+        for blob in self.store.list():
+            if blob.key in referenced:
+                continue
+            age = now - blob.mtime
+            if blob.key in released:
+                doomed.append(blob.key)
+            elif blob.key.startswith(self.transient_prefixes):
+                if age > transient_retention:
+                    doomed.append(blob.key)
+            elif age > grace:
+                doomed.append(blob.key)
+
+        report['files'], report['bytes'] = self._remove(doomed)
+        for hook in self.sweep_hooks:
+            files, reclaimed = hook()
+            report['files'] += files
+            report['bytes'] += reclaimed
+            with self._lock:
+                self.reclaimed_files += files
+                self.reclaimed_bytes += reclaimed
+        return report
+
+    def start(self):
+        """Start the background sweeper thread."""
+        interval = self.app.config['LIFECYCLE_SWEEP_INTERVAL']
+        if interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, args=(interval,), name='storage-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, interval):
+        """Sweep every `interval` seconds until stop() is called."""
+        while not self._stop.wait(interval):
+            try:
+                with self.app.app_context():
+                    report = self.sweep()
+                if report['files'] or report['expired_rows']:
+                    print(f"Storage sweep: removed {report['expired_rows']} expired rows, "
+                          f"{report['files']} files, reclaimed {report['bytes']} bytes")
+            except Exception as e:
+                print(f"Storage sweep failed: {e}")
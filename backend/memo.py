@@ -0,0 +1,198 @@
+import functools
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, jsonify, request
+
+# Client-chosen idempotency keys, e.g. crypto.randomUUID()
+IDEMPOTENCY_KEY = re.compile(r'^[\x21-\x7e]{1,255}$')
+CHUNK_SIZE = 1024 * 1024
+
+
+def request_key(*parts):
+    """Hex SHA-256 of the parts, for use as a memo key."""
+    return hashlib.sha256('\0'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def upload_hash(field, upload):
+    """Content hash of an Upload, reusing the one the idempotency check took of the same form field."""
+    digest = g.get('upload_hashes', {}).get(field)
+    return digest or hashlib.sha256(upload.buffer).hexdigest()
+
+
+def _stream_hash(stream):
+    digest = hashlib.sha256()
+    stream.seek(0)
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class Memo:
+    """
+    Results of expensive work in an LRU bounded by total size and entry count.
+
+    While one request computes an entry, others claiming the same key wait for
+    it (up to `wait_timeout` seconds) instead of doing the work twice. Like
+    LRUBackend, a memo lives in one worker process.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, max_entries=256, wait_timeout=30):
+        """
+        Args:
+            max_bytes (int, optional): Total size of the stored results; least recently used ones are evicted.
+            max_entries (int, optional): Maximum number of stored results.
+            wait_timeout (float, optional): Seconds a request waits for an identical one in progress.
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._entries = OrderedDict()
+        self._pending = set()
+        self._bytes = 0
+        self._condition = threading.Condition()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def claim(self, key):
+        """
+        The stored value for `key`, or None if the caller should compute it. A caller that gets None
+        must store() or release() the key; until then, other claims of it wait.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        with self._condition:
+            while True:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                remaining = deadline - time.monotonic()
+                if key not in self._pending or remaining <= 0:
+                    # After a timeout the work is done twice; whichever stores last wins
+                    self._pending.add(key)
+                    self.misses += 1
+                    return None
+                self._condition.wait(remaining)
+
+    def store(self, key, value, size):
+        """Store a claimed key's value, `size` bytes large, and wake the requests waiting for it."""
+        with self._condition:
+            self._pending.discard(key)
+            if size <= self.max_bytes and self.max_entries > 0:
+                old = self._entries.pop(key, None)
+                if old is not None:
+                    self._bytes -= old[0]
+                self._entries[key] = (size, value)
+                self._bytes += size
+                while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                    _, (evicted_size, _) = self._entries.popitem(last=False)
+                    self._bytes -= evicted_size
+                    self.evictions += 1
+            self._condition.notify_all()
+
+    def release(self, key):
+        """Give up a claimed key without storing anything; a waiting request computes it instead."""
+        with self._condition:
+            self._pending.discard(key)
+            self._condition.notify_all()
+
+    def stats(self):
+        """Stored results, their size, and hits and misses so far."""
+        with self._condition:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+
+class EmbedMemo(Memo):
+    """
+    Memoized embed results, so a resubmitted embed skips the embed, encode and metrics work.
+
+    Unencrypted embeds are deterministic: views key them with request_key() over
+    the content hashes of the cover and message and every option that changes the
+    stego, and any client sending the same files gets the stored result. Encrypted
+    embeds draw a fresh key and IV each time, so they are never shared.
+
+    Requests with an Idempotency-Key header are keyed by client, endpoint and that
+    key instead, and a retry gets the first response replayed, encrypted or not.
+    The entry records a fingerprint of the request's form and files; reusing the
+    key for a different request is refused with 422. Only successful responses are
+    kept, so a failed request can be retried with the same key. Both kinds of entry
+    share one LRU.
+    """
+
+    def __init__(self, client_key, max_bytes=256 * 1024 * 1024, max_entries=256, wait_timeout=30):
+        """
+        Args:
+            client_key (callable): Returns the identity of the current client; idempotency keys are per client.
+            max_bytes, max_entries, wait_timeout: As for Memo.
+        """
+        super().__init__(max_bytes, max_entries, wait_timeout)
+        self.client_key = client_key
+        self.mismatches = 0
+
+    def stats(self):
+        """Memo.stats(), plus requests refused for reusing an Idempotency-Key."""
+        stats = super().stats()
+        with self._condition:
+            stats['idempotency_mismatches'] = self.mismatches
+        return stats
+
+    def idempotent(self, view):
+        """Decorator: replay the stored response of an earlier request with the same Idempotency-Key."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            header = request.headers.get('Idempotency-Key')
+            if header is None:
+                return view(*args, **kwargs)
+            if not IDEMPOTENCY_KEY.match(header):
+                return jsonify({'error': 'Invalid Idempotency-Key header'}), 400
+            key = request_key('idempotency', self.client_key(), request.path, header)
+            fingerprint = self._fingerprint()
+            replay = self.claim(key)
+            if replay is not None:
+                if replay['fingerprint'] != fingerprint:
+                    with self._condition:
+                        self.mismatches += 1
+                    return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+                response = current_app.response_class(replay['body'], status=replay['status'],
+                                                      mimetype=replay['mimetype'])
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except Exception:
+                self.release(key)
+                raise
+            if 200 <= response.status_code < 300 and not response.is_streamed:
+                body = response.get_data()
+                self.store(key, {'fingerprint': fingerprint, 'status': response.status_code,
+                                 'mimetype': response.mimetype, 'body': body}, len(body))
+            else:
+                self.release(key)
+            return response
+        return wrapper
+
+    @staticmethod
+    def _fingerprint():
+        """Hash of the request's form fields and uploaded files. The file hashes are kept for upload_hash()."""
+        g.upload_hashes = {field: _stream_hash(storage.stream) for field, storage in request.files.items()}
+        return request_key(sorted(request.form.items(multi=True)),
+                           sorted((field, storage.filename, g.upload_hashes[field])
+                                  for field, storage in request.files.items()))
@@ -0,0 +1,253 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# Longest side of each preview size in pixels
+PREVIEW_SIZES = {'thumb': 320, 'view': 1280}
+# Served WebP when the client accepts it, JPEG otherwise
+PREVIEW_FORMATS = {'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+                   'jpg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True})}
+CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(data):
+    """Hex SHA-256 of a bytes-like object."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def stream_hash(f):
+    """Hex SHA-256 of a binary file object's remaining contents, read in chunks."""
+    digest = hashlib.sha256()
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PreviewStore:
+    """
+    Downscaled WebP and JPEG previews of uploaded and generated images, named by content hash.
+
+    A preview's name is `<sha256 of the source file>-<size>.<format>`, so its
+    bytes never change and it can be served with an immutable, year-long cache
+    lifetime. Identical images share previews.
+
+    Previews are rendered on a background thread from the already decoded
+    pixel array, so the request that uploads or creates an image only pays
+    for hashing it. Reads of a preview that is still being rendered wait for
+    it.
+
+    Next to the previews, `<sha256>.src` records where the source is stored,
+    so a preview pruned after going unused can be rendered again when its URL
+    is next requested.
+    """
+    # Serving a preview refreshes its modification time at most this often (seconds)
+    TOUCH_INTERVAL = 60 * 60
+
+    def __init__(self, folder, workers=1, hash_cache_size=1024):
+        """
+        Args:
+            folder (str): Directory the previews are written to.
+            workers (int, optional): Rendering threads. Default is 1.
+            hash_cache_size (int, optional): Source files whose content hash is remembered.
+        """
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='preview')
+        self._pending = {}
+        self._hashes = OrderedDict()
+        self._hash_cache_size = hash_cache_size
+        self._lock = threading.Lock()
+
+    def path(self, digest, size, fmt):
+        return os.path.join(self.folder, f"{digest}-{size}.{fmt}")
+
+    def _source_path(self, digest):
+        return os.path.join(self.folder, f"{digest}.src")
+
+    def _exists(self, digest):
+        return all(os.path.exists(self.path(digest, size, fmt))
+                   for size in PREVIEW_SIZES for fmt in PREVIEW_FORMATS)
+
+    @staticmethod
+    def render(image, max_side):
+        """
+        Downscale an image so its longest side is at most `max_side`.
+        Args:
+            image (PIL.Image or array-like): Source image.
+            max_side (int): Longest side of the result.
+        Returns:
+            PIL.Image: RGB or L preview.
+        """
+        if isinstance(image, Image.Image) and image.mode.startswith('I;16'):
+            image = np.asarray(image)
+        if not isinstance(image, Image.Image):
+            image = np.asarray(image)
+            if image.dtype == np.uint16:
+                # 16-bit images preview from their high byte
+                image = (image >> 8).astype(np.uint8)
+            image = Image.fromarray(image)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        preview = image.copy() if max(image.size) <= max_side else image.resize(
+            _fit(image.size, max_side), Image.LANCZOS, reducing_gap=3.0)
+        return preview
+
+    def _write(self, digest, image):
+        # Each size is rendered from the previous one, largest first
+        for size, max_side in sorted(PREVIEW_SIZES.items(), key=lambda item: -item[1]):
+            image = self.render(image, max_side)
+            for fmt, (pil_format, _, options) in PREVIEW_FORMATS.items():
+                path = self.path(digest, size, fmt)
+                tmp_path = f"{path}.part"
+                image.save(tmp_path, pil_format, **options)
+                os.replace(tmp_path, path)
+
+    def _generate(self, digest, image):
+        try:
+            if callable(image):
+                with image() as f:
+                    data = f if f.seekable() else io.BytesIO(f.read())
+                    with Image.open(data) as source:
+                        # JPEG sources decode straight at a reduced scale
+                        source.draft('RGB', (PREVIEW_SIZES['view'], PREVIEW_SIZES['view']))
+                        self._write(digest, source)
+            else:
+                self._write(digest, image)
+        except Exception as e:
+            print(f"Error rendering preview {digest}: {e}")
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(digest, None)
+
+    def submit(self, data, image, name=None, digest=None):
+        """
+        Schedule previews for an image.
+        Args:
+            data (bytes-like): The encoded file; its hash names the previews.
+            image (PIL.Image or array-like): The decoded image to downscale.
+            name (str, optional): Where the file is (or will be) stored, so later lookups skip hashing it.
+            digest (str, optional): The content hash of `data`, if the caller already has it.
+        Returns:
+            str: The content hash.
+        """
+        digest = digest or content_hash(data)
+        if name:
+            self._remember(name, digest)
+        self._schedule(digest, image)
+        return digest
+
+    def _schedule(self, digest, image):
+        with self._lock:
+            if digest not in self._pending and not self._exists(digest):
+                self._pending[digest] = self._pool.submit(self._generate, digest, image)
+
+    def _remember(self, name, digest):
+        with self._lock:
+            self._hashes[name] = digest
+            self._hashes.move_to_end(name)
+            while len(self._hashes) > self._hash_cache_size:
+                self._hashes.popitem(last=False)
+        path = self._source_path(digest)
+        try:
+            if self.source(digest) == name:
+                os.utime(path)
+                return
+            tmp_path = f"{path}.{threading.get_ident()}.part"
+            with open(tmp_path, 'w') as f:
+                f.write(name)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not record the source of preview {digest}: {e}")
+
+    def source(self, digest):
+        """Where the image previewed as `digest` is stored, or None if unknown."""
+        try:
+            with open(self._source_path(digest)) as f:
+                return f.read() or None
+        except OSError:
+            return None
+
+    def touch(self, path):
+        """Mark a preview file as used, so prune keeps it."""
+        try:
+            if os.path.getmtime(path) < time.time() - self.TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            pass
+
+    def ensure(self, name, open_source):
+        """
+        Content hash of a stored image, rendering its previews now if they are missing.
+        Args:
+            name (str): Where the image is stored, e.g. its blob key.
+            open_source (callable): Returns a binary file object over the image.
+        Returns:
+            str: The content hash.
+        """
+        with self._lock:
+            digest = self._hashes.get(name)
+        if digest is None:
+            with open_source() as f:
+                digest = stream_hash(f)
+            self._remember(name, digest)
+        self._schedule(digest, open_source)
+        self.wait(digest)
+        return digest
+
+    def wait(self, digest, timeout=30):
+        """Block until a pending preview of `digest` has been written."""
+        with self._lock:
+            future = self._pending.get(digest)
+        if future is not None:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+
+    def prune(self, max_age, sources=None):
+        """
+        Remove previews neither written nor served for `max_age` seconds; they are rendered again
+        the next time they are requested.
+        Args:
+            max_age (int): Seconds.
+            sources (container, optional): Names of the stored images that still exist. Source
+                records of anything else are removed once as old as the previews. Default keeps them all.
+        Returns:
+            tuple: (files removed, bytes reclaimed)
+        """
+        cutoff = time.time() - max_age
+        files = reclaimed = 0
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.name[:64] in self._pending:
+                    continue
+                try:
+                    stat = entry.stat()
+                    if stat.st_mtime >= cutoff:
+                        continue
+                    if entry.name.endswith('.src'):
+                        if sources is None or self.source(entry.name[:64]) in sources:
+                            continue
+                    os.remove(entry.path)
+                except OSError:
+                    continue
+                files += 1
+                reclaimed += stat.st_size
+        return files, reclaimed
+
+
+def _fit(size, max_side):
+    width, height = size
+    scale = max_side / max(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
@@ -0,0 +1,218 @@
+import functools
+import json
+import re
+import threading
+import time
+from collections import deque
+
+from flask import g, request
+
+# Client-chosen operation ids, e.g. crypto.randomUUID()
+OPERATION_ID = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+
+class Operation:
+    """
+    Progress of one request, kept as a bounded log of numbered events.
+
+    Engine progress callbacks are throttled to one event per `min_interval`
+    seconds, except the first and last of each stage, so a fast embed logs a
+    handful of events and a slow one a steady trickle.
+    """
+
+    def __init__(self, broker, operation_id, owner):
+        self.broker = broker
+        self.id = operation_id
+        self.owner = owner
+        self.events = deque(maxlen=broker.max_events)
+        self.next_id = 1
+        self.started = False
+        self.finished_at = None
+        self.created_at = time.monotonic()
+        self._stage = None
+        self._last_publish = 0.0
+
+    def publish(self, event, data):
+        with self.broker._condition:
+            self.events.append((self.next_id, event, data))
+            self.next_id += 1
+            self.broker._condition.notify_all()
+
+    def stage(self, name):
+        """Record the start of a stage that doesn't report finer progress, e.g. 'metrics'."""
+        self.report(name, 0, 0)
+
+    def report(self, stage, done, total, plane=None):
+        """progress(stage, done, total, plane) callback for MultiLayerLSB."""
+        now = time.monotonic()
+        if stage == self._stage and done < total and now - self._last_publish < self.broker.min_interval:
+            return
+        self._stage = stage
+        self._last_publish = now
+        self.publish('progress', {'stage': stage, 'done': done, 'total': total, 'plane': plane})
+
+    def finish(self, status, error=None):
+        """Publish the final event: 'done' with the response status, or 'failed' with its error message."""
+        if error is None:
+            self.publish('done', {'status': status})
+        else:
+            self.publish('failed', {'status': status, 'error': error})
+        with self.broker._condition:
+            self.finished_at = time.monotonic()
+
+
+class _NoOperation:
+    """Stands in for an Operation when the client isn't listening; the engine then gets no callback."""
+    report = None
+
+    def stage(self, name):
+        pass
+
+
+class ProgressBroker:
+    """
+    Progress events of long-running requests, served as Server-Sent Events.
+
+    A client that wants progress picks an operation id, opens
+    GET /api/operations/<id>/events and sends the id in the X-Operation-Id
+    header of the request it describes, in either order. The header is read
+    before the request body, so it costs nothing to requests without it, and
+    views pass the engine no callback at all then.
+
+    Events are numbered; a client that reconnects with Last-Event-ID (which
+    EventSource sends by itself) is sent only the events after it. An
+    operation is kept for `retention` seconds after it finishes so late or
+    reconnecting clients still see the outcome.
+
+    Operations live in the worker process that handled the request, like
+    LRUBackend; with several workers the stream must reach the same one.
+    """
+
+    def __init__(self, client_key, retention=300, max_events=256, min_interval=0.25, keepalive=15):
+        """
+        Args:
+            client_key (callable): Returns the identity of the current client; only it may read its operations.
+            retention (int, optional): Seconds finished (or never started) operations are kept.
+            max_events (int, optional): Events kept per operation; older ones are dropped.
+            min_interval (float, optional): Minimum seconds between progress events within a stage.
+            keepalive (int, optional): Seconds between comment lines on an idle stream.
+        """
+        self.client_key = client_key
+        self.retention = retention
+        self.max_events = max_events
+        self.min_interval = min_interval
+        self.keepalive = keepalive
+        self._operations = {}
+        self._condition = threading.Condition()
+
+    def _expire(self, now):
+        # Called with the condition held
+        for operation_id, operation in list(self._operations.items()):
+            since = operation.finished_at if operation.finished_at is not None else (
+                None if operation.started else operation.created_at)
+            if since is not None and now - since > self.retention:
+                del self._operations[operation_id]
+
+    def _get(self, operation_id, owner):
+        # Called with the condition held; None if the id belongs to another client
+        operation = self._operations.get(operation_id)
+        if operation is None:
+            operation = self._operations[operation_id] = Operation(self, operation_id, owner)
+        return operation if operation.owner == owner else None
+
+    def start(self, operation_id, owner):
+        """
+        The Operation for a request, or None if the id is invalid, taken by another client or already used.
+        """
+        if not OPERATION_ID.match(operation_id):
+            return None
+        with self._condition:
+            self._expire(time.monotonic())
+            operation = self._get(operation_id, owner)
+            if operation is None or operation.started:
+                return None
+            operation.started = True
+            return operation
+
+    def current(self):
+        """The current request's Operation, or a no-op stand-in."""
+        return g.get('operation') or _NoOperation()
+
+    def track(self, view):
+        """Decorator: report the view's outcome to the operation named by X-Operation-Id, if any."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            operation_id = request.headers.get('X-Operation-Id')
+            operation = self.start(operation_id, self.client_key()) if operation_id else None
+            if operation is None:
+                return view(*args, **kwargs)
+            g.operation = operation
+            try:
+                response = view(*args, **kwargs)
+            except Exception as e:
+                operation.finish(500, str(e))
+                raise
+            status, error = _outcome(response)
+            operation.finish(status, error)
+            return response
+        return wrapper
+
+    def stream(self, operation_id, last_event_id=None):
+        """
+        Server-Sent Events for an operation, starting after `last_event_id`.
+        Returns:
+            generator: SSE text, ending after the operation's final event; None if the id can't be read.
+        """
+        if not OPERATION_ID.match(operation_id):
+            return None
+        with self._condition:
+            self._expire(time.monotonic())
+            operation = self._get(operation_id, self.client_key())
+        if operation is None:
+            return None
+        try:
+            last_seen = int(last_event_id or 0)
+        except ValueError:
+            last_seen = 0
+        return self._events(operation, last_seen)
+
+    def _events(self, operation, last_seen):
+        yield 'retry: 2000\n\n'
+        while True:
+            with self._condition:
+                pending = [event for event in operation.events if event[0] > last_seen]
+                if not pending:
+                    # A finished operation has no more events; a dropped one is a stream for a request that never came
+                    self._expire(time.monotonic())
+                    if operation.finished_at is not None or self._operations.get(operation.id) is not operation:
+                        return
+                    self._condition.wait(self.keepalive)
+                    pending = [event for event in operation.events if event[0] > last_seen]
+            if not pending:
+                yield ': keepalive\n\n'
+                continue
+            for event_id, event, data in pending:
+                yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+                last_seen = event_id
+                if event in ('done', 'failed'):
+                    return
+
+
+def _outcome(response):
+    """(status, error message or None) of a view's return value."""
+    body = response
+    status = 200
+    if isinstance(response, tuple):
+        body = response[0]
+        if len(response) > 1 and isinstance(response[1], int):
+            status = response[1]
+    else:
+        status = getattr(response, 'status_code', 200)
+    if status < 400:
+        return status, None
+    error = None
+    if hasattr(body, 'get_json'):
+        payload = body.get_json(silent=True)
+        if isinstance(payload, dict):
+            error = payload.get('error')
+    return status, error or f"Request failed with status {status}"
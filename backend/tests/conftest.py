@@ -0,0 +1,83 @@
+import io
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+sys.path.insert(0, os.path.dirname(BACKEND))
+
+# app.py reads its configuration on import: an in-memory database, a scratch upload folder and no sweeper
+# thread, whatever the environment points at
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['UPLOAD_FOLDER'] = tempfile.mkdtemp(prefix='stegwebsite-uploads-')
+os.environ['LIFECYCLE_SWEEP_INTERVAL'] = '0'
+os.environ['BLOB_STORAGE'] = 'local'
+os.environ['STEGO_STORAGE'] = 'full'
+os.environ['RESPONSE_CACHE_URL'] = ''
+
+_emails = itertools.count()
+
+
+@pytest.fixture(scope='session')
+def backend():
+    """The app module, with its tables created."""
+    import app
+    with app.app.app_context():
+        app.db.create_all()
+    return app
+
+
+@pytest.fixture
+def client(backend):
+    return backend.app.test_client()
+
+
+@pytest.fixture
+def user(client):
+    """A client signed in as a fresh user."""
+    client.post('/api/signup', json={'email': f'user{next(_emails)}@example.com', 'password': 'secret'})
+    return client
+
+
+@pytest.fixture
+def png():
+    """png(seed, size) -> a random RGB cover encoded as PNG; random pixels keep every LSB in play."""
+    def encode(seed=0, size=(64, 64)):
+        buffer = io.BytesIO()
+        pixels = np.random.default_rng(seed).integers(0, 256, (*size, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(buffer, 'PNG')
+        return buffer.getvalue()
+    return encode
+
+
+@pytest.fixture
+def create_room(user, png):
+    """create_room(seed, name) -> the JSON room of a new stego room owned by `user`."""
+    def create(seed=0, name='room'):
+        response = user.post('/api/create_stego_room', content_type='multipart/form-data', data={
+            'name': name,
+            'image': (io.BytesIO(png(seed)), 'cover.png'),
+            'message': (io.BytesIO(b'room message ' * 10), 'message.txt'),
+        })
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()['room']
+    return create
+
+
+@pytest.fixture
+def wait_for_blob(backend):
+    """wait_for_blob(key) -> the BlobInfo of a blob once it lands; stegos are written after the response."""
+    def wait(key, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not backend.blob_store.exists(key):
+            assert time.monotonic() < deadline, f'{key} was never stored'
+            time.sleep(0.01)
+        return backend.blob_store.stat(key)
+    return wait
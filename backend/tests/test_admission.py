@@ -0,0 +1,79 @@
+import io
+
+import pytest
+from flask import Flask, g
+
+from admission import AdmissionControl, estimate_cost
+
+MB = 2**20
+
+
+@pytest.fixture
+def control():
+    app = Flask(__name__)
+    app.config.update(ADMISSION_BUDGET=10 * MB, ADMISSION_MAX_REQUEST_COST=0, ADMISSION_CLIENT_CONCURRENCY=2,
+                      ADMISSION_QUEUE_SIZE=1, ADMISSION_QUEUE_TIMEOUT=0, ADMISSION_RETRY_AFTER=5)
+    with app.test_request_context():
+        yield AdmissionControl(app, client_key=lambda: 'client')
+
+
+def test_estimate_cost_adds_payload_metrics_and_decompression():
+    base = estimate_cost('embed', 1000)
+    assert base == 4000
+    assert estimate_cost('embed', 1000, payload_bytes=10) == base + 280
+    assert estimate_cost('embed', 1000, metrics=True) == base + 60000
+    assert estimate_cost('extract', 1000, decompressed_bytes=100) == 4000 + 200
+
+
+def test_admit_is_cumulative_and_released_once(control):
+    ticket, error = control.enter('client')
+    assert error is None
+    g.admission_ticket = ticket
+    assert control.admit(4 * MB) is None
+    assert control.admit(4 * MB) is None
+    assert control.in_use == 8 * MB
+    response, status = control.admit(3 * MB)
+    assert status == 413
+    assert '11.0 MB' in response.get_json()['error']
+    ticket.release()
+    ticket.release()
+    assert control.in_use == 0
+
+
+def test_busy_budget_answers_503(control):
+    first, _ = control.enter('a')
+    assert first.acquire(8 * MB) is None
+    second, _ = control.enter('b')
+    response, status = second.acquire(4 * MB)
+    assert status == 503
+    assert response.headers['Retry-After'] == '5'
+    first.release()
+    assert second.acquire(4 * MB) is None
+
+
+def test_client_concurrency_answers_429(control):
+    tickets = [control.enter('client')[0] for _ in range(2)]
+    ticket, (response, status) = control.enter('client')
+    assert ticket is None and status == 429
+    assert control.enter('other')[1] is None
+    tickets[0].release()
+    assert control.enter('client')[1] is None
+    assert control.stats()['rejected'] == 1
+
+
+def test_disabled_admission_admits_everything(control):
+    control.app.config['ADMISSION_BUDGET'] = 0
+    ticket, _ = control.enter('client')
+    assert ticket.acquire(100 * 2**30) is None
+    assert control.enter('client')[1] is None and control.enter('client')[1] is None
+
+
+def test_oversized_embed_is_refused_before_decoding(backend, client, png, monkeypatch):
+    monkeypatch.setitem(backend.app.config, 'ADMISSION_BUDGET', 64 * MB)
+    monkeypatch.setitem(backend.app.config, 'ADMISSION_MAX_REQUEST_COST', 1000)
+    response = client.post('/api/mlsb/embed', content_type='multipart/form-data', data={
+        'cover_image': (io.BytesIO(png()), 'cover.png'),
+        'message_file': (io.BytesIO(b'message'), 'message.txt'),
+    })
+    assert response.status_code == 413
+    assert client.get('/api/admission').get_json()['in_use'] == 0
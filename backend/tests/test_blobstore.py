@@ -0,0 +1,86 @@
+import io
+import os
+
+import pytest
+
+from blobstore import LocalBlobStore, S3BlobStore, blob_key, create_store, upload_key, upload_name
+
+
+@pytest.fixture(params=['local', 's3'])
+def store(request, tmp_path):
+    if request.param == 'local':
+        yield LocalBlobStore(str(tmp_path))
+        return
+    moto = pytest.importorskip('moto')
+    boto3 = pytest.importorskip('boto3')
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1', aws_access_key_id='test', aws_secret_access_key='test')
+        client.create_bucket(Bucket='blobs')
+        yield S3BlobStore('blobs', prefix='uploads/', client=client,
+                          multipart_threshold=6 * 1024 * 1024, part_size=5 * 1024 * 1024)
+
+
+def test_put_read_and_ranges(store):
+    data = bytes(range(256)) * 100
+    store.put('cover.png', data)
+    assert store.read('cover.png') == data
+    assert store.read_range('cover.png', 10, 20) == data[10:20]
+    assert b''.join(store.iter_range('cover.png', 5, 25000, chunk_size=4096)) == data[5:25000]
+    info = store.stat('cover.png')
+    assert (info.key, info.size) == ('cover.png', len(data))
+    assert info.etag
+
+
+def test_put_from_file_objects(store):
+    store.put('message.txt', io.BytesIO(b'streamed'))
+    with store.open('message.txt') as f:
+        assert f.read() == b'streamed'
+
+
+def test_multipart_upload(store):
+    data = os.urandom(11 * 1024 * 1024)
+    store.put('large.bin', io.BytesIO(data))
+    assert store.stat('large.bin').size == len(data)
+    assert store.read_range('large.bin', len(data) - 10, len(data)) == data[-10:]
+
+
+def test_overwrite_list_and_delete(store):
+    store.put('a.png', b'one')
+    store.put('a.png', b'three')
+    store.put('b.png', b'two')
+    assert store.read('a.png') == b'three'
+    assert sorted(blob.key for blob in store.list()) == ['a.png', 'b.png']
+    assert store.delete('a.png') == 5
+    assert store.delete('a.png') == 0
+    assert store.stat('a.png') is None and not store.exists('a.png')
+    assert [blob.key for blob in store.list()] == ['b.png']
+
+
+def test_local_store_rejects_nested_keys(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    assert store.stat('nested/a.png') is None
+    with pytest.raises(ValueError):
+        store.put('../a.png', b'outside')
+
+
+def test_blob_key_maps_legacy_paths(tmp_path):
+    folder = str(tmp_path)
+    assert blob_key('cover.png', folder) == 'cover.png'
+    assert blob_key(os.path.join(folder, 'cover.png'), folder) == 'cover.png'
+    assert blob_key('/elsewhere/cover.png', folder) is None
+    assert blob_key('..', folder) is None
+    assert blob_key(None, folder) is None
+
+
+def test_upload_keys_are_unique_and_keep_the_name():
+    keys = {upload_key('cover.png') for _ in range(100)}
+    assert len(keys) == 100
+    assert {upload_name(key) for key in keys} == {'cover.png'}
+    assert upload_name('cover.png') == 'cover.png'
+    assert upload_name(upload_key('stego_cover.png')) == 'stego_cover.png'
+
+
+def test_create_store(tmp_path):
+    assert isinstance(create_store({'BLOB_STORAGE': 'local', 'UPLOAD_FOLDER': str(tmp_path)}), LocalBlobStore)
+    with pytest.raises(ValueError):
+        create_store({'BLOB_STORAGE': 'ftp'})
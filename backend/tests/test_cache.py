@@ -0,0 +1,43 @@
+from cache import LRUBackend
+
+
+def test_lru_backend_evicts_least_recently_used():
+    backend = LRUBackend(max_entries=2)
+    backend.set('a', b'1')
+    backend.set('b', b'2')
+    assert backend.get('a') == b'1'
+    backend.set('c', b'3')
+    assert backend.get('b') is None
+    assert (backend.get('a'), backend.get('c')) == (b'1', b'3')
+    backend.delete('a', 'missing')
+    assert backend.get('a') is None
+
+
+def test_room_list_revalidates_with_304(user, create_room):
+    create_room(1)
+    first = user.get('/api/steg_rooms')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert 'private' in first.headers['Cache-Control'] and 'no-cache' in first.headers['Cache-Control']
+
+    unchanged = user.get('/api/steg_rooms', headers={'If-None-Match': etag})
+    assert unchanged.status_code == 304
+    assert unchanged.get_data() == b''
+    since = user.get('/api/steg_rooms', headers={'If-Modified-Since': first.headers['Last-Modified']})
+    assert since.status_code == 304
+
+    # A new room invalidates the cached list
+    create_room(2)
+    changed = user.get('/api/steg_rooms', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert len(changed.get_json()) == 2
+
+
+def test_room_list_is_per_user(backend, user, create_room):
+    create_room(3)
+    other = backend.app.test_client()
+    assert other.get('/api/steg_rooms').status_code == 401
+    other.post('/api/signup', json={'email': 'other-cache-user@example.com', 'password': 'secret'})
+    assert other.get('/api/steg_rooms').get_json() == []
+    assert len(user.get('/api/steg_rooms').get_json()) == 1
@@ -0,0 +1,72 @@
+import base64
+import io
+
+import numpy as np
+import pytest
+
+from blobstore import LocalBlobStore
+from deltas import DELTA_SUFFIX, StegoDeltas, is_delta
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB
+
+
+def encode(image):
+    buffer = io.BytesIO()
+    MultiLayerLSB.save_image(image, buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def deltas(tmp_path):
+    def rebuild(cover, delta):
+        return encode(MultiLayerLSB.apply_delta(MultiLayerLSB.load_image(cover), delta))
+    return StegoDeltas(LocalBlobStore(str(tmp_path)), rebuild)
+
+
+@pytest.fixture
+def stored(deltas):
+    """Key of a delta-stored stego, with the PNG it stands for."""
+    cover = np.random.default_rng(0).integers(0, 256, (48, 64, 3), dtype=np.uint8)
+    stego, _, _ = MultiLayerLSB.embed_data(cover, b'delta ' * 50, rounds=1, is_encrypted=False)
+    deltas.store.put('cover.png', encode(cover))
+    key = StegoDeltas.key('stego_cover.png')
+    deltas.store.put(key, StegoDeltas.pack('cover.png', MultiLayerLSB.stego_delta(cover, stego)))
+    return key, encode(stego)
+
+
+def test_delta_round_trip(deltas, stored):
+    key, stego = stored
+    assert key == 'stego_cover.png' + DELTA_SUFFIX and is_delta(key) and not is_delta('cover.png')
+    assert deltas.read(key) == stego
+    assert deltas.read(key) == stego
+    assert deltas.stats()['hits'] == 1
+
+
+def test_changed_cover_fails_the_rebuild(deltas, stored):
+    key, _ = stored
+    deltas.store.put('cover.png', encode(np.zeros((48, 64, 3), dtype=np.uint8)))
+    with pytest.raises(ValueError):
+        deltas.read(key)
+    deltas.store.delete('cover.png')
+    with pytest.raises(FileNotFoundError):
+        deltas.read(key)
+
+
+def test_remembered_stego_is_served_without_a_rebuild(deltas):
+    deltas.remember('missing.png.delta', b'encoded')
+    assert deltas.read('missing.png.delta') == b'encoded'
+
+
+def test_delta_storage_serves_the_same_stego(backend, user, create_room, wait_for_blob, monkeypatch):
+    monkeypatch.setitem(backend.app.config, 'STEGO_STORAGE', 'delta')
+    room = create_room(5)
+    with backend.app.app_context():
+        key = backend.db.session.get(backend.StegoRoom, room['id']).stego_image
+    assert is_delta(key)
+    response = user.get(f"/api/steg_rooms/{room['id']}/files/stego")
+    assert response.status_code == 200
+    assert response.get_data() == base64.b64decode(room['stego_image'])
+
+    # The response above came from the PNG cached at embed time; rebuild it from the stored cover
+    wait_for_blob(key)
+    rebuilt = StegoDeltas(backend.blob_store, backend.rebuild_stego).read(key)
+    assert bytes(rebuilt) == base64.b64decode(room['stego_image'])
@@ -0,0 +1,46 @@
+import io
+import json
+import os
+import time
+import zipfile
+
+from export import stream_zip
+
+
+def test_stream_zip_members(tmp_path):
+    path = os.path.join(tmp_path, 'cover.png')
+    with open(path, 'wb') as f:
+        f.write(b'png bytes' * 1000)
+    entries = [
+        ('cover.png', path),
+        ('missing.png', os.path.join(tmp_path, 'missing.png')),
+        ('message.txt', b'message'),
+        ('lazy.bin', lambda: (io.BytesIO(b'lazy'), 4, time.time())),
+        ('gone.bin', lambda: (_ for _ in ()).throw(FileNotFoundError('gone'))),
+    ]
+    chunks = list(stream_zip(entries, stored_extensions={'.png'}, chunk_size=1000))
+    assert len(chunks) > 2
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+        assert archive.namelist() == ['cover.png', 'message.txt', 'lazy.bin']
+        assert archive.read('cover.png') == b'png bytes' * 1000
+        assert archive.getinfo('cover.png').compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo('message.txt').compress_type == zipfile.ZIP_DEFLATED
+        assert archive.read('lazy.bin') == b'lazy'
+
+
+def test_room_export(backend, user, create_room, wait_for_blob):
+    room = create_room(6, name='Holiday photos')
+    with backend.app.app_context():
+        wait_for_blob(backend.db.session.get(backend.StegoRoom, room['id']).stego_image)
+    response = user.get(f"/api/steg_rooms/{room['id']}/export")
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.get_data())) as archive:
+        assert sorted(archive.namelist()) == ['cover_cover.png', 'message_message.txt', 'metrics.json', 'stego.png']
+        assert archive.read('message_message.txt') == b'room message ' * 10
+        info = json.loads(archive.read('metrics.json'))
+        assert info['name'] == 'Holiday photos' and 'key' not in info
+
+    everything = user.get('/api/steg_rooms/export')
+    with zipfile.ZipFile(io.BytesIO(everything.get_data())) as archive:
+        assert f"{room['id']}_Holiday_photos/stego.png" in archive.namelist()
+    assert user.get('/api/steg_rooms/export?ids=x').status_code == 400
@@ -0,0 +1,61 @@
+import io
+import tempfile
+
+import pytest
+from flask import Flask, request
+from werkzeug.datastructures import FileStorage
+
+from blobstore import LocalBlobStore
+from ingest import SpooledRequest, Upload, persist_async
+
+
+@pytest.mark.parametrize('spooled', [False, True])
+def test_upload_exposes_and_persists_its_bytes(tmp_path, spooled):
+    data = b'upload bytes ' * 1000
+    stream = tempfile.TemporaryFile() if spooled else io.BytesIO()
+    stream.write(data)
+    stream.seek(0)
+    storage = FileStorage(stream, filename='../My Cover.PNG')
+    upload = Upload(storage)
+    assert (upload.filename, upload.extension) == ('My_Cover.PNG', '.png')
+    assert storage.stream is not stream
+    assert bytes(upload.buffer) == data and upload.size == len(data)
+    assert upload.file().read(6) == b'upload'
+    assert upload.file().read(6) == b'upload'
+
+    store = LocalBlobStore(str(tmp_path))
+    upload.persist(store, 'cover.png').result()
+    upload.close()
+    assert store.read('cover.png') == data
+    assert stream.closed
+
+
+def test_empty_spooled_upload(tmp_path):
+    upload = Upload(FileStorage(tempfile.TemporaryFile(), filename='empty.txt'))
+    assert upload.size == 0
+    upload.close()
+
+
+def test_persist_async_reports_failures(tmp_path):
+    done = []
+    future = persist_async(LocalBlobStore(str(tmp_path)), '../outside', b'x', on_done=lambda: done.append(True))
+    with pytest.raises(ValueError):
+        future.result()
+    assert done == [True]
+
+
+def test_small_uploads_stay_in_memory():
+    app = Flask(__name__)
+    app.request_class = SpooledRequest
+    app.config['UPLOAD_SPOOL_THRESHOLD'] = 1024
+    seen = {}
+
+    @app.route('/', methods=['POST'])
+    def upload():
+        seen.update({name: isinstance(storage.stream, io.BytesIO) for name, storage in request.files.items()})
+        return ''
+
+    client = app.test_client()
+    client.post('/', data={'small': (io.BytesIO(b's' * 100), 'small.bin')}, content_type='multipart/form-data')
+    client.post('/', data={'large': (io.BytesIO(b'l' * 2000000), 'large.bin')}, content_type='multipart/form-data')
+    assert seen == {'small': True, 'large': False}
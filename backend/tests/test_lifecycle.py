@@ -0,0 +1,94 @@
+import io
+import os
+import time
+from datetime import datetime
+
+import pytest
+
+from blobstore import LocalBlobStore, upload_key
+from lifecycle import StorageLifecycle
+
+
+def test_deleting_a_room_reclaims_its_own_files(backend, user, png, create_room, wait_for_blob):
+    # A demo run with the same file names must neither share nor keep the room's blobs
+    demo = user.post('/api/mlsb/embed', content_type='multipart/form-data', data={
+        'cover_image': (io.BytesIO(png(1)), 'cover.png'),
+        'message_file': (io.BytesIO(b'demo message ' * 10), 'message.txt'),
+        'is_encrypted': 'false',
+    })
+    assert demo.status_code == 200
+    room_id = create_room(2)['id']
+
+    with backend.app.app_context():
+        room = backend.db.session.get(backend.StegoRoom, room_id)
+        room_keys = backend.storage.files_of(room)
+        demo_row = backend.MLSBDemo.query.order_by(backend.MLSBDemo.id.desc()).first()
+        demo_keys = backend.storage.files_of(demo_row)
+    assert len(room_keys) == 3 and not room_keys & demo_keys
+    room_bytes = sum(wait_for_blob(key).size for key in room_keys)
+    for key in demo_keys:
+        wait_for_blob(key)
+
+    response = user.delete(f'/api/steg_rooms/{room_id}')
+    assert response.status_code == 200
+    assert response.get_json()['reclaimed_bytes'] == room_bytes
+    assert all(backend.blob_store.stat(key) is None for key in room_keys)
+    assert all(backend.blob_store.stat(key) is not None for key in demo_keys)
+
+
+@pytest.fixture
+def lifecycle(backend, tmp_path, monkeypatch):
+    """A lifecycle over its own blob store, with demo runs expiring after a year."""
+    monkeypatch.setitem(backend.app.config, 'TEST_DEMO_RETENTION', 365 * 24 * 60 * 60)
+    store = LocalBlobStore(str(tmp_path))
+    return StorageLifecycle(
+        backend.app, backend.db, store,
+        file_columns=[backend.StegoRoom.cover_image, backend.MLSBDemo.cover_image, backend.MLSBDemo.stego_image],
+        expiring=[(backend.MLSBDemo, backend.MLSBDemo.created_at, 'TEST_DEMO_RETENTION')],
+        transient_prefixes=['extracted_message'])
+
+
+def put(store, key, data=b'blob', age=0):
+    store.put(key, data)
+    if age:
+        mtime = time.time() - age
+        os.utime(store.local_path(key), (mtime, mtime))
+
+
+def test_sweep_removes_orphans_transients_and_expired_rows(backend, user, lifecycle):
+    store = lifecycle.store
+    hour = 60 * 60
+    kept, orphan, fresh = upload_key('kept.png'), upload_key('orphan.png'), upload_key('fresh.png')
+    demo_cover, demo_stego = upload_key('old.png'), upload_key('stego_old.png')
+    put(store, kept, age=2 * hour)
+    put(store, orphan, b'orphan', age=2 * hour)
+    put(store, fresh)
+    put(store, 'extracted_message_1.txt', b'output', age=2 * hour)
+    put(store, demo_cover, b'cover')
+    put(store, demo_stego, b'stego')
+    with backend.app.app_context():
+        user_id = backend.User.query.order_by(backend.User.id.desc()).first().id
+        backend.db.session.add(backend.StegoRoom(name='kept', cover_image=kept, user_id=user_id))
+        backend.db.session.add(backend.MLSBDemo(cover_image=demo_cover, stego_image=demo_stego,
+                                                created_at=datetime(2000, 1, 1)))
+        backend.db.session.commit()
+        report = lifecycle.sweep()
+        assert backend.MLSBDemo.query.filter_by(cover_image=demo_cover).first() is None
+
+    assert report['expired_rows'] == 1
+    assert report['files'] == 4
+    assert report['bytes'] == len(b'orphan') + len(b'output') + len(b'cover') + len(b'stego')
+    assert sorted(blob.key for blob in store.list()) == sorted([kept, fresh])
+    assert (lifecycle.reclaimed_files, lifecycle.reclaimed_bytes) == (4, report['bytes'])
+
+
+def test_release_keeps_referenced_blobs(backend, lifecycle):
+    store = lifecycle.store
+    shared, alone = upload_key('shared.png'), upload_key('alone.png')
+    put(store, shared, b'shared')
+    put(store, alone, b'alone')
+    with backend.app.app_context():
+        backend.db.session.add(backend.MLSBDemo(cover_image=shared))
+        backend.db.session.commit()
+        assert lifecycle.release([shared, alone]) == len(b'alone')
+    assert store.exists(shared) and not store.exists(alone)
@@ -0,0 +1,64 @@
+import io
+import threading
+import time
+
+from memo import Memo, request_key
+
+
+def embed(client, png, message=b'memo message ' * 20, headers=None, **form):
+    data = {'cover_image': (io.BytesIO(png()), 'cover.png'), 'message_file': (io.BytesIO(message), 'message.txt')}
+    data.update(form)
+    return client.post('/api/mlsb/embed', content_type='multipart/form-data', headers=headers or {}, data=data)
+
+
+def test_memo_evicts_least_recently_used():
+    memo = Memo(max_bytes=10, max_entries=2)
+    for key in 'abc':
+        assert memo.claim(key) is None
+        memo.store(key, key.upper(), 4)
+    assert memo.claim('a') is None
+    memo.release('a')
+    assert memo.claim('c') == 'C'
+    stats = memo.stats()
+    assert (stats['entries'], stats['bytes'], stats['evictions'], stats['hits']) == (2, 8, 1, 1)
+    assert request_key('a', 1) == request_key('a', '1') != request_key('a1')
+
+
+def test_claims_of_a_pending_key_wait_for_it():
+    memo = Memo()
+    assert memo.claim('key') is None
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(memo.claim('key')))
+    waiter.start()
+    time.sleep(0.05)
+    memo.store('key', 'value', 5)
+    waiter.join(5)
+    assert results == ['value']
+
+
+def test_unencrypted_embed_is_replayed_from_the_memo(client, png):
+    before = client.get('/api/memo').get_json()['hits']
+    first = embed(client, png, message=b'replay me ' * 30, is_encrypted='false')
+    second = embed(client, png, message=b'replay me ' * 30, is_encrypted='false')
+    assert first.status_code == second.status_code == 200
+    assert first.get_json()['stego_image'] == second.get_json()['stego_image']
+    assert first.get_json()['metrics'] == second.get_json()['metrics']
+    assert client.get('/api/memo').get_json()['hits'] == before + 1
+
+
+def test_encrypted_embeds_are_not_shared(client, png):
+    first = embed(client, png, is_encrypted='true').get_json()
+    second = embed(client, png, is_encrypted='true').get_json()
+    assert first['key'] != second['key']
+
+
+def test_idempotency_key_replays_the_first_response(client, png):
+    headers = {'Idempotency-Key': 'embed-retry-1'}
+    first = embed(client, png, headers=headers, is_encrypted='true')
+    retry = embed(client, png, headers=headers, is_encrypted='true')
+    assert retry.headers.get('Idempotent-Replayed') == 'true'
+    assert retry.get_data() == first.get_data()
+
+    reused = embed(client, png, message=b'something else', headers=headers, is_encrypted='true')
+    assert reused.status_code == 422
+    assert embed(client, png, headers={'Idempotency-Key': 'bad key'}).status_code == 400
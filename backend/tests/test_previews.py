@@ -0,0 +1,65 @@
+import io
+import os
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from previews import PREVIEW_FORMATS, PREVIEW_SIZES, PreviewStore, content_hash
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PreviewStore(str(tmp_path))
+
+
+def test_previews_are_named_by_content_and_downscaled(store, png):
+    data = png(size=(900, 1600))
+    digest = store.submit(data, Image.open(io.BytesIO(data)), name='cover.png')
+    assert digest == content_hash(data)
+    store.wait(digest)
+    for size, max_side in PREVIEW_SIZES.items():
+        for fmt in PREVIEW_FORMATS:
+            with Image.open(store.path(digest, size, fmt)) as preview:
+                assert max(preview.size) == min(max_side, 1600)
+    assert store.source(digest) == 'cover.png'
+
+
+def test_16_bit_images_preview_from_their_high_byte():
+    image = np.full((4, 4), 0x1234, dtype=np.uint16)
+    assert np.all(np.asarray(PreviewStore.render(image, 320)) == 0x12)
+
+
+def test_ensure_renders_pruned_previews_again(store, png):
+    data = png(1)
+    digest = store.ensure('cover.png', lambda: io.BytesIO(data))
+    path = store.path(digest, 'thumb', 'webp')
+    old = time.time() - 3600
+    for name in os.listdir(store.folder):
+        os.utime(os.path.join(store.folder, name), (old, old))
+
+    files, reclaimed = store.prune(60, sources={'cover.png'})
+    assert files == len(PREVIEW_SIZES) * len(PREVIEW_FORMATS) and reclaimed > 0
+    assert not os.path.exists(path) and store.source(digest) == 'cover.png'
+    assert store.ensure('cover.png', lambda: io.BytesIO(data)) == digest
+    assert os.path.exists(path)
+
+    # Once the source is gone its record goes too
+    for name in os.listdir(store.folder):
+        os.utime(os.path.join(store.folder, name), (old, old))
+    store.prune(60, sources=set())
+    assert os.listdir(store.folder) == []
+
+
+def test_preview_endpoint(backend, user, create_room):
+    room = create_room(4)
+    digest = room['previews']['cover']['thumb'].split('/')[3]
+    webp = user.get(f'/api/previews/{digest}/thumb', headers={'Accept': 'image/webp'})
+    assert webp.status_code == 200 and webp.mimetype == 'image/webp'
+    assert 'immutable' in webp.headers['Cache-Control']
+    assert user.get(f'/api/previews/{digest}/thumb').mimetype == 'image/jpeg'
+    assert user.get(f'/api/previews/{digest}/huge').status_code == 404
+    assert user.get(f"/api/previews/{'0' * 64}/thumb").status_code == 404
+    redirect = user.get(f"/api/steg_rooms/{room['id']}/preview/stego?size=view")
+    assert redirect.status_code in (302, 303)
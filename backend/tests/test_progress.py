@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+from flask import Flask
+
+from progress import ProgressBroker
+
+OPERATION = 'operation-0001'
+
+
+@pytest.fixture
+def broker():
+    app = Flask(__name__)
+    with app.test_request_context():
+        yield ProgressBroker(lambda: 'client', min_interval=60)
+
+
+def parse(stream):
+    """(id, event, data) of each SSE event in a stream."""
+    events = []
+    for block in ''.join(stream).split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_progress_is_throttled_within_a_stage(broker):
+    operation = broker.start(OPERATION, 'client')
+    operation.stage('decode')
+    for done in range(0, 1000, 100):
+        operation.report('embed', done, 1000, 0)
+    operation.report('embed', 1000, 1000, 0)
+    operation.finish(200)
+    events = parse(broker.stream(OPERATION))
+    assert [(event, data.get('stage'), data.get('done')) for _, event, data in events] == [
+        ('progress', 'decode', 0), ('progress', 'embed', 0), ('progress', 'embed', 1000), ('done', None, None)]
+
+
+def test_reconnect_resumes_after_last_event_id(broker):
+    operation = broker.start(OPERATION, 'client')
+    operation.stage('decode')
+    operation.stage('embed')
+    operation.finish(400, 'bad header')
+    events = parse(broker.stream(OPERATION, last_event_id='2'))
+    assert events == [(3, 'failed', {'status': 400, 'error': 'bad header'})]
+
+
+def test_operations_belong_to_one_client(broker):
+    assert broker.start(OPERATION, 'someone else') is not None
+    assert broker.stream(OPERATION) is None
+    assert broker.start(OPERATION, 'someone else') is None
+    assert broker.start('short', 'client') is None
+
+
+def test_embed_reports_its_stages(client, png):
+    response = client.post('/api/mlsb/embed', content_type='multipart/form-data',
+                           headers={'X-Operation-Id': OPERATION}, data={
+                               'cover_image': (io.BytesIO(png()), 'cover.png'),
+                               'message_file': (io.BytesIO(b'progress ' * 20), 'message.txt'),
+                               'is_encrypted': 'false',
+                           })
+    assert response.status_code == 200
+    stream = client.get(f'/api/operations/{OPERATION}/events')
+    assert stream.mimetype == 'text/event-stream'
+    events = parse([stream.get_data(as_text=True)])
+    stages = [data['stage'] for _, event, data in events if event == 'progress']
+    assert 'embed' in stages
+    assert events[-1][1:] == ('done', {'status': 200})
+    assert client.get('/api/operations/bad/events').status_code == 404
@@ -0,0 +1,14 @@
+import pytest
+
+
+def test_uploaded_file_is_served(backend, client):
+    backend.blob_store.put('served.txt', b'hello')
+    response = client.get('/uploads/served.txt')
+    assert response.status_code == 200
+    assert response.get_data() == b'hello'
+
+
+@pytest.mark.parametrize('path', ['nested/served.txt', 'a/b/c.png', 'missing.png'])
+def test_paths_that_name_no_blob_are_not_found(backend, client, path):
+    backend.blob_store.put('served.txt', b'hello')
+    assert client.get(f'/uploads/{path}').status_code == 404
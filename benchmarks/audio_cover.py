@@ -0,0 +1,132 @@
+"""
+Time and memory of AudioLSB on hour-long synthetic WAV recordings.
+
+A recording of --minutes (tones plus noise, 16-bit PCM by default) is written
+to --dir, then payloads of each --payload-mb are embedded and extracted in
+both layouts with rounds='auto'. Times are the best of --repeat runs; "heap
+peak" is the peak of Python/NumPy allocations seen by tracemalloc during the
+run, which stays at a few chunks however long the recording is (memory-mapped
+pages are the page cache's, not the heap's). Every extracted payload is
+compared with the embedded one; a mismatch is reported as FAIL and the script
+exits with status 1.
+
+An hour of 44.1 kHz stereo 16-bit audio is about 600 MB, and each run writes
+a stego of the same size next to it.
+
+Usage:
+    python benchmarks/audio_cover.py
+    python benchmarks/audio_cover.py --minutes 180 --payload-mb 1 64 --layouts plane --dir /data/tmp --json out.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mlsb_algo_api.AudioLSB import AudioLSB  # noqa: E402
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB  # noqa: E402
+
+SYNTH_FRAMES = 1 << 20
+
+
+def make_recording(path, minutes, sample_rate, channels, width):
+    """Write a WAV of tones plus noise a block at a time."""
+    rng = np.random.default_rng(0)
+    frames = int(minutes * 60 * sample_rate)
+    peak = (1 << (8 * width - 1)) - 1
+    with wave.open(path, 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(width)
+        w.setframerate(sample_rate)
+        for start in range(0, frames, SYNTH_FRAMES):
+            t = np.arange(start, min(start + SYNTH_FRAMES, frames)) / sample_rate
+            tone = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.2 * np.sin(2 * np.pi * 660 * t)
+            block = tone[:, np.newaxis] + 0.05 * rng.standard_normal((len(t), channels))
+            samples = np.clip(block * peak, -peak, peak).astype('<i4')
+            if width == 1:
+                # 8-bit WAV is unsigned
+                samples = (samples + 128).astype(np.uint8)
+            else:
+                # The low `width` bytes of each little-endian int32; 24-bit has no NumPy type of its own
+                samples = samples.view(np.uint8).reshape(-1, 4)[:, :width]
+            w.writeframes(samples.tobytes())
+
+
+def measured(repeat, operation):
+    """Run `operation` `repeat` times; return (fastest seconds, peak traced bytes, last result)."""
+    best = None
+    peak = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = operation()
+        elapsed = time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--minutes', type=float, default=60)
+    parser.add_argument('--sample-rate', type=int, default=44100)
+    parser.add_argument('--channels', type=int, default=2)
+    parser.add_argument('--bits', type=int, default=16, choices=[8, 16, 24, 32])
+    parser.add_argument('--payload-mb', type=float, nargs='+', default=[1, 16])
+    parser.add_argument('--layouts', nargs='+', default=list(MultiLayerLSB.LAYOUTS), choices=MultiLayerLSB.LAYOUTS)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--dir', help='Where to write the recordings; default is the system temporary directory.')
+    parser.add_argument('--json', help='Write all results to this file.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        cover = os.path.join(tmp, 'cover.wav')
+        stego = os.path.join(tmp, 'stego.wav')
+        start = time.perf_counter()
+        make_recording(cover, args.minutes, args.sample_rate, args.channels, args.bits // 8)
+        info = AudioLSB.read_wav_info(cover)
+        size_mb = os.path.getsize(cover) / 1024 ** 2
+        print(f"{args.minutes:g} min, {info.channels} ch, {info.bits_per_sample}-bit, {info.sample_rate} Hz: "
+              f"{size_mb:.0f} MB, {info.frames * info.channels} samples (written in "
+              f"{time.perf_counter() - start:.1f} s)")
+        print(f"{'payload MB':>10}{'layout':>8}{'rounds':>7}{'embed s':>9}{'MB/s':>8}{'heap MB':>9}"
+              f"{'extract s':>11}{'heap MB':>9}  output")
+
+        results = []
+        for payload_mb in args.payload_mb:
+            payload = np.random.default_rng(1).integers(0, 256, size=int(payload_mb * 1024 ** 2),
+                                                        dtype=np.uint8).tobytes()
+            for layout in args.layouts:
+                embed_seconds, embed_peak, _ = measured(args.repeat, lambda: AudioLSB.embed_data(
+                    cover, stego, payload, rounds='auto', is_encrypted=False, layout=layout))
+                extract_seconds, extract_peak, (message, _) = measured(args.repeat, lambda: AudioLSB.extract_data(
+                    stego, rounds='auto', is_encrypted=False))
+                rounds = MultiLayerLSB._minimum_rounds(info.frames * info.channels, MultiLayerLSB.embedded_bit_length(
+                    payload, is_encrypted=False, layout=layout), layout)
+                row = {'minutes': args.minutes, 'file_mb': size_mb, 'payload_mb': payload_mb, 'layout': layout,
+                       'rounds': rounds, 'embed_seconds': embed_seconds, 'embed_heap_peak': embed_peak,
+                       'extract_seconds': extract_seconds, 'extract_heap_peak': extract_peak,
+                       'identical': message.startswith(payload)}
+                results.append(row)
+                print(f"{payload_mb:>10g}{layout:>8}{rounds:>7}{embed_seconds:>9.2f}{size_mb / embed_seconds:>8.0f}"
+                      f"{embed_peak / 1024 ** 2:>9.1f}{extract_seconds:>11.2f}{extract_peak / 1024 ** 2:>9.1f}"
+                      f"  {'identical' if row['identical'] else 'FAIL'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not all(row['identical'] for row in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""
+Throughput of the blob storage backends: local disk and S3.
+
+For each blob size, writes, full reads (streamed) and range reads are timed
+with a number of concurrent threads, the way request handlers share one store.
+Sizes at or above the multipart threshold exercise multipart uploads.
+
+Without --s3-endpoint the S3 backend runs against moto's in-process S3 server
+(pip install "moto[server]"), so the numbers show client and protocol
+overhead rather than network throughput; point it at a real bucket for that.
+
+Before timing, every backend is checked: put/get of bytes and of file objects,
+range reads, multipart uploads above the threshold (with a bound on how far a
+file object is read ahead of the parts sent), concurrent puts of one key
+(local), list and delete. A failed check is reported and the script exits with status
+1; --check-only stops after the checks.
+
+Usage:
+    python benchmarks/blob_throughput.py
+    python benchmarks/blob_throughput.py --check-only
+    python benchmarks/blob_throughput.py --sizes-mb 1 16 64 --threads 1 8 --backends local
+    python benchmarks/blob_throughput.py --s3-endpoint http://localhost:9000 --s3-bucket bench --json out.json
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from blobstore import LocalBlobStore, S3BlobStore  # noqa: E402
+
+RANGE_SIZE = 64 * 1024
+
+
+def start_s3_standin():
+    """Start moto's S3 server in this process. Returns (endpoint url, stop callable)."""
+    from moto.server import ThreadedMotoServer
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+    server = ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    return f"http://{host}:{port}", server.stop
+
+
+def make_s3_store(endpoint, bucket, region, pool_size):
+    store = S3BlobStore(bucket, prefix='bench/', endpoint_url=endpoint, region=region, pool_size=pool_size)
+    try:
+        store.client.head_bucket(Bucket=bucket)
+    except Exception:
+        store.client.create_bucket(Bucket=bucket)
+    return store
+
+
+class CountingReader(io.RawIOBase):
+    """File object over bytes that counts what has been read from it."""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+        self.consumed = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        chunk = self._data.read(size)
+        self.consumed += len(chunk)
+        return chunk
+
+
+def check_backend(name, store):
+    """Correctness checks of one store. Returns a list of failure messages."""
+    failures = []
+
+    def expect(condition, message):
+        if not condition:
+            failures.append(f"{name}: {message}")
+
+    rng = np.random.default_rng(42)
+    small = rng.integers(0, 256, size=300 * 1024, dtype=np.uint8).tobytes()
+    # Above the S3 multipart threshold, and not a whole number of parts
+    threshold = getattr(store, 'multipart_threshold', 16 * 2**20)
+    large = rng.integers(0, 256, size=threshold + 5 * 2**20 + 123, dtype=np.uint8).tobytes()
+
+    store.put('check_small.bin', small)
+    expect(store.read('check_small.bin') == small, "put/read of bytes differs")
+    info = store.stat('check_small.bin')
+    expect(info is not None and info.size == len(small), "stat size differs")
+    for start, stop in ((0, 1), (1000, 70000), (len(small) - 10, len(small))):
+        expect(store.read_range('check_small.bin', start, stop) == small[start:stop],
+               f"read_range({start}, {stop}) differs")
+        expect(b''.join(store.iter_range('check_small.bin', start, stop, 4096)) == small[start:stop],
+               f"iter_range({start}, {stop}) differs")
+
+    store.put('check_large.bin', large)
+    expect(store.read('check_large.bin') == large, "multipart put of bytes differs")
+    offset = threshold - 100
+    expect(store.read_range('check_large.bin', offset, offset + 200) == large[offset:offset + 200],
+           "range read across a part boundary differs")
+
+    # File objects are sent a part at a time; track how far reading runs ahead of the parts uploaded.
+    # The blob is larger than the parts allowed in memory, so reading it whole up front fails the check
+    streamed = large * 3
+    reader = CountingReader(streamed)
+    ahead = [0]
+    if isinstance(store, S3BlobStore):
+        uploaded = [0]
+        lock = threading.Lock()
+
+        def part_uploaded(**kwargs):
+            with lock:
+                ahead[0] = max(ahead[0], reader.consumed - uploaded[0] * store.part_size)
+                uploaded[0] += 1
+
+        store.client.meta.events.register('after-call.s3.UploadPart', part_uploaded)
+    try:
+        store.put('check_stream.bin', reader)
+    finally:
+        if isinstance(store, S3BlobStore):
+            store.client.meta.events.unregister('after-call.s3.UploadPart', part_uploaded)
+    expect(store.read('check_stream.bin') == streamed, "multipart put of a file object differs")
+    if isinstance(store, S3BlobStore):
+        limit = (store.upload_concurrency + 1) * store.part_size
+        expect(ahead[0] <= limit, f"file object read {ahead[0]} bytes ahead of the parts uploaded (limit {limit})")
+
+    keys = {'check_small.bin': len(small), 'check_large.bin': len(large), 'check_stream.bin': len(streamed)}
+    if isinstance(store, LocalBlobStore):
+        # Concurrent writers of one key each get their own temporary file: every put succeeds and the
+        # blob is one payload whole. (S3 replaces objects atomically; moto's server races on this.)
+        payloads = [bytes([i]) * (1024 * 1024) for i in range(8)]
+        with ThreadPoolExecutor(max_workers=len(payloads)) as pool:
+            errors = [future.exception() for future in
+                      [pool.submit(store.put, 'check_race.bin', payload) for payload in payloads]]
+        expect(not any(errors), f"concurrent puts failed: {[e for e in errors if e]}")
+        expect(store.read('check_race.bin') in payloads, "concurrent puts left a mixed blob")
+        keys['check_race.bin'] = len(payloads[0])
+
+    listed = {info.key: info.size for info in store.list() if info.key in keys}
+    expect(listed == keys, f"list() reports {listed}")
+    expect(not [info.key for info in store.list() if info.key.endswith('.part')], "temporary files left behind")
+
+    for key, size in keys.items():
+        expect(store.delete(key) == size, f"delete({key}) reclaimed the wrong size")
+        expect(store.stat(key) is None, f"{key} still exists after delete")
+    expect(store.delete('check_small.bin') == 0, "deleting a missing blob reclaimed bytes")
+    try:
+        store.open('check_small.bin').close()
+        failures.append(f"{name}: open() of a deleted blob succeeded")
+    except FileNotFoundError:
+        pass
+    return failures
+
+
+def timed(threads, jobs):
+    """Run the callables on `threads` threads; return wall seconds."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for future in [pool.submit(job) for job in jobs]:
+            future.result()
+    return time.perf_counter() - start
+
+
+def bench_backend(name, store, size, threads, count):
+    payload = np.random.default_rng(size).integers(0, 256, size=size, dtype=np.uint8).tobytes()
+    keys = [f"bench_{size}_{i}.bin" for i in range(count)]
+    rng = np.random.default_rng(0)
+    offsets = rng.integers(0, max(size - RANGE_SIZE, 1), size=count)
+
+    def read_all(key):
+        with store.open(key) as f:
+            while f.read(1024 * 1024):
+                pass
+
+    results = {}
+    results['put'] = timed(threads, [lambda k=k: store.put(k, payload) for k in keys])
+    results['get'] = timed(threads, [lambda k=k: read_all(k) for k in keys])
+    results['range'] = timed(threads, [lambda k=k, o=int(o): store.read_range(k, o, o + RANGE_SIZE)
+                                       for k, o in zip(keys, offsets)])
+    for key in keys:
+        store.delete(key)
+
+    total_mb = size * count / 2**20
+    rows = []
+    for operation, seconds in results.items():
+        mb = RANGE_SIZE * count / 2**20 if operation == 'range' else total_mb
+        rows.append({'backend': name, 'size_mb': size / 2**20, 'threads': threads, 'operation': operation,
+                     'seconds': seconds, 'mb_per_s': mb / seconds, 'ops_per_s': count / seconds})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--backends', nargs='+', default=['local', 's3'], choices=['local', 's3'])
+    parser.add_argument('--sizes-mb', type=float, nargs='+', default=[0.25, 4, 32],
+                        help='Blob sizes; 32MB is above the 16MB multipart threshold.')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--count', type=int, default=16, help='Blobs per size and thread count.')
+    parser.add_argument('--local-dir', help='Directory for the local backend (default: a temporary directory).')
+    parser.add_argument('--s3-endpoint', help='S3-compatible endpoint; default starts an in-process stand-in.')
+    parser.add_argument('--s3-bucket', default='steg-benchmark')
+    parser.add_argument('--s3-region', default='us-east-1')
+    parser.add_argument('--json', help='Write all results to this file.')
+    parser.add_argument('--check-only', action='store_true', help='Run the correctness checks only.')
+    args = parser.parse_args()
+
+    stores = []
+    cleanup = []
+    if 'local' in args.backends:
+        local_dir = args.local_dir or tempfile.mkdtemp()
+        if not args.local_dir:
+            cleanup.append(lambda: shutil.rmtree(local_dir, ignore_errors=True))
+        stores.append(('local', LocalBlobStore(local_dir)))
+    if 's3' in args.backends:
+        endpoint = args.s3_endpoint
+        if endpoint is None:
+            endpoint, stop = start_s3_standin()
+            cleanup.append(stop)
+        stores.append(('s3', make_s3_store(endpoint, args.s3_bucket, args.s3_region, max(args.threads) * 2)))
+
+    results = []
+    failures = []
+    try:
+        for name, store in stores:
+            problems = check_backend(name, store)
+            failures.extend(problems)
+            print(f"check {name}: {'FAIL' if problems else 'ok'}")
+            for problem in problems:
+                print(f"  {problem}")
+        if args.check_only:
+            stores = []
+        else:
+            print(f"{'backend':<8}{'size':>9}{'threads':>9}{'operation':>11}{'MB/s':>10}{'ops/s':>10}")
+        for name, store in stores:
+            for size_mb in args.sizes_mb:
+                for threads in args.threads:
+                    for row in bench_backend(name, store, int(size_mb * 2**20), threads, args.count):
+                        results.append(row)
+                        print(f"{name:<8}{f'{size_mb:g}M':>9}{threads:>9}{row['operation']:>11}"
+                              f"{row['mb_per_s']:>10.1f}{row['ops_per_s']:>10.1f}")
+    finally:
+        for step in cleanup:
+            step()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Storage savings and rebuild latency of delta-stored stego images.
+
+Every cover in the test fixtures (mlsb_algo_api/tests/cover_image) is embedded
+with random (encrypted-like) and text payloads filling --fills of its capacity
+at --rounds, in both layouts. For each stego the table compares the PNG the
+backend stores by default with the delta STEGO_STORAGE=delta stores instead,
+and times making the delta and rebuilding the PNG from the cover file (decode,
+apply_delta, PNG encode), best of --repeat runs. Every rebuilt PNG is compared
+with the original; a mismatch is reported as FAIL and the script exits with
+status 1.
+
+Usage:
+    python benchmarks/delta_storage.py
+    python benchmarks/delta_storage.py --fills 0.01 0.5 --rounds 4 --layouts plane --json out.json
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'mlsb_algo_api', 'tests', 'cover_image')
+TERMINATOR = b'<<END_OF_MESSAGE>>'
+
+
+def best_of(repeat, operation):
+    """Run `operation` `repeat` times; return (fastest seconds, last result)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = operation()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def encode_png(stego):
+    png = io.BytesIO()
+    MultiLayerLSB.save_image(stego, png)
+    return png.getvalue()
+
+
+def make_payload(kind, size):
+    if kind == 'random':
+        return np.random.default_rng(size).integers(0, 256, size=size, dtype=np.uint8).tobytes()
+    text = b'Attack at dawn; bring the maps and the spare batteries. '
+    return (text * (size // len(text) + 1))[:size]
+
+
+def bench(path, rounds, fill, layout, kind, repeat):
+    with open(path, 'rb') as f:
+        cover_file = f.read()
+    cover = MultiLayerLSB.load_image(cover_file)
+    header_bits = len(MultiLayerLSB.build_header('text', 0, 'none', layout, rounds))
+    size = max(1, int(cover.size * rounds * fill) // 8 - header_bits // 8 - len(TERMINATOR) - 1)
+    stego, _, _ = MultiLayerLSB.embed_data(cover, make_payload(kind, size), rounds=rounds, is_encrypted=False,
+                                           layout=layout)
+    png = encode_png(stego)
+
+    delta_seconds, delta = best_of(repeat, lambda: MultiLayerLSB.stego_delta(cover, stego))
+    apply_seconds, _ = best_of(repeat, lambda: MultiLayerLSB.apply_delta(cover, delta))
+    rebuild_seconds, rebuilt = best_of(repeat, lambda: encode_png(
+        MultiLayerLSB.apply_delta(MultiLayerLSB.load_image(cover_file), delta)))
+    return {'cover': os.path.basename(path), 'layout': layout, 'payload': kind, 'fill': fill, 'rounds': rounds,
+            'payload_bytes': size, 'cover_bytes': len(cover_file), 'stego_png_bytes': len(png),
+            'delta_bytes': len(delta), 'saved': 1 - len(delta) / len(png), 'delta_seconds': delta_seconds,
+            'apply_seconds': apply_seconds, 'rebuild_seconds': rebuild_seconds, 'identical': rebuilt == png}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--covers', nargs='+', help='Cover images; default is every fixture cover.')
+    parser.add_argument('--fills', type=float, nargs='+', default=[0.01, 0.1, 0.5, 0.9],
+                        help='Fractions of the capacity at --rounds the payload uses.')
+    parser.add_argument('--rounds', type=int, default=2)
+    parser.add_argument('--layouts', nargs='+', default=list(MultiLayerLSB.LAYOUTS), choices=MultiLayerLSB.LAYOUTS)
+    parser.add_argument('--payloads', nargs='+', default=['random', 'text'], choices=['random', 'text'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Write all results to this file.')
+    args = parser.parse_args()
+
+    covers = args.covers or sorted(path for path in glob.glob(os.path.join(FIXTURES, '*'))
+                                   if '_stego' not in os.path.basename(path))
+    print(f"{'cover':<12}{'layout':>7}{'payload':>8}{'fill':>6}{'PNG KB':>9}{'delta KB':>10}{'saved':>7}"
+          f"{'delta ms':>10}{'apply ms':>10}{'rebuild ms':>12}  output")
+    results = []
+    for path in covers:
+        for layout in args.layouts:
+            for kind in args.payloads:
+                for fill in args.fills:
+                    row = bench(path, args.rounds, fill, layout, kind, args.repeat)
+                    results.append(row)
+                    print(f"{row['cover']:<12}{layout:>7}{kind:>8}{fill:>6.2f}"
+                          f"{row['stego_png_bytes'] / 1024:>9.0f}{row['delta_bytes'] / 1024:>10.1f}"
+                          f"{row['saved']:>7.0%}{row['delta_seconds'] * 1000:>10.1f}"
+                          f"{row['apply_seconds'] * 1000:>10.1f}{row['rebuild_seconds'] * 1000:>12.1f}"
+                          f"  {'identical' if row['identical'] else 'FAIL'}")
+
+    stego_total = sum(row['stego_png_bytes'] for row in results)
+    delta_total = sum(row['delta_bytes'] for row in results)
+    if results:
+        print(f"Total: {stego_total / 1024 ** 2:.1f} MB of stego PNGs stored as {delta_total / 1024 ** 2:.1f} MB "
+              f"of deltas ({1 - delta_total / stego_total:.0%} saved)")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not all(row['identical'] for row in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
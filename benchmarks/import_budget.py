@@ -0,0 +1,96 @@
+"""
+Cold-start import budget for the MultiLayerLSB library and the Flask app.
+
+Runs `python -X importtime` in a fresh interpreter for each target, takes the
+median cumulative import time over several runs and fails if it exceeds the
+budget. Heavy optional dependencies that must stay lazy are also checked:
+importing the target must not pull them in.
+
+Usage:
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --library-budget-ms 120 --app-budget-ms 400 --repeat 7
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use only; importing the target must not import these
+LAZY_PACKAGES = {
+    'library': ['scipy', 'skimage', 'cryptography'],
+    'app': ['scipy', 'skimage', 'cryptography', 'flask_admin', 'authlib', 'requests', 'redis', 'boto3'],
+}
+
+
+def run_importtime(module, cwd, env):
+    """Return {module name: (self us, cumulative us)} for one cold import of `module`."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def check_target(label, module, cwd, env, budget_ms, repeat, top):
+    runs = [run_importtime(module, cwd, env) for _ in range(repeat)]
+    cumulative_ms = statistics.median(run[module][1] for run in runs) / 1000
+
+    failures = []
+    if cumulative_ms > budget_ms:
+        failures.append(f"import took {cumulative_ms:.1f} ms > budget {budget_ms} ms")
+    imported = {name.split('.')[0] for name in runs[0]}
+    for package in LAZY_PACKAGES[label]:
+        if package in imported:
+            failures.append(f"imports {package} at startup")
+
+    status = 'FAIL ' + '; '.join(failures) if failures else 'ok'
+    print(f"{label:<8} import {module:<30} {cumulative_ms:>8.1f} ms  (budget {budget_ms} ms)  {status}")
+
+    # Heaviest top-level packages, to show where the time goes
+    packages = {}
+    for name, (_, cumulative_us) in runs[0].items():
+        package = name.split('.')[0]
+        if name == package and package != module:
+            packages[package] = max(packages.get(package, 0), cumulative_us)
+    for package, cumulative_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{'':<10}{package:<30} {cumulative_us / 1000:>8.1f} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--library-budget-ms', type=float, default=150)
+    parser.add_argument('--app-budget-ms', type=float, default=600)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='Number of heaviest packages to list per target.')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    # Keep the app from touching the development database and upload folder
+    env['DATABASE_URL'] = 'sqlite://'
+    env['UPLOAD_FOLDER'] = tempfile.mkdtemp()
+
+    # One warm-up import so bytecode compilation isn't counted as startup time
+    for module, cwd in (('mlsb_algo_api.MultiLayerLSB', ROOT), ('app', os.path.join(ROOT, 'backend'))):
+        subprocess.run([sys.executable, '-c', f'import {module}'], cwd=cwd, env=env, capture_output=True)
+
+    failures = check_target('library', 'mlsb_algo_api.MultiLayerLSB', ROOT, env,
+                            args.library_budget_ms, args.repeat, args.top)
+    failures += check_target('app', 'app', os.path.join(ROOT, 'backend'), env,
+                             args.app_budget_ms, args.repeat, args.top)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+"""
+Peak and steady-state memory of MultiLayerLSB operations and Flask endpoints.
+
+Each measurement runs in a forked child so RSS high-water marks don't leak
+between cases. For every case we report:
+    traced peak   - peak Python/NumPy allocations seen by tracemalloc
+    traced steady - allocations still alive after the operation and a gc pass
+    rss peak      - growth of the process high-water RSS during the operation
+
+Ceilings are expressed in bytes per cover pixel plus a fixed slack; any case
+that exceeds one is reported as FAIL and the script exits with status 1. The
+defaults sit just above what the current code needs (SSIM and the endpoints
+that compute it peak at ~180 B/px).
+
+Usage:
+    python benchmarks/memory_profile.py --sizes 256 512 1024 --payloads 1 64 512
+    python benchmarks/memory_profile.py --endpoints --max-peak-per-pixel 120 --json results.json
+"""
+import argparse
+import gc
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB  # noqa: E402
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss():
+    """Resident set size of this process in bytes (Linux), or 0 if unknown."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return 0
+
+
+def max_rss():
+    """High-water RSS of this process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def make_cover(side, rgb=True):
+    rng = np.random.default_rng(side)
+    shape = (side, side, 3) if rgb else (side, side)
+    return rng.integers(0, 256, size=shape, dtype=np.uint8)
+
+
+def make_payload(size_kb):
+    # Half text, half random: compressible enough to exercise the codec path
+    rng = np.random.default_rng(size_kb)
+    size = size_kb * 1024
+    text = (b'The quick brown fox jumps over the lazy dog. ' * (size // 90 + 1))[:size // 2]
+    return text + rng.integers(0, 256, size=size - len(text), dtype=np.uint8).tobytes()
+
+
+def encode_png(array):
+    buf = io.BytesIO()
+    MultiLayerLSB.save_image(array, buf)
+    return buf.getvalue()
+
+
+def library_cases(side, payload_kb, rounds, compression):
+    """Yield (operation name, setup, run) for every library operation."""
+    def embed_setup():
+        return make_cover(side), make_payload(payload_kb)
+
+    def embed_run(state):
+        cover, payload = state
+        MultiLayerLSB.embed_data(cover, payload, rounds=rounds, is_encrypted=True, compression=compression)
+
+    def stego_setup():
+        cover = make_cover(side)
+        stego, key, iv = MultiLayerLSB.embed_data(cover, make_payload(payload_kb), rounds=rounds,
+                                                 compression=compression)
+        return cover, stego, key, iv
+
+    def extract_run(state):
+        _, stego, key, iv = state
+        MultiLayerLSB.extract_data(stego, rounds=rounds, key=key, iv=iv)
+
+    def ssim_setup():
+        # skimage is imported lazily; load it here so the import isn't counted as SSIM memory
+        from skimage.metrics import structural_similarity  # noqa: F401
+        return stego_setup()
+
+    def files_setup():
+        tmp = tempfile.mkdtemp()
+        cover_path = os.path.join(tmp, 'cover.png')
+        message_path = os.path.join(tmp, 'message.txt')
+        MultiLayerLSB.save_image(make_cover(side), cover_path)
+        with open(message_path, 'wb') as f:
+            f.write(make_payload(payload_kb))
+        return cover_path, message_path, os.path.join(tmp, 'stego.png')
+
+    def embed_file_run(state):
+        cover_path, message_path, stego_path = state
+        MultiLayerLSB.embed_message(cover_path, stego_path, message_path, rounds=rounds, compression=compression)
+
+    yield 'embed_data', embed_setup, embed_run
+    yield 'embed_message', files_setup, embed_file_run
+    yield 'extract_data', stego_setup, extract_run
+    yield 'calculate_mse', stego_setup, lambda s: MultiLayerLSB.calculate_mse(s[0], s[1])
+    yield 'calculate_psnr', stego_setup, lambda s: MultiLayerLSB.calculate_psnr(s[0], s[1])
+    yield 'calculate_ssim', ssim_setup, lambda s: MultiLayerLSB.calculate_ssim(s[0], s[1])
+    yield 'calculate_capacity', stego_setup, lambda s: MultiLayerLSB.calculate_capacity(s[0], rounds)
+    yield 'calculate_bpp', embed_setup, lambda s: MultiLayerLSB.calculate_bpp(s[1], s[0], rounds, compression,
+                                                                             file_extension='.txt')
+
+
+def endpoint_cases(side, payload_kb):
+    """Yield (endpoint name, setup, run) for the upload-handling Flask endpoints."""
+    def client_setup():
+        upload_dir = tempfile.mkdtemp()
+        os.environ['DATABASE_URL'] = 'sqlite://'
+        os.environ['UPLOAD_FOLDER'] = upload_dir
+        from app import app, db, User
+        app.config['TESTING'] = True
+        with app.app_context():
+            db.create_all()
+            user = User(email='profile@example.com', password='profile')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+        cover_png = encode_png(make_cover(side))
+        payload = make_payload(payload_kb)
+        stego, _, _ = MultiLayerLSB.embed_data(cover_png, payload, is_encrypted=False)
+        return client, cover_png, payload, encode_png(stego)
+
+    def post(path, data):
+        def run(state):
+            client, cover_png, payload, stego_png = state
+            files = {
+                'cover_image': (io.BytesIO(cover_png), 'cover.png'),
+                'image': (io.BytesIO(cover_png), 'cover.png'),
+                'message_file': (io.BytesIO(payload), 'message.txt'),
+                'message': (io.BytesIO(payload), 'message.txt'),
+                'stego_image': (io.BytesIO(stego_png), 'stego.png'),
+            }
+            form = dict(data)
+            for field in data.get('_files', ()):
+                form[field] = files[field]
+            form.pop('_files', None)
+            response = client.post(path, data=form, content_type='multipart/form-data')
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return run
+
+    yield 'POST /api/mlsb/embed', client_setup, post('/api/mlsb/embed', {
+        'is_encrypted': 'true', '_files': ('cover_image', 'message_file')})
+    yield 'POST /api/mlsb/extract', client_setup, post('/api/mlsb/extract', {
+        'is_encrypted': 'false', '_files': ('stego_image',)})
+    yield 'POST /api/mlsb/extract/stream', client_setup, post('/api/mlsb/extract/stream', {
+        'is_encrypted': 'false', '_files': ('stego_image',)})
+    yield 'POST /api/mlsb/capacity', client_setup, post('/api/mlsb/capacity', {
+        'rounds': '8', '_files': ('image',)})
+    yield 'POST /api/create_stego_room', client_setup, post('/api/create_stego_room', {
+        'name': 'profile', 'encrypted': 'true', '_files': ('image', 'message')})
+
+
+def measure(setup, run):
+    """Run setup() then run(state) and return memory figures in bytes."""
+    state = setup()
+    gc.collect()
+    rss_before = current_rss()
+    max_rss_before = max_rss()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+
+    run(state)
+
+    _, traced_peak = tracemalloc.get_traced_memory()
+    gc.collect()
+    steady, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'traced_peak': traced_peak - base,
+        'traced_steady': max(steady - base, 0),
+        'rss_peak': max(max_rss() - max(rss_before, max_rss_before), 0),
+    }
+
+
+def _child(conn, setup, run):
+    try:
+        conn.send(measure(setup, run))
+    except Exception as e:
+        conn.send({'error': f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def measure_isolated(setup, run):
+    """measure() in a forked child so each case starts from a clean RSS high-water mark."""
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return measure(setup, run)
+    ctx = multiprocessing.get_context('fork')
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_child, args=(child_conn, setup, run))
+    process.start()
+    child_conn.close()
+    result = parent_conn.recv()
+    process.join()
+    return result
+
+
+def check_limits(result, pixels, args):
+    failures = []
+    slack = args.slack_mb * 2**20
+    limits = (('traced_peak', args.max_peak_per_pixel),
+              ('rss_peak', args.max_rss_per_pixel),
+              ('traced_steady', args.max_steady_per_pixel))
+    for field, limit in limits:
+        if limit is not None and result[field] > limit * pixels + slack:
+            failures.append(f"{field} {result[field] / pixels:.1f} B/px > {limit} B/px")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[256, 512, 1024],
+                        help='Cover side lengths in pixels (square RGB covers).')
+    parser.add_argument('--payloads', type=int, nargs='+', default=[1, 64, 256],
+                        help='Payload sizes in KB.')
+    parser.add_argument('--rounds', type=int, default=8)
+    parser.add_argument('--compression', default='auto')
+    parser.add_argument('--endpoints', action='store_true', help='Also profile the Flask upload endpoints.')
+    parser.add_argument('--only', nargs='*', help='Only run operations whose name contains one of these strings.')
+    parser.add_argument('--max-peak-per-pixel', type=float, default=200,
+                        help='Fail if traced peak memory exceeds this many bytes per cover pixel.')
+    parser.add_argument('--max-rss-per-pixel', type=float, default=220,
+                        help='Fail if peak RSS growth exceeds this many bytes per cover pixel.')
+    parser.add_argument('--max-steady-per-pixel', type=float, default=4,
+                        help='Fail if memory retained after an operation exceeds this many bytes per cover pixel.')
+    parser.add_argument('--slack-mb', type=float, default=16,
+                        help='Fixed allowance added to every ceiling, so small covers are not judged '
+                             'on per-request overhead alone.')
+    parser.add_argument('--json', help='Write all results to this file.')
+    args = parser.parse_args()
+
+    results = []
+    failed = False
+    print(f"{'operation':<30}{'cover':>11}{'payload':>9}{'peak MB':>10}{'rss MB':>9}"
+          f"{'steady MB':>11}{'peak B/px':>11}  status")
+    for side in args.sizes:
+        pixels = side * side
+        capacity_kb = MultiLayerLSB.calculate_capacity(make_cover(side), args.rounds) // 1024
+        for payload_kb in args.payloads:
+            if payload_kb >= capacity_kb:
+                continue
+            cases = list(library_cases(side, payload_kb, args.rounds, args.compression))
+            if args.endpoints:
+                cases += list(endpoint_cases(side, payload_kb))
+            for name, setup, run in cases:
+                if args.only and not any(part in name for part in args.only):
+                    continue
+                result = measure_isolated(setup, run)
+                label = f"{name:<30}{f'{side}x{side}':>11}{f'{payload_kb}K':>9}"
+                if 'error' in result:
+                    failures = [result['error']]
+                    print(f"{label}  ERROR {result['error']}")
+                else:
+                    failures = check_limits(result, pixels, args)
+                    status = 'FAIL ' + '; '.join(failures) if failures else 'ok'
+                    print(f"{label}{result['traced_peak'] / 2**20:>10.1f}{result['rss_peak'] / 2**20:>9.1f}"
+                          f"{result['traced_steady'] / 2**20:>11.2f}{result['traced_peak'] / pixels:>11.1f}  {status}")
+                failed = failed or bool(failures)
+                results.append({'operation': name, 'cover_side': side, 'payload_kb': payload_kb,
+                                'failures': failures, **result})
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Accuracy and speed of StegScanner's rate estimates at known embedding rates.
+
+Every cover in the test fixtures (mlsb_algo_api/tests/cover_image) has the LSBs
+of a random --rates fraction of its samples replaced by random bits, the way a
+payload of that size spread over the image would; the RS and sample pair
+estimates are then compared with the rate. An estimate further than
+--tolerance from it, a clean cover (rate 0) found suspicious, or a cover at
+--detect-rate or above that isn't, is reported as FAIL, as is a mean error of
+either estimate above --mean-tolerance; the script then exits with status 1.
+Times are the best of --repeat runs of each statistic.
+
+Usage:
+    python benchmarks/scanner_accuracy.py
+    python benchmarks/scanner_accuracy.py --rates 0 0.02 0.05 --tolerance 0.05 --mean-tolerance 0.03 --json out.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB  # noqa: E402
+from mlsb_algo_api.StegScanner import StegScanner  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, 'mlsb_algo_api', 'tests', 'cover_image')
+
+
+def embed_at_rate(cover, rate, seed):
+    """Replace the LSB of a random `rate` fraction of the samples with random bits."""
+    rng = np.random.default_rng(seed)
+    flat = cover.reshape(-1).copy()
+    chosen = rng.random(flat.size) < rate
+    flat[chosen] = (flat[chosen] & 0xFE) | rng.integers(0, 2, size=np.count_nonzero(chosen), dtype=flat.dtype)
+    return flat.reshape(cover.shape)
+
+
+def timed(repeat, operation):
+    """Run `operation` `repeat` times; return (fastest seconds, last result)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = operation()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--covers', nargs='+', help='Cover images; default is every fixture cover.')
+    parser.add_argument('--rates', type=float, nargs='+', default=[0, 0.05, 0.1, 0.3, 0.5, 0.8, 1.0])
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Largest accepted |estimate - rate|. Default is 0.2.')
+    parser.add_argument('--mean-tolerance', type=float, default=0.05,
+                        help='Largest accepted mean |estimate - rate| over all runs. Default is 0.05.')
+    parser.add_argument('--detect-rate', type=float, default=0.3,
+                        help='Covers embedded at this rate or above must be found suspicious. Default is 0.3.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Write all results to this file.')
+    args = parser.parse_args()
+
+    covers = args.covers or sorted(path for path in glob.glob(os.path.join(FIXTURES, '*'))
+                                   if '_stego' not in os.path.basename(path))
+    print(f"{'cover':<12}{'rate':>6}{'rs':>7}{'spa':>7}{'chi2':>7}{'rs ms':>8}{'spa ms':>8}  verdict     output")
+    results = []
+    for path in covers:
+        cover = MultiLayerLSB.load_image(path)
+        if cover.dtype != np.uint8:
+            cover = (cover & 0xFF).astype(np.uint8)
+        for index, rate in enumerate(args.rates):
+            stego = embed_at_rate(cover, rate, index)
+            rs_seconds, rs = timed(args.repeat, lambda: StegScanner.rs_analysis(stego))
+            spa_seconds, spa = timed(args.repeat, lambda: StegScanner.sample_pair_analysis(stego))
+            scan = StegScanner.scan_image(stego)
+            within = abs(rs - rate) <= args.tolerance and abs(spa - rate) <= args.tolerance
+            expected = True if rate >= args.detect_rate else False if rate == 0 else scan['suspicious']
+            row = {'cover': os.path.basename(path), 'rate': rate, 'rs': rs, 'spa': spa,
+                   'chi_square': scan['chi_square'], 'rs_seconds': rs_seconds, 'spa_seconds': spa_seconds,
+                   'suspicious': scan['suspicious'], 'ok': within and scan['suspicious'] == expected}
+            results.append(row)
+            print(f"{row['cover']:<12}{rate:>6.2f}{rs:>7.3f}{spa:>7.3f}{scan['chi_square']:>7.2f}"
+                  f"{rs_seconds * 1000:>8.1f}{spa_seconds * 1000:>8.1f}"
+                  f"  {'SUSPICIOUS' if scan['suspicious'] else 'clean':<10}  {'ok' if row['ok'] else 'FAIL'}")
+
+    ok = all(row['ok'] for row in results)
+    for name in ('rs', 'spa'):
+        errors = [abs(row[name] - row['rate']) for row in results]
+        if errors:
+            mean = sum(errors) / len(errors)
+            ok = ok and mean <= args.mean_tolerance
+            print(f"{name}: mean |error| {mean:.3f}, worst {max(errors):.3f}"
+                  f"{'' if mean <= args.mean_tolerance else '  FAIL'}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
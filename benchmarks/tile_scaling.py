@@ -0,0 +1,109 @@
+"""
+Core scaling of tile-parallel embedding and extraction in MultiLayerLSB.
+
+A random cover of each size is filled to --fill of its capacity and embedded
+and extracted with every worker count. Times are the best of --repeat runs
+and cover the bit-level work only (the cover is already decoded and the
+payload is not encrypted). Every parallel result is compared with the
+single-threaded one; a mismatch is reported as FAIL and the script exits
+with status 1.
+
+Speedup is limited by memory bandwidth as well as cores: expect it to flatten
+well before the core count on large covers.
+
+Usage:
+    python benchmarks/tile_scaling.py
+    python benchmarks/tile_scaling.py --megapixels 12 50 --workers 1 2 4 8 16 --layouts plane --json out.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB  # noqa: E402
+
+
+def make_cover(megapixels):
+    side = int((megapixels * 1e6) ** 0.5)
+    return np.random.default_rng(side).integers(0, 256, size=(side, side, 3), dtype=np.uint8)
+
+
+def best_of(repeat, operation):
+    """Run `operation` `repeat` times; return (fastest seconds, last result)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = operation()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench(cover, layout, rounds, fill, workers_list, repeat):
+    header_bits = len(MultiLayerLSB.build_header('text', 0, 'none', layout, rounds))
+    terminator = len(b'<<END_OF_MESSAGE>>')
+    payload_size = max(0, int(cover.size * rounds * fill) // 8 - header_bits // 8 - terminator - 1)
+    payload = np.random.default_rng(0).integers(0, 256, size=payload_size, dtype=np.uint8).tobytes()
+    stego = np.empty_like(cover)
+
+    rows = []
+    reference = None
+    for workers in workers_list:
+        embed_seconds, _ = best_of(repeat, lambda: MultiLayerLSB.embed_data(
+            cover, payload, rounds=rounds, is_encrypted=False, out=stego, layout=layout, workers=workers))
+        extract_seconds, (message, _) = best_of(repeat, lambda: MultiLayerLSB.extract_data(
+            stego, is_encrypted=False, workers=workers))
+        if reference is None:
+            reference = stego.copy()
+            baseline = (embed_seconds, extract_seconds)
+        identical = np.array_equal(stego, reference) and message.startswith(payload)
+        rows.append({'megapixels': cover.shape[0] * cover.shape[1] / 1e6, 'layout': layout, 'rounds': rounds,
+                     'workers': workers, 'embed_seconds': embed_seconds, 'extract_seconds': extract_seconds,
+                     'embed_speedup': baseline[0] / embed_seconds, 'extract_speedup': baseline[1] / extract_seconds,
+                     'identical': identical})
+    return rows
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cpus} | ({8} if cpus >= 8 else set()))
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[12, 50])
+    parser.add_argument('--workers', type=int, nargs='+', default=default_workers,
+                        help='Worker counts; the first is the baseline for speedup and output comparison.')
+    parser.add_argument('--layouts', nargs='+', default=list(MultiLayerLSB.LAYOUTS), choices=MultiLayerLSB.LAYOUTS)
+    parser.add_argument('--rounds', type=int, default=8)
+    parser.add_argument('--fill', type=float, default=0.9, help='Fraction of the capacity the payload uses.')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Write all results to this file.')
+    args = parser.parse_args()
+
+    print(f"{cpus} CPUs")
+    print(f"{'MP':>6}{'layout':>8}{'workers':>9}{'embed s':>10}{'speedup':>9}{'extract s':>11}{'speedup':>9}  output")
+    results = []
+    for megapixels in args.megapixels:
+        cover = make_cover(megapixels)
+        for layout in args.layouts:
+            for row in bench(cover, layout, args.rounds, args.fill, args.workers, args.repeat):
+                results.append(row)
+                print(f"{row['megapixels']:>6.1f}{layout:>8}{row['workers']:>9}"
+                      f"{row['embed_seconds']:>10.3f}{row['embed_speedup']:>8.2f}x"
+                      f"{row['extract_seconds']:>11.3f}{row['extract_speedup']:>8.2f}x"
+                      f"  {'identical' if row['identical'] else 'FAIL'}")
+        del cover
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if not all(row['identical'] for row in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
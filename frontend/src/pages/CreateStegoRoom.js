@@ -2,6 +2,7 @@ import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { FiUpload, FiLock, FiDownload, FiArrowLeft, FiAlertTriangle, FiInfo} from 'react-icons/fi';
+import { useOperationProgress, describeProgress } from './useOperationProgress';
 import './CreateStegoRoom.css';
 
 function CreateStegoRoom() {
@@ -17,6 +18,7 @@ function CreateStegoRoom() {
   const [showModal, setShowModal] = useState(false);
   const [modalData, setModalData] = useState(null);
   const [newRoomId, setNewRoomId] = useState(null);
+  const { progress, start: startProgress, stop: stopProgress } = useOperationProgress();
   const navigate = useNavigate();
 
   const handleCoverChange = (e) => {
@@ -86,7 +88,10 @@ function CreateStegoRoom() {
     if (coverImage) formData.append('image', coverImage);
     if (messageFile) formData.append('message', messageFile);
     try {
-      const res = await axios.post('http://localhost:5000/api/create_stego_room', formData, { withCredentials: true });
+      const res = await axios.post('http://localhost:5000/api/create_stego_room', formData, {
+        withCredentials: true,
+        headers: { 'X-Operation-Id': startProgress() }
+      });
       setModalData({
         coverPreview,
         messagePreview,
@@ -101,6 +106,7 @@ function CreateStegoRoom() {
     } catch (err) {
       setError(err.response?.data?.error || 'Failed to create stego room');
     } finally {
+      stopProgress();
       setLoading(false);
     }
   };
@@ -359,7 +365,7 @@ function CreateStegoRoom() {
               </div>
             </div>
             <p className="loading-text">
-              {'Embedding message, please wait...'}
+              {describeProgress(progress, 'Embedding message, please wait...')}
             </p>
           </div>
         </div>
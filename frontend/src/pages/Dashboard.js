@@ -50,9 +50,8 @@ function Dashboard() {
     const normalized = room.cover_image.replace(/\\/g, '/');
     if (normalized.startsWith('data:image')) return normalized;
     if (normalized.match(/^[A-Za-z0-9+/=]+$/)) return `data:image/png;base64,${normalized}`;
-    if (normalized.startsWith('uploads/')) return `http://localhost:5000/${normalized}`;
-    if (!normalized.startsWith('http') && !normalized.startsWith('/uploads/')) return `http://localhost:5000/uploads/${normalized}`;
-    return normalized;
+    // Cards only need a thumbnail, not the full-resolution upload
+    return `http://localhost:5000/api/steg_rooms/${room.id}/preview/cover?size=thumb`;
   };
 
   const handleDelete = (room) => {
@@ -106,38 +106,36 @@ function MLSBDemo() {
         }
 
         try {
-            const response = await fetch('http://localhost:5000/api/mlsb/extract', {
+            // The payload comes back as the response body; nothing is stored on the server
+            const response = await fetch('http://localhost:5000/api/mlsb/extract/stream', {
                 method: 'POST',
                 body: formData
             });
-
-            const data = await response.json();
             if (!response.ok) {
+                const data = await response.json();
                 throw new Error(data.error || 'Failed to extract message');
             }
 
-            setExtractedMessage(data.message);
-            setExtractedMediaType(data.media_type);
+            const mediaType = response.headers.get('X-Media-Type');
+            const disposition = response.headers.get('Content-Disposition') || '';
+            const filename = (disposition.match(/filename="?([^";]+)"?/) || [])[1] || 'extracted_message.bin';
+            const blob = await response.blob();
 
-            // Create download link with correct extension based on media type
-            const extensionMap = {
-                'text': '.txt',
-                'image': '.png',
-                'audio': '.mp3'
-            };
-            const ext = extensionMap[data.media_type] || '.bin';
-            const filename = `extracted_message${ext}`;
+            if (mediaType === 'text') {
+                setExtractedMessage(await blob.text());
+            }
+            setExtractedMediaType(mediaType);
 
-            console.log(filename)
-            
             // Download the file
-            const downloadUrl = `http://localhost:5000/api/mlsb/download?path=${encodeURIComponent(data.output_path)}`;
+            const downloadUrl = URL.createObjectURL(blob);
             const element = document.createElement('a');
             element.href = downloadUrl;
             element.download = filename;
             document.body.appendChild(element);
             element.click();
             document.body.removeChild(element);
+            // Revoke once the browser has started the download
+            setTimeout(() => URL.revokeObjectURL(downloadUrl), 1000);
 
         } catch (err) {
             setError(err.message);
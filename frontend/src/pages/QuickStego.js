@@ -3,6 +3,7 @@ import { Container, Row, Col, Form, Alert } from 'react-bootstrap';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { FiArrowLeft, FiDownload } from 'react-icons/fi';
+import { useOperationProgress, describeProgress } from './useOperationProgress';
 import './QuickStego.css';
 
 function QuickStego() {
@@ -35,6 +36,9 @@ function QuickStego() {
     // setError
     const [error, setError] = useState(null);
 
+    // Server-sent progress of the running embed or extraction
+    const { progress, start: startProgress, stop: stopProgress } = useOperationProgress();
+
     // Embedding handlers
     const handleEmbedImageUpload = (e) => {
         const file = e.target.files[0];
@@ -115,7 +119,8 @@ function QuickStego() {
         try {
             const response = await axios.post('http://localhost:5000/api/mlsb/embed', formData, {
                 headers: {
-                    'Content-Type': 'multipart/form-data'
+                    'Content-Type': 'multipart/form-data',
+                    'X-Operation-Id': startProgress()
                 }
             });
             setStegoImage(response.data.stego_image);
@@ -131,6 +136,7 @@ function QuickStego() {
         } catch (err) {
             setEmbedError(err.response?.data?.error || 'An error occurred');
         } finally {
+            stopProgress();
             setEmbedLoading(false);
         }
     };
@@ -166,45 +172,47 @@ function QuickStego() {
         }
 
         try {
-            const response = await axios.post('http://localhost:5000/api/mlsb/extract', formData);
-            const data = response.data;
-            const downloadUrl = `http://localhost:5000/api/mlsb/download?path=${encodeURIComponent(data.output_path)}`;
-            const ext = data.media_type === 'text' ? '.txt' : data.media_type === 'image' ? '.png' : '.mp3';
-            
-            if (data.media_type === 'text') {
-                let textContent = '';
-                if (data.message) {
-                    textContent = typeof data.message === 'string' 
-                        ? data.message 
-                        : new TextDecoder().decode(new Uint8Array(data.message));
-                }
-                
+            // The payload comes back as the response body; nothing is stored on the server
+            const response = await axios.post('http://localhost:5000/api/mlsb/extract/stream', formData, {
+                responseType: 'blob',
+                headers: { 'X-Operation-Id': startProgress() }
+            });
+            const mediaType = response.headers['x-media-type'];
+            const disposition = response.headers['content-disposition'] || '';
+            const filename = (disposition.match(/filename="?([^";]+)"?/) || [])[1] || 'extracted_message.bin';
+            const downloadUrl = URL.createObjectURL(response.data);
+
+            if (mediaType === 'text') {
+                const textContent = await response.data.text();
                 setExtractedMessage({
                     type: 'text',
                     content: textContent || 'Text content extracted',
                     downloadUrl,
-                    filename: `extracted_message${ext}`
+                    filename
                 });
-            } else if (data.media_type === 'image') {
+            } else if (mediaType === 'image' || mediaType === 'audio') {
                 setExtractedMessage({
-                    type: 'image',
+                    type: mediaType,
                     content: downloadUrl,
                     downloadUrl,
-                    filename: `extracted_message${ext}`
-                });
-            } else if (data.media_type === 'audio') {
-                setExtractedMessage({
-                    type: 'audio',
-                    content: downloadUrl,
-                    downloadUrl,
-                    filename: `extracted_message${ext}`
+                    filename
                 });
             }
             setExtractSuccess('Message extracted successfully!');
         } catch (err) {
             console.error('Extraction error:', err);
-            setExtractError(err.response?.data?.error || 'Failed to extract message');
+            // Error bodies are JSON, but arrive as a Blob because of responseType
+            let message = 'Failed to extract message';
+            if (err.response?.data instanceof Blob) {
+                try {
+                    message = JSON.parse(await err.response.data.text()).error || message;
+                } catch (parseError) {
+                    // Keep the generic message
+                }
+            }
+            setExtractError(message);
         } finally {
+            stopProgress();
             setExtractLoading(false);
         }
     };
@@ -491,7 +499,7 @@ function QuickStego() {
                             </div>
                         </div>
                         <p className="loading-text">
-                            {extractLoading ? 'Extracting message, please wait...' : 'Embedding message, please wait...'}
+                            {describeProgress(progress, extractLoading ? 'Extracting message, please wait...' : 'Embedding message, please wait...')}
                         </p>
                     </div>
                 </div>
@@ -86,39 +86,37 @@ function StegoRoom() {
       formData.append('iv', iv);
     }
     try {
-      const response = await fetch('http://localhost:5000/api/mlsb/extract', {
+      // The payload comes back as the response body; nothing is stored on the server
+      const response = await fetch('http://localhost:5000/api/mlsb/extract/stream', {
         method: 'POST',
         body: formData
       });
-      const data = await response.json();
-      if (!response.ok) throw new Error(data.error || 'Failed to extract message');
-      
-      setMessage(data.message);
+      if (!response.ok) {
+        const data = await response.json();
+        throw new Error(data.error || 'Failed to extract message');
+      }
 
-      // Create preview based on media type
-      const downloadUrl = `http://localhost:5000/api/mlsb/download?path=${encodeURIComponent(data.output_path)}`;
-      const ext = data.media_type === 'text' ? '.txt' : data.media_type === 'image' ? '.png' : '.mp3';
-      
-      if (data.media_type === 'text') {
+      const mediaType = response.headers.get('X-Media-Type');
+      const disposition = response.headers.get('Content-Disposition') || '';
+      const filename = (disposition.match(/filename="?([^";]+)"?/) || [])[1] || 'extracted_message.bin';
+      const blob = await response.blob();
+      const downloadUrl = URL.createObjectURL(blob);
+
+      if (mediaType === 'text') {
+        const text = await blob.text();
+        setMessage(text);
         setMessagePreview({
           type: 'text',
-          content: typeof data.message === 'string' ? data.message : 'Text content extracted',
-          downloadUrl,
-          filename: `extracted_message${ext}`
-        });
-      } else if (data.media_type === 'image') {
-        setMessagePreview({
-          type: 'image',
-          content: downloadUrl,
+          content: text || 'Text content extracted',
           downloadUrl,
-          filename: `extracted_message${ext}`
+          filename
         });
-      } else if (data.media_type === 'audio') {
+      } else if (mediaType === 'image' || mediaType === 'audio') {
         setMessagePreview({
-          type: 'audio',
+          type: mediaType,
           content: downloadUrl,
           downloadUrl,
-          filename: `extracted_message${ext}`
+          filename
         });
       }
     } catch (err) {
@@ -166,6 +164,19 @@ function StegoRoom() {
     return normalizedPath;
   };
 
+  // Downscaled preview of the room's cover or stego; falls back to the original if it can't be served
+  const getPreviewSrc = (kind) => {
+    const img = kind === 'stego' ? room.stego_image : room.cover_image;
+    const src = getImageSrc(img);
+    if (!src || src.startsWith('data:')) return src;
+    return `http://localhost:5000/api/steg_rooms/${roomId}/preview/${kind}?size=view`;
+  };
+
+  const fallBackToOriginal = (img) => (e) => {
+    e.currentTarget.onerror = null;
+    e.currentTarget.src = getImageSrc(img);
+  };
+
   const preventImageInteraction = (e) => {
     e.preventDefault();
     e.stopPropagation();
@@ -530,7 +541,8 @@ function StegoRoom() {
                 <div className="image-comparison-before">
                   {getImageSrc(room.stego_image) && (
                     <img 
-                      src={getImageSrc(room.stego_image)} 
+                      src={getPreviewSrc('stego')} 
+                      onError={fallBackToOriginal(room.stego_image)}
                       alt="stego" 
                       className="protected-image"
                       onContextMenu={preventImageInteraction}
@@ -541,7 +553,7 @@ function StegoRoom() {
                 </div>
                 <div className="image-comparison-after">
                   {getImageSrc(room.cover_image) && (
-                    <img src={getImageSrc(room.cover_image)} alt="cover" />
+                    <img src={getPreviewSrc('cover')} onError={fallBackToOriginal(room.cover_image)} alt="cover" />
                   )}
                 </div>
                 <div 
@@ -0,0 +1,59 @@
+import { useCallback, useEffect, useRef, useState } from 'react';
+
+const STAGE_LABELS = {
+  queued: 'Waiting for the server',
+  compress: 'Compressing message',
+  encrypt: 'Encrypting message',
+  decode: 'Decoding image',
+  embed: 'Embedding message',
+  extract: 'Extracting message',
+  decrypt: 'Decrypting message',
+  decompress: 'Decompressing message',
+  encode: 'Encoding stego image',
+  metrics: 'Computing quality metrics'
+};
+
+function newOperationId() {
+  if (window.crypto?.randomUUID) return window.crypto.randomUUID();
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+}
+
+// Follows the server-sent progress events of one request at a time.
+// start() returns the id to send as the X-Operation-Id header; EventSource
+// reconnects by itself and resumes from the last event it saw.
+export function useOperationProgress() {
+  const [progress, setProgress] = useState(null);
+  const sourceRef = useRef(null);
+
+  const stop = useCallback(() => {
+    if (sourceRef.current) {
+      sourceRef.current.close();
+      sourceRef.current = null;
+    }
+    setProgress(null);
+  }, []);
+
+  const start = useCallback(() => {
+    stop();
+    const operationId = newOperationId();
+    const source = new EventSource(`http://localhost:5000/api/operations/${operationId}/events`, { withCredentials: true });
+    source.addEventListener('progress', (e) => setProgress(JSON.parse(e.data)));
+    source.addEventListener('done', () => source.close());
+    source.addEventListener('failed', () => source.close());
+    sourceRef.current = source;
+    return operationId;
+  }, [stop]);
+
+  useEffect(() => stop, [stop]);
+
+  return { progress, start, stop };
+}
+
+export function describeProgress(progress, fallback) {
+  if (!progress) return fallback;
+  const label = STAGE_LABELS[progress.stage] || fallback;
+  if (!progress.total) return `${label}...`;
+  const percent = Math.floor((100 * progress.done) / progress.total);
+  const plane = progress.plane !== null && progress.plane !== undefined ? `, bit plane ${progress.plane + 1}` : '';
+  return `${label}... ${percent}%${plane}`;
+}
@@ -0,0 +1,402 @@
+import os
+import shutil
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from .MultiLayerLSB import MultiLayerLSB
+except ImportError:
+    from MultiLayerLSB import MultiLayerLSB
+
+# Where a WAV file's PCM samples are, as read_wav_info reports it; frames count samples per channel
+WavInfo = namedtuple('WavInfo', ['channels', 'sample_rate', 'bits_per_sample', 'frames', 'data_offset',
+                                 'data_size'])
+
+
+class AudioLSB:
+    """
+    AudioLSB hides payloads in PCM WAV recordings with MultiLayerLSB's header, layouts and rounds.
+
+    Recordings are never loaded whole. The samples are memory-mapped with
+    np.memmap; an embed streams the cover to the stego file CHUNK_SAMPLES at a
+    time, modifying only the chunks the payload reaches, and an extract reads
+    only the samples holding the header and payload.
+
+    Each sample (channels interleaved, as stored) plays the part of one image
+    sample: its lowest byte takes the payload bits, and a recording of N
+    samples at R rounds holds what an image of N samples does. Rounds are
+    capped at a quarter of the sample's bits (max_rounds: 2 for 8-bit PCM, 4
+    for 16-bit, 6 for 24-bit, 8 for 32-bit), as more planes turn a quiet
+    recording into audible noise; the default, 'auto', uses the fewest the
+    payload needs. Chunks other than the data chunk are copied as they are.
+
+    Methods:
+        read_wav_info(wav_path):
+            Reads the format and the position of the samples from a WAV file's chunks.
+            Args:
+                wav_path (str): Path to the WAV file.
+            Returns:
+                WavInfo: channels, sample_rate, bits_per_sample, frames, data_offset, data_size.
+
+        sample_count(wav_path):
+            Number of samples (frames x channels) in a WAV file.
+            Returns:
+                int: Sample count.
+
+        max_rounds(wav_path):
+            Most rounds the recording's sample width allows.
+            Returns:
+                int: bits_per_sample // 4.
+
+        calculate_capacity(wav_path, rounds=None):
+            Maximum payload in bytes at the given rounds (default max_rounds), like MultiLayerLSB.calculate_capacity.
+            Returns:
+                int: Capacity in bytes.
+
+        embed_data(cover_path, stego_path, message, rounds='auto', termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, compression='none', message_type='text', file_extension=None, layout='plane', progress=None):
+            Embeds a message in a WAV recording and writes the stego WAV chunk by chunk.
+            Returns:
+                tuple: (key (bytes or None), iv (bytes or None))
+
+        embed_message(cover_path, stego_path, file_path, rounds='auto', termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, compression='none', layout='plane', progress=None):
+            Embeds a message file in a WAV recording.
+            Returns:
+                tuple: (stego_path (str), key (bytes or None), iv (bytes or None))
+
+        extract_data(stego_path, rounds='auto', key=None, iv=None, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, progress=None, max_length=None):
+            Extracts a message from a stego WAV recording.
+            Returns:
+                tuple: (message (bytes), media_type (str))
+
+        extract_message(stego_path, output_path=None, rounds='auto', key=None, iv=None, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, progress=None):
+            Extracts a message from a stego WAV recording and optionally saves it.
+            Returns:
+                tuple: (message (bytes), media_type (str))
+    """
+    # Samples per chunk read, modified and written at a time
+    CHUNK_SAMPLES = 1 << 20
+    # WAVE_FORMAT_PCM; WAVE_FORMAT_EXTENSIBLE files name their format in the first two bytes of the subformat
+    PCM_FORMAT = 1
+    EXTENSIBLE_FORMAT = 0xFFFE
+    COPY_BUFFER = 1024 * 1024
+
+    @staticmethod
+    def read_wav_info(wav_path):
+        """
+        Read the format and the position of the samples from a WAV file's chunks.
+        Args:
+            wav_path (str): Path to the WAV file.
+        Returns:
+            WavInfo: The format, the number of frames, and the offset and size of the samples in the file.
+        Raises:
+            ValueError: If the file isn't an integer PCM WAV file.
+        """
+        file_size = os.path.getsize(wav_path)
+        fmt = None
+        with open(wav_path, 'rb') as f:
+            riff, _, wave = struct.unpack('<4sI4s', f.read(12).ljust(12, b'\0'))
+            if riff != b'RIFF' or wave != b'WAVE':
+                raise ValueError("Not a RIFF WAVE file")
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    raise ValueError("WAV file has no data chunk")
+                chunk_id, size = struct.unpack('<4sI', chunk)
+                if chunk_id == b'data':
+                    break
+                if chunk_id == b'fmt ':
+                    fmt = f.read(size)
+                    f.seek(size & 1, os.SEEK_CUR)
+                else:
+                    # Chunks are padded to an even size
+                    f.seek(size + (size & 1), os.SEEK_CUR)
+            data_offset = f.tell()
+        if fmt is None or len(fmt) < 16:
+            raise ValueError("WAV file has no fmt chunk before its data")
+        format_tag, channels, sample_rate, _, block_align, bits = struct.unpack_from('<HHIIHH', fmt)
+        if format_tag == AudioLSB.EXTENSIBLE_FORMAT and len(fmt) >= 26:
+            format_tag = struct.unpack_from('<H', fmt, 24)[0]
+        if format_tag != AudioLSB.PCM_FORMAT:
+            raise ValueError("Only integer PCM WAV files are supported")
+        if bits not in (8, 16, 24, 32) or channels < 1 or block_align != channels * bits // 8:
+            raise ValueError(f"Unsupported PCM layout: {channels} channels of {bits} bits")
+        # Recorders that never patched the header write 0 or 0xFFFFFFFF; the file size is what counts
+        data_size = min(size, file_size - data_offset) if size else file_size - data_offset
+        return WavInfo(channels, sample_rate, bits, data_size // block_align, data_offset, data_size)
+
+    @staticmethod
+    def _samples(wav_path, info):
+        """The PCM samples as a read-only (samples, bytes per sample) uint8 memmap; column 0 is the low byte."""
+        width = info.bits_per_sample // 8
+        count = info.frames * info.channels
+        if count == 0:
+            # np.memmap can't map an empty range
+            return np.empty((0, width), dtype=np.uint8)
+        return np.memmap(wav_path, dtype=np.uint8, mode='r', offset=info.data_offset, shape=(count, width))
+
+    @staticmethod
+    def sample_count(wav_path):
+        """Number of samples (frames x channels) in a WAV file, read from its header."""
+        info = AudioLSB.read_wav_info(wav_path)
+        return info.frames * info.channels
+
+    @staticmethod
+    def _max_rounds(info):
+        return info.bits_per_sample // 4
+
+    @staticmethod
+    def max_rounds(wav_path):
+        """Most rounds a recording takes: a quarter of its bits per sample, so 2 for 8-bit PCM."""
+        return AudioLSB._max_rounds(AudioLSB.read_wav_info(wav_path))
+
+    @staticmethod
+    def calculate_capacity(wav_path, rounds=None):
+        """Maximum payload in bytes: rounds (default max_rounds) bits per sample, less the 35-bit header."""
+        info = AudioLSB.read_wav_info(wav_path)
+        rounds = AudioLSB._max_rounds(info) if rounds is None else min(rounds, AudioLSB._max_rounds(info))
+        return max(0, (info.frames * info.channels * rounds - 35) // 8)
+
+    @staticmethod
+    def _stream_bits(header_bits, payload, start, stop):
+        """Bits [start, stop) of the embedded stream: the header bits, then the bits of the payload bytes."""
+        head = header_bits[start:stop]
+        a = max(start, len(header_bits)) - len(header_bits)
+        b = stop - len(header_bits)
+        if b <= a:
+            return head
+        bits = np.unpackbits(payload[a // 8:-(-b // 8)])[a % 8:a % 8 + b - a]
+        return np.concatenate((head, bits)) if len(head) else bits
+
+    @staticmethod
+    def _embedded_samples(samples, total_bits, layout, rounds):
+        """Number of leading samples an embedded stream of `total_bits` bits modifies."""
+        if layout == 'pixel':
+            preamble = MultiLayerLSB.PREAMBLE_BITS
+            return min(samples, preamble + -(-(total_bits - preamble) // rounds))
+        return samples if total_bits > samples else total_bits
+
+    @staticmethod
+    def _embed_chunk(low, start, samples, header_bits, payload, total_bits, layout, rounds):
+        """
+        Write the stream bits that belong to samples [start, start + low.size) of a recording of `samples`
+        samples into their low bytes, in the order embed_data lays them out in an image.
+        """
+        stop = start + low.size
+        if layout == 'pixel':
+            preamble = MultiLayerLSB.PREAMBLE_BITS
+            if start < preamble:
+                MultiLayerLSB._write_bits(low, AudioLSB._stream_bits(header_bits, payload, start,
+                                                                     min(stop, preamble)))
+            first = max(start, preamble)
+            body_start = preamble + (first - preamble) * rounds
+            body_stop = min(preamble + (stop - preamble) * rounds, total_bits)
+            if body_stop > body_start:
+                MultiLayerLSB._write_pixel_bits(low, AudioLSB._stream_bits(header_bits, payload, body_start,
+                                                                           body_stop), first - start, rounds)
+            return
+        for plane in range(rounds):
+            # Plane p holds stream bits p * samples onwards; within the chunk it starts at sample 0
+            bit_start = plane * samples + start
+            bit_stop = min(plane * samples + stop, total_bits)
+            if bit_stop <= bit_start:
+                break
+            MultiLayerLSB._write_bits(low, AudioLSB._stream_bits(header_bits, payload, bit_start, bit_stop),
+                                      start=plane * low.size)
+
+    @staticmethod
+    def _copy_bytes(src, dst, count=None):
+        """Copy `count` bytes (or the rest) from one binary file to another."""
+        if count is None:
+            shutil.copyfileobj(src, dst, AudioLSB.COPY_BUFFER)
+            return
+        while count > 0:
+            chunk = src.read(min(count, AudioLSB.COPY_BUFFER))
+            if not chunk:
+                raise ValueError("WAV file is shorter than its header says")
+            dst.write(chunk)
+            count -= len(chunk)
+
+    @staticmethod
+    def embed_data(cover_path, stego_path, message, rounds='auto', termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, compression='none', message_type='text', file_extension=None, layout='plane', progress=None):
+        """
+        Embed a message in a WAV recording, writing the stego WAV chunk by chunk.
+        Args:
+            cover_path (str): Path to the cover WAV file; it is memory-mapped, not loaded.
+            stego_path (str): Path to write the stego WAV file to; must differ from cover_path.
+            message (bytes-like): Message payload.
+            rounds (int or str, optional): Number of LSB layers to use, from 1 to max_rounds (2 for 8-bit
+                PCM, 4 for 16-bit, 6 for 24-bit, 8 for 32-bit), or 'auto' for the fewest layers the message
+                needs. Default is 'auto'.
+            termination_sequence (bytes, optional): Sequence to mark end of message. Default is b'<<END_OF_MESSAGE>>'.
+            is_encrypted (bool, optional): Whether to encrypt the message with AES. Default is True.
+            compression (str, optional): Codec applied before encryption. Default is 'none'.
+            message_type (str, optional): 'text', 'audio' or 'image'. Default is 'text'.
+            file_extension (str, optional): Extension of the original message file, used by 'auto' compression.
+            layout (str, optional): 'plane' or 'pixel', as for MultiLayerLSB.embed_data. Default is 'plane'.
+            progress (callable, optional): progress(stage, done, total, plane) callback; stages are 'compress',
+                'encrypt' and 'embed', for which `done` and `total` count samples written to the stego file.
+        Returns:
+            tuple: (key (bytes or None), iv (bytes or None))
+        """
+        if rounds != 'auto' and not 1 <= rounds <= 8:
+            raise ValueError("Number of rounds must be between 1 and 8")
+        if layout not in MultiLayerLSB.LAYOUTS:
+            raise ValueError(f"Unsupported layout: {layout}")
+        if os.path.exists(stego_path) and os.path.samefile(cover_path, stego_path):
+            raise ValueError("The stego file must not overwrite the cover")
+        info = AudioLSB.read_wav_info(cover_path)
+        samples = info.frames * info.channels
+        max_rounds = AudioLSB._max_rounds(info)
+        if rounds != 'auto' and rounds > max_rounds:
+            raise ValueError(f"{info.bits_per_sample}-bit PCM takes at most {max_rounds} rounds")
+
+        codec, payload, key, iv = MultiLayerLSB._seal_payload(message, termination_sequence, is_encrypted,
+                                                              compression, file_extension, progress)
+        payload = np.frombuffer(payload, dtype=np.uint8)
+        bit_length = payload.size * 8
+        if rounds == 'auto':
+            header_length = len(MultiLayerLSB.build_header(message_type, 0, codec, layout))
+            try:
+                rounds = MultiLayerLSB._minimum_rounds(samples, header_length + bit_length, layout)
+            except ValueError:
+                raise ValueError("Message too long for cover audio capacity")
+            if rounds > max_rounds:
+                raise ValueError("Message too long for cover audio capacity")
+        header = MultiLayerLSB.build_header(message_type, bit_length, codec, layout, rounds)
+        header_bits = np.frombuffer(header.encode('ascii'), dtype=np.uint8) - ord('0')
+        total_bits = len(header_bits) + bit_length
+        preamble = MultiLayerLSB.PREAMBLE_BITS
+        if layout == 'pixel':
+            too_long = samples < preamble or preamble + -(-(total_bits - preamble) // rounds) > samples
+        else:
+            too_long = total_bits > samples * rounds
+        if too_long:
+            raise ValueError("Message too long for cover audio capacity")
+
+        cover = AudioLSB._samples(cover_path, info)
+        embedded = AudioLSB._embedded_samples(samples, total_bits, layout, rounds)
+        width = info.bits_per_sample // 8
+        chunk_samples = AudioLSB.CHUNK_SAMPLES
+        with open(cover_path, 'rb') as src, open(stego_path, 'wb') as dst:
+            # Everything up to the samples, e.g. the fmt and LIST chunks, is kept as it is
+            AudioLSB._copy_bytes(src, dst, info.data_offset)
+            for start in range(0, embedded, chunk_samples):
+                chunk = np.array(cover[start:min(start + chunk_samples, embedded)])
+                low = np.ascontiguousarray(chunk[:, 0])
+                AudioLSB._embed_chunk(low, start, samples, header_bits, payload, total_bits, layout, rounds)
+                chunk[:, 0] = low
+                dst.write(chunk)
+                if progress:
+                    progress('embed', start + len(chunk), samples, None)
+            # The samples the payload doesn't reach, then the pad byte and any chunks after the data
+            src.seek(info.data_offset + embedded * width)
+            AudioLSB._copy_bytes(src, dst)
+        if progress:
+            progress('embed', samples, samples, None)
+        return key, iv
+
+    @staticmethod
+    def embed_message(cover_path, stego_path, file_path, rounds='auto', termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, compression='none', layout='plane', progress=None):
+        """
+        Embed a message file in a WAV recording; see embed_data.
+        Returns:
+            tuple: (stego_path (str), key (bytes or None), iv (bytes or None))
+        """
+        with open(file_path, 'rb') as f:
+            message_data = f.read()
+        _, original_ext = os.path.splitext(file_path)
+        key, iv = AudioLSB.embed_data(
+            cover_path, stego_path, message_data, rounds=rounds, termination_sequence=termination_sequence,
+            is_encrypted=is_encrypted, compression=compression,
+            message_type=MultiLayerLSB.get_message_type(file_path), file_extension=original_ext, layout=layout,
+            progress=progress)
+        return stego_path, key, iv
+
+    @staticmethod
+    def _read_stream(samples, count_samples, layout, rounds, start, count):
+        """Read stream bits [start, start + count) from a (samples, width) memmap; the payload follows the header."""
+        if layout == 'pixel':
+            preamble = MultiLayerLSB.PREAMBLE_BITS
+            body = start - preamble
+            first = preamble + body // rounds
+            last = min(preamble + -(-(body + count) // rounds), count_samples)
+            offset = body - (first - preamble) * rounds
+            low = np.ascontiguousarray(samples[first:last, 0])
+            return MultiLayerLSB._read_pixel_bits(low, 0, offset + count, rounds)[offset:]
+        bits = np.empty(count, dtype=np.uint8)
+        for plane, offset, take, pos in MultiLayerLSB._plane_runs(count_samples, start, count):
+            target = bits[pos:pos + take]
+            np.right_shift(samples[offset:offset + take, 0], plane, out=target)
+            target &= 1
+        return bits
+
+    @staticmethod
+    def extract_data(stego_path, rounds='auto', key=None, iv=None, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, progress=None, max_length=None):
+        """
+        Extract a message from a stego WAV recording, reading only the samples that hold it.
+        Args:
+            stego_path (str): Path to the stego WAV file; it is memory-mapped, not loaded.
+            rounds (int or str, optional): Number of LSB layers used. 'auto' (the default) reads up to
+                max_rounds of the recording. Pixel-major headers record their own rounds.
+            key (bytes): AES key for decryption (if encrypted).
+            iv (bytes): Initialization vector for decryption (if encrypted).
+            termination_sequence (bytes, optional): Sequence marking end of message. Default is b'<<END_OF_MESSAGE>>'.
+            is_encrypted (bool, optional): Whether the embedded message is encrypted. Default is True.
+            progress (callable, optional): progress(stage, done, total, plane) callback; stages are 'extract',
+                for which `done` and `total` count payload bits, 'decrypt' and 'decompress'.
+            max_length (int, optional): Largest decompressed payload accepted, in bytes; capped, as for
+                MultiLayerLSB.extract_data, at MAX_EXPANSION times the recording's capacity.
+        Returns:
+            tuple: (message (bytes), media_type (str))
+        """
+        info = AudioLSB.read_wav_info(stego_path)
+        stego = AudioLSB._samples(stego_path, info)
+        samples = len(stego)
+        # The header sits in the first samples whatever the layout, as in an image of as many samples
+        prefix = np.ascontiguousarray(stego[:min(samples, AudioLSB.CHUNK_SAMPLES), 0])
+        message_type, codec, header_length, message_length, layout, layout_rounds, frames = \
+            MultiLayerLSB._read_header(prefix)
+        if frames is not None:
+            raise ValueError("Unsupported header flags in extracted data.")
+        preamble = MultiLayerLSB.PREAMBLE_BITS
+        if layout == 'pixel':
+            rounds = layout_rounds
+            available = (samples - preamble) * rounds - (header_length - preamble)
+        else:
+            if rounds == 'auto':
+                rounds = AudioLSB._max_rounds(info)
+            available = samples * rounds - header_length
+        message_length = max(0, min(message_length, available))
+
+        # Read the payload a block of bits at a time straight into its bytes
+        message = np.empty(-(-message_length // 8), dtype=np.uint8)
+        block = AudioLSB.CHUNK_SAMPLES
+        if progress:
+            progress('extract', 0, message_length, None)
+        for start in range(0, message_length, block):
+            count = min(block, message_length - start)
+            bits = AudioLSB._read_stream(stego, samples, layout, rounds, header_length + start, count)
+            message[start // 8:start // 8 + -(-count // 8)] = np.packbits(bits)
+            if progress:
+                progress('extract', start + count, message_length, None)
+        return MultiLayerLSB._open_payload(message.tobytes(), message_type, codec, key, iv, termination_sequence,
+                                           is_encrypted, progress,
+                                           MultiLayerLSB.decompression_limit(samples, max_length))
+
+    @staticmethod
+    def extract_message(stego_path, output_path=None, rounds='auto', key=None, iv=None, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, progress=None):
+        """
+        Extract a message from a stego WAV recording and optionally save it; see extract_data.
+        Returns:
+            tuple: (message (bytes), media_type (str))
+        """
+        original_message, message_type = AudioLSB.extract_data(
+            stego_path, rounds=rounds, key=key, iv=iv, termination_sequence=termination_sequence,
+            is_encrypted=is_encrypted, progress=progress)
+        if output_path:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, 'wb') as f:
+                f.write(original_message)
+        return original_message, message_type
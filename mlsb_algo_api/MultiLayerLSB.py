@@ -1,11 +1,15 @@
 import numpy as np
 from PIL import Image
+import io
 import os
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.primitives import padding
-from cryptography.hazmat.backends import default_backend
 import secrets
-from scipy.ndimage import gaussian_filter
+import threading
+import zlib
+import lzma
+import bz2
+import functools
+import struct
+from concurrent.futures import ThreadPoolExecutor
 
 
 class MultiLayerLSB:
@@ -43,6 +47,29 @@ class MultiLayerLSB:
             Returns:
                 str or bytes: The extracted message (text or binary).
 
+        compress_payload(data, compression='auto', file_extension=None):
+            Compresses a payload with the best stdlib codec (zlib, lzma or bz2).
+            Args:
+                data (bytes): Payload to compress.
+                compression (str, optional): 'auto', 'none', 'zlib', 'lzma' or 'bz2'. Default is 'auto'.
+                file_extension (str, optional): Extension of the original file, used to skip already-compressed media.
+            Returns:
+                tuple: (codec (str), compressed data (bytes))
+
+        estimate_compression(data, compression='auto', file_extension=None):
+            Codec compress_payload would pick and its compression ratio, measured on a sample of the payload.
+            Returns:
+                tuple: (codec (str), ratio (float))
+
+        decompress_payload(data, codec, max_length=None):
+            Reverses compress_payload, refusing output over max_length bytes with a ValueError.
+            Args:
+                data (bytes): Compressed payload.
+                codec (str): Codec recorded in the header.
+                max_length (int, optional): Largest output accepted, in bytes.
+            Returns:
+                bytes: Decompressed payload.
+
         aes_encrypt(data):
             Encrypts data using AES-CBC with PKCS7 padding.
             Args:
@@ -59,19 +86,65 @@ class MultiLayerLSB:
             Returns:
                 bytes: Decrypted data.
 
-        embed_message(cover_image_path, stego_image_path, file_path, rounds=8, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True):
-            Embeds a message into an image using multi-layer LSB, with optional AES encryption.
+        embed_message(cover_image_path, stego_image_path, file_path, rounds=8, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, compression='none', layout='plane', workers=1, progress=None):
+            Embeds a message into an image using multi-layer LSB, with optional compression and AES encryption.
             Args:
                 cover_image_path (str): Path to the cover image.
                 stego_image_path (str): Path to save the stego image.
                 file_path (str): Path to the message file.
-                rounds (int, optional): Number of LSB layers to use (1-8). Default is 8.
+                rounds (int or str, optional): Number of LSB layers to use (1-8), or 'auto' for the fewest that fit. Default is 8.
                 termination_sequence (bytes, optional): Sequence to mark end of message. Default is b'<<END_OF_MESSAGE>>'.
                 is_encrypted (bool, optional): Whether to encrypt the message with AES. Default is True.
+                compression (str, optional): Compression codec applied before encryption ('none', 'auto', 'zlib', 'lzma', 'bz2'). Default is 'none'.
+                layout (str, optional): 'plane' (bit 0 of every sample first) or 'pixel' (`rounds` bits per sample,
+                    payload in the first rows). Recorded in the header. Default is 'plane'.
+                workers (int or str, optional): Threads embedding disjoint tiles of the cover, or 'auto' for one
+                    per CPU. Output is identical for any value. Default is 1.
+                progress (callable, optional): Called as progress(stage, done, total, plane) as each stage starts
+                    and as bits are written. Default is None.
             Returns:
                 tuple: (stego_image_path (str), key (bytes or None), iv (bytes or None))
 
-        extract_message(stego_image_path, output_path=None, rounds=8, key=None, iv=None, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True):
+        load_image(source, samples=None):
+            Decodes an image from a path, file-like object or buffer; arrays and SharedImage are passed through.
+            With `samples`, non-interlaced PNGs decode only the rows holding that many samples.
+            Args:
+                source (str, file-like, bytes-like or array-like): Image to load.
+            Returns:
+                np.ndarray: Pixel array in the image's own layout: (H, W) for L and 16-bit grayscale,
+                    (H, W, C) for LA, RGB and RGBA; uint16 for 16-bit images, else uint8.
+
+        image_mode(image):
+            Decoded layout of an image without decoding paths or buffers.
+            Returns:
+                dict: 'mode', 'channels' and 'bit_depth'.
+
+        save_image(image_array, target):
+            Encodes a pixel array as PNG to a path or file-like object.
+
+        frame_count(image):
+            Number of frames (animated GIF/PNG/WebP, multi-page TIFF) without decoding; 4D arrays are frame stacks.
+
+        load_frames(source, count=None):
+            Decodes the first `count` (default all) frames of a multi-frame image.
+            Returns:
+                np.ndarray: Frame stack of shape (F, H, W, 3) or (F, H, W, 1).
+
+        save_frames(frames, target, format=None):
+            Encodes a frame stack losslessly as an animated PNG, or a multi-page TIFF.
+
+        embed_data(cover, message, rounds=8, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, compression='none', message_type='text', file_extension=None, out=None, layout='plane', workers=1, progress=None):
+            In-memory counterpart of embed_message taking a decoded cover (or buffer) and message bytes.
+            Returns:
+                tuple: (stego (np.ndarray or out), key (bytes or None), iv (bytes or None))
+
+        extract_data(stego, rounds=8, key=None, iv=None, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, workers=1, progress=None, max_length=None):
+            In-memory counterpart of extract_message. Pixel-major payloads are read from the first rows only.
+            Compressed payloads decompress to at most decompression_limit(samples, max_length) bytes.
+            Returns:
+                tuple: (message (bytes), media_type (str))
+
+        extract_message(stego_image_path, output_path=None, rounds=8, key=None, iv=None, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, workers=1, progress=None):
             Extracts a message from a stego image, with optional AES decryption.
             Args:
                 stego_image_path (str): Path to the stego image.
@@ -81,11 +154,12 @@ class MultiLayerLSB:
                 iv (bytes): Initialization vector for decryption (if encrypted).
                 termination_sequence (bytes, optional): Sequence marking end of message. Default is b'<<END_OF_MESSAGE>>'.
                 is_encrypted (bool, optional): Whether the embedded message is encrypted. Default is True.
+                workers (int or str, optional): Threads reading tiles of the image in parallel, or 'auto'. Default is 1.
             Returns:
                 tuple: (message (bytes), media_type (str))
 
         calculate_psnr(original_path, stego_path):
-            Calculates the PSNR between the original and stego images.
+            Calculates the PSNR between the original and stego images, against the peak of their bit depth.
             Args:
                 original_path (str): Path to the original image.
                 stego_path (str): Path to the stego image.
@@ -116,15 +190,58 @@ class MultiLayerLSB:
             Returns:
                 int: Maximum capacity in bytes.
 
-        calculate_bpp(message_file, image_path, rounds=8):
+        calculate_bpp(message_file, image_path, rounds=8, compression='none', file_extension=None, bit_length=None):
             Calculates the bits per pixel (BPP) for the embedding.
             Args:
                 message_file (str): Path to the message file.
                 image_path (str): Path to the image.
                 rounds (int, optional): Number of LSB layers. Default is 8.
+                compression (str, optional): Compression codec used for the embedding. Default is 'none'.
+                bit_length (int, optional): Bits actually embedded, header included (e.g. header_length +
+                    message_length from read_header); the message is then neither read nor compressed.
             Returns:
                 float: Bits per pixel value.
 
+        embedded_bit_length(message, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, compression='none', message_type='text', file_extension=None, layout='plane'):
+            Number of bits embed_data writes for a message, header included, without embedding it.
+            Returns:
+                int: Embedded length in bits.
+
+        sample_count(image):
+            Number of samples (pixels x channels) in an image; paths and buffers are not decoded.
+            Returns:
+                int: Sample count.
+
+        minimum_rounds(cover, bit_length, layout='plane'):
+            Fewest LSB layers that hold `bit_length` bits in the cover; what rounds='auto' uses.
+            Returns:
+                int: Rounds between 1 and 8.
+
+        read_header(stego):
+            Parses a stego image's header, decoding only the rows that hold it where the format allows.
+            Returns:
+                tuple: (message_type, codec, header_length, message_length, layout, rounds, frames)
+
+        rounds_used(stego):
+            Number of LSB layers a stego image's payload occupies, read from its header.
+            Returns:
+                int: Rounds between 1 and 8.
+
+        stego_delta(cover, stego):
+            Encodes a stego image compactly as the bit planes it changed in its cover.
+            Returns:
+                bytes: The delta.
+
+        apply_delta(cover, delta, out=None):
+            Rebuilds the stego image from its cover and stego_delta's output.
+            Returns:
+                np.ndarray: The stego image.
+
+        rounds_sweep(cover, bit_length=0, layout='plane'):
+            Predicts capacity, MSE and PSNR for rounds 1-8 from the cover's histogram, without embedding.
+            Returns:
+                list: One dict per rounds value.
+
         get_media_type(stego_image_path):
             Extracts the media type from the stego image's metadata.
             Args:
@@ -132,6 +249,50 @@ class MultiLayerLSB:
             Returns:
                 str: The media type ('text', 'image', or 'audio').
     """
+    # 3-bit message type codes. Codes with the high bit set are followed by an
+    # 8-bit flags field before the length: bits 0-1 compression codec, bit 2
+    # pixel-major layout, bits 3-5 rounds - 1 (pixel-major only), bit 6 payload
+    # striped across frames, in which case a 16-bit frame count precedes the length.
+    TYPE_CODES = {'text': '001', 'audio': '010', 'image': '011'}
+    EXTENDED_TYPE_CODES = {'text': '101', 'audio': '110', 'image': '111'}
+    TYPE_NAMES = {'001': 'text', '010': 'audio', '011': 'image',
+                  '101': 'text', '110': 'audio', '111': 'image'}
+    CODECS = {'none': 0, 'zlib': 1, 'lzma': 2, 'bz2': 3}
+    CODEC_NAMES = {v: k for k, v in CODECS.items()}
+    # Media that is already entropy coded; compressing it again only costs time.
+    COMPRESSED_EXTENSIONS = {'.mp3', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.ogg',
+                             '.m4a', '.aac', '.flac', '.mp4', '.zip', '.gz', '.bz2', '.xz', '.7z'}
+    COMPRESSION_SAMPLE_SIZE = 64 * 1024
+    # Extracted payloads may decompress to at most this many times the carrier's capacity in
+    # bytes (its sample count at 8 rounds); anything larger is refused as a decompression bomb
+    MAX_EXPANSION = 32
+    # Worst-case output per compressed byte of each codec, reached by long runs of one byte value
+    CODEC_MAX_EXPANSION = {'none': 1, 'zlib': 1032, 'lzma': 7000, 'bz2': 1300000}
+    # Embedding layouts. 'plane' fills bit 0 of every sample, then bit 1, and so on;
+    # 'pixel' packs `rounds` low bits into each sample, so the payload is a prefix of rows.
+    LAYOUTS = ('plane', 'pixel')
+    PIXEL_MAJOR_FLAG = 0b100
+    FRAME_STRIPED_FLAG = 0b1000000
+    # Modes decoded as they are: (channels, dtype). Palette images expand losslessly to RGB, or RGBA
+    # when they have transparency; CONVERTED_MODES lists the others that aren't decoded as RGB.
+    NATIVE_MODES = {'RGB': (3, np.uint8), 'RGBA': (4, np.uint8), 'L': (1, np.uint8), 'LA': (2, np.uint8),
+                    'I;16': (1, np.uint16), 'I;16L': (1, np.uint16), 'I;16B': (1, np.uint16)}
+    CONVERTED_MODES = {'1': 'L', 'I': 'L', 'F': 'L', 'La': 'LA', 'PA': 'RGBA', 'RGBa': 'RGBA'}
+    # Type code and flags; always stored in bit 0 of the first samples so the layout can be read first
+    PREAMBLE_BITS = 11
+    # With workers > 1 the image is split into tiles of at least this many samples, one per thread
+    MIN_TILE_SAMPLES = 1 << 20
+    # Tiles per plane (or per pixel-major payload) when progress is reported, so updates arrive steadily
+    PROGRESS_STEPS = 16
+    # Samples per block when metrics difference two images
+    METRIC_BLOCK_SAMPLES = 1 << 20
+    # stego_delta format: magic, dtype, ndim, shape, plane count, CRC-32 of the stego samples,
+    # then the changed prefix length of every plane and the zlib-compressed packed plane bits
+    DELTA_MAGIC = b'MLSBDLT1'
+    DELTA_DTYPES = {'B': np.dtype(np.uint8), 'H': np.dtype('<u2')}
+    _tile_executor = None
+    _tile_pool_lock = threading.Lock()
+
     def __init__(self, cover_image_path, stego_image_path):
         self.cover_image_path = cover_image_path
         self.stego_image_path = stego_image_path
@@ -152,61 +313,280 @@ class MultiLayerLSB:
             f.write(byte_data)
 
     @staticmethod
-    def message_to_binary(file_path):
-        """Convert a file (text, audio, image, or TIFF) to binary with metadata."""
+    def get_message_type(file_path):
+        """Return the message type ('text', 'audio' or 'image') for a file based on its extension."""
         _, file_extension = os.path.splitext(file_path)
         file_extension = file_extension.lower()
-
         if file_extension == '.txt':
-            message_type = 'text'
-            with open(file_path, 'rb') as f:
-                message = f.read()
-            binary_message = ''.join(format(b, '08b') for b in message)
-        elif file_extension in ['.mp3', '.wav']:
-            message_type = 'audio'
-            binary_message = MultiLayerLSB.file_to_binary(file_path)
+            return 'text'
         elif file_extension in ['.png', '.tiff', '.jpg', '.jpeg', '.bmp']:
-            message_type = 'image'
-            binary_message = MultiLayerLSB.file_to_binary(file_path)
-        else:
-            message_type = 'audio'
-            binary_message = MultiLayerLSB.file_to_binary(file_path)
+            return 'image'
+        return 'audio'
 
-        type_map = {'text': '001', 'audio': '010', 'image': '011'}
-        message_type_binary = type_map[message_type]
-        message_length_binary = format(len(binary_message), '032b')
-        return message_type_binary + message_length_binary + binary_message
+    @staticmethod
+    def message_to_binary(file_path):
+        """Convert a file (text, audio, image, or TIFF) to binary with metadata."""
+        message_type = MultiLayerLSB.get_message_type(file_path)
+        binary_message = MultiLayerLSB.file_to_binary(file_path)
+        return MultiLayerLSB.build_header(message_type, len(binary_message)) + binary_message
 
     @staticmethod
-    def binary_to_message(binary_data, output_path=None):
-        message_type_binary = binary_data[:3]
-        message_length_binary = binary_data[3:35]
-        message_length = int(message_length_binary, 2)
-        message_binary = binary_data[35:35 + message_length]
+    def build_header(message_type, message_length, codec='none', layout='plane', rounds=8, frames=None):
+        """
+        Builds the binary header placed in front of the payload bits.
+        Args:
+            message_type (str): 'text', 'audio' or 'image'.
+            message_length (int): Payload length in bits.
+            codec (str, optional): Compression codec of the payload. Default is 'none'.
+            layout (str, optional): 'plane' or 'pixel'. Default is 'plane'.
+            rounds (int, optional): LSB layers per sample, recorded for the pixel layout. Default is 8.
+            frames (int, optional): Number of frames the payload is striped across, for multi-frame covers.
+        Returns:
+            str: Binary header string.
+        """
+        if layout not in MultiLayerLSB.LAYOUTS:
+            raise ValueError(f"Unsupported layout: {layout}")
+        flags = MultiLayerLSB.CODECS[codec]
+        if layout == 'pixel':
+            flags |= MultiLayerLSB.PIXEL_MAJOR_FLAG | (rounds - 1) << 3
+        frame_field = ''
+        if frames is not None:
+            if not 1 <= frames < 1 << 16:
+                raise ValueError("Payload can be striped across at most 65535 frames")
+            flags |= MultiLayerLSB.FRAME_STRIPED_FLAG
+            frame_field = format(frames, '016b')
+        if flags == 0:
+            # Uncompressed plane-major payloads keep the original 35-bit header
+            return MultiLayerLSB.TYPE_CODES[message_type] + format(message_length, '032b')
+        return (MultiLayerLSB.EXTENDED_TYPE_CODES[message_type] + format(flags, '08b') + frame_field
+                + format(message_length, '032b'))
 
-        type_map = {'001': 'text', '010': 'audio', '011': 'image'}
-        message_type = type_map.get(message_type_binary, None)
+    @staticmethod
+    def parse_layout(binary_data):
+        """
+        Reads the embedding layout from the start of a header.
+        Args:
+            binary_data (str): At least the first PREAMBLE_BITS header bits (3 suffice for legacy headers).
+        Returns:
+            tuple or None: (layout, rounds), with rounds None for the plane layout, or None if more bits are needed.
+        """
+        if len(binary_data) < 3:
+            return None
+        if binary_data[0] == '0':
+            return 'plane', None
+        if len(binary_data) < MultiLayerLSB.PREAMBLE_BITS:
+            return None
+        flags = int(binary_data[3:11], 2)
+        if flags & MultiLayerLSB.PIXEL_MAJOR_FLAG:
+            return 'pixel', (flags >> 3 & 0b111) + 1
+        return 'plane', None
+
+    @staticmethod
+    def parse_header(binary_data):
+        """
+        Parses the header at the start of a binary string.
+        Args:
+            binary_data (str): Header bits in order, starting at the first embedded bit.
+        Returns:
+            tuple or None: (message_type, codec, header_length, message_length), or None if more bits are needed.
+                For frame-striped payloads message_length is the total over all frames (see parse_frames).
+        """
+        if len(binary_data) < 3:
+            return None
+        type_code = binary_data[:3]
+        message_type = MultiLayerLSB.TYPE_NAMES.get(type_code)
         if not message_type:
             raise ValueError("Unsupported message type in extracted data.")
 
-        if message_type == 'text':
-            # For encrypted text, keep as bytes
-            if output_path:
-                os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                with open(output_path, 'wb') as f:
-                    f.write(bytes(int(message_binary[i:i+8], 2) for i in range(0, len(message_binary), 8)))
-            return bytes(int(message_binary[i:i+8], 2) for i in range(0, len(message_binary), 8))
-        elif message_type in ['audio', 'image']:
-            if output_path:
-                os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                with open(output_path, 'wb') as f:
-                    f.write(bytes(int(message_binary[i:i+8], 2) for i in range(0, len(message_binary), 8)))
-            return bytes(int(message_binary[i:i+8], 2) for i in range(0, len(message_binary), 8))
+        codec = 'none'
+        header_length = 35
+        if type_code[0] == '1':
+            header_length = 43
+            if len(binary_data) < 11:
+                return None
+            flags = int(binary_data[3:11], 2)
+            if flags >> 7 or (flags >> 3 & 0b111 and not flags & MultiLayerLSB.PIXEL_MAJOR_FLAG):
+                raise ValueError("Unsupported header flags in extracted data.")
+            codec = MultiLayerLSB.CODEC_NAMES[flags & 0b11]
+            if flags & MultiLayerLSB.FRAME_STRIPED_FLAG:
+                header_length += 16
+        if len(binary_data) < header_length:
+            return None
+        message_length = int(binary_data[header_length - 32:header_length], 2)
+        return message_type, codec, header_length, message_length
+
+    @staticmethod
+    def parse_frames(binary_data):
+        """
+        Number of frames a payload is striped across, from a complete header.
+        Returns:
+            int or None: The frame count, or None for single-image payloads.
+        """
+        if binary_data[0] != '1' or not int(binary_data[3:11], 2) & MultiLayerLSB.FRAME_STRIPED_FLAG:
+            return None
+        return int(binary_data[11:27], 2)
+
+    @staticmethod
+    def binary_to_message(binary_data, output_path=None):
+        header = MultiLayerLSB.parse_header(binary_data)
+        if header is None:
+            raise ValueError("Could not extract message metadata")
+        message_type, codec, header_length, message_length = header
+        message_binary = binary_data[header_length:header_length + message_length]
+
+        message = bytes(int(message_binary[i:i+8], 2) for i in range(0, len(message_binary), 8))
+        # The bit string is at most the carrier's capacity
+        message = MultiLayerLSB.decompress_payload(message, codec,
+                                                   MultiLayerLSB.decompression_limit(len(binary_data) // 8))
+        if output_path:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            with open(output_path, 'wb') as f:
+                f.write(message)
+        return message
+
+    @staticmethod
+    def compress_payload(data, compression='auto', file_extension=None):
+        """
+        Compresses a payload before it is encrypted and embedded.
+
+        In 'auto' mode, already-compressed media is passed through untouched and
+        otherwise each codec is tried on a sample of the payload; the best one is
+        used for the whole payload. Compression is dropped if it doesn't shrink
+        the payload.
+        Args:
+            data (bytes): Payload to compress.
+            compression (str, optional): 'auto', 'none', 'zlib', 'lzma' or 'bz2'. Default is 'auto'.
+            file_extension (str, optional): Extension of the original file (e.g. '.mp3').
+        Returns:
+            tuple: (codec (str), compressed data (bytes))
+        """
+        if compression == 'auto':
+            if file_extension and file_extension.lower() in MultiLayerLSB.COMPRESSED_EXTENSIONS:
+                return 'none', data
+            compression = MultiLayerLSB.choose_codec(data)
+        elif compression not in MultiLayerLSB.CODECS:
+            raise ValueError(f"Unsupported compression codec: {compression}")
+
+        if compression == 'none':
+            return 'none', data
+        compressed = MultiLayerLSB._compress(data, compression)
+        if len(compressed) >= len(data):
+            return 'none', data
+        return compression, compressed
+
+    @staticmethod
+    def _compression_sample(data):
+        """At most COMPRESSION_SAMPLE_SIZE bytes of the data to try codecs on."""
+        sample_size = MultiLayerLSB.COMPRESSION_SAMPLE_SIZE
+        if len(data) <= sample_size:
+            return data
+        # Head, middle and tail so a uniform header doesn't skew the choice
+        part = sample_size // 3
+        middle = len(data) // 2
+        return b''.join((data[:part], data[middle:middle + part], data[-part:]))
+
+    @staticmethod
+    def choose_codec(data):
+        """Pick the codec that compresses a sample of the data best, or 'none' if nothing helps."""
+        sample = MultiLayerLSB._compression_sample(data)
+
+        best_codec, best_size = 'none', len(sample)
+        for codec in ('zlib', 'bz2', 'lzma'):
+            size = len(MultiLayerLSB._compress(sample, codec))
+            if size < best_size:
+                best_codec, best_size = codec, size
+        # Not worth the decode cost for less than 5% saving
+        if best_size > 0.95 * len(sample):
+            return 'none'
+        return best_codec
+
+    @staticmethod
+    def estimate_compression(data, compression='auto', file_extension=None):
+        """
+        Codec compress_payload would use and the ratio it would reach, from a sample of the payload.
+        Args:
+            data (bytes-like): Payload.
+            compression (str, optional): 'auto', 'none', 'zlib', 'lzma' or 'bz2'. Default is 'auto'.
+            file_extension (str, optional): Extension of the original file (e.g. '.mp3').
+        Returns:
+            tuple: (codec (str), ratio of compressed to original size (float); 1.0 for 'none')
+        """
+        if compression == 'auto':
+            if file_extension and file_extension.lower() in MultiLayerLSB.COMPRESSED_EXTENSIONS:
+                return 'none', 1.0
+            compression = MultiLayerLSB.choose_codec(data)
+        elif compression not in MultiLayerLSB.CODECS:
+            raise ValueError(f"Unsupported compression codec: {compression}")
+        sample = MultiLayerLSB._compression_sample(data)
+        if compression == 'none' or not len(sample):
+            return 'none', 1.0
+        ratio = len(MultiLayerLSB._compress(sample, compression)) / len(sample)
+        # compress_payload falls back to the raw payload when compression doesn't help
+        return (compression, ratio) if ratio < 1 else ('none', 1.0)
+
+    @staticmethod
+    def _compress(data, codec):
+        if codec == 'zlib':
+            return zlib.compress(data, 9)
+        elif codec == 'lzma':
+            # The default 8 MB dictionary costs ~94 MB of encoder memory; payloads
+            # smaller than that compress identically with a dictionary their size
+            dict_size = min(max(len(data), 4096), 8 * 1024 * 1024)
+            filters = [{'id': lzma.FILTER_LZMA2, 'preset': 6, 'dict_size': dict_size}]
+            return lzma.compress(data, filters=filters)
+        elif codec == 'bz2':
+            return bz2.compress(data, 9)
+        return data
+
+    @staticmethod
+    def decompress_payload(data, codec, max_length=None):
+        """
+        Decompress a payload using the codec recorded in its header.
+        Args:
+            data (bytes-like): Compressed payload.
+            codec (str): Codec recorded in the header.
+            max_length (int, optional): Largest output accepted, in bytes; no limit if None.
+        Returns:
+            bytes: Decompressed payload.
+        Raises:
+            ValueError: If the payload decompresses to more than max_length bytes, or is truncated.
+        """
+        if codec == 'none':
+            return data
+        if codec == 'zlib':
+            decompressor = zlib.decompressobj()
+        elif codec == 'lzma':
+            decompressor = lzma.LZMADecompressor()
+        elif codec == 'bz2':
+            decompressor = bz2.BZ2Decompressor()
+        else:
+            raise ValueError(f"Unsupported compression codec: {codec}")
+        if max_length is None:
+            output = decompressor.decompress(data)
         else:
-            raise ValueError("Invalid message type")
+            # One byte over the limit tells a bomb from a payload that fills it exactly
+            output = decompressor.decompress(data, max_length + 1)
+            if len(output) > max_length:
+                raise ValueError(f"Compressed payload expands to more than {max_length} bytes")
+        if not decompressor.eof:
+            raise ValueError("Compressed payload is truncated")
+        return output
+
+    @staticmethod
+    def decompression_limit(samples, max_length=None):
+        """
+        Largest decompressed payload accepted from a carrier of `samples` samples: its capacity
+        at 8 rounds times MAX_EXPANSION, or `max_length` bytes if that is smaller.
+        """
+        limit = samples * MultiLayerLSB.MAX_EXPANSION
+        return limit if max_length is None else min(limit, max_length)
 
     @staticmethod
     def aes_encrypt(data):
+        # cryptography is imported on first use; unencrypted runs never pay for it
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.backends import default_backend
         key = secrets.token_bytes(16)  # AES-128
         iv = secrets.token_bytes(16)
         padder = padding.PKCS7(128).padder()
@@ -218,6 +598,9 @@ class MultiLayerLSB:
 
     @staticmethod
     def aes_decrypt(ciphertext, key, iv):
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        from cryptography.hazmat.primitives import padding
+        from cryptography.hazmat.backends import default_backend
         cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
         decryptor = cipher.decryptor()
         padded_data = decryptor.update(ciphertext) + decryptor.finalize()
@@ -226,165 +609,810 @@ class MultiLayerLSB:
         return data
 
     @staticmethod
-    def embed_message(cover_image_path, stego_image_path, file_path, rounds=8, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True):
+    def load_image(source, samples=None):
         """
-        Embeds a message into an image using multi-layer LSB, with optional AES encryption.
+        Decodes an image from a path, a file-like object or an in-memory buffer.
+        RGB, RGBA, L, LA and 16-bit grayscale images keep their channels and depth; palette images
+        expand to RGB (RGBA with transparency), other colour modes convert to RGB and the rest to L.
         Args:
-            cover_image_path (str): Path to the cover image.
-            stego_image_path (str): Path to save the stego image.
-            file_path (str): Path to the message file.
-            rounds (int, optional): Number of LSB layers to use (1-8). Default is 8.
+            source (str, file-like, bytes-like, PIL.Image or array-like): Image to load. Arrays and
+                array-likes such as SharedImage are returned as an ndarray view without copying.
+            samples (int, optional): Only the rows holding the first `samples` samples are needed.
+                Non-interlaced PNGs then decode just those rows; other images decode fully.
+        Returns:
+            np.ndarray: Pixel array of shape (H, W, C) or (H, W), dtype uint8 or uint16. With `samples`,
+                H may be smaller than the image height.
+        """
+        if MultiLayerLSB._is_array(source):
+            return np.asarray(source)
+        if isinstance(source, Image.Image):
+            image = source
+        else:
+            position = source.tell() if hasattr(source, 'seek') else None
+            image = MultiLayerLSB._open(source)
+            if samples is not None and MultiLayerLSB._limit_rows(image, samples):
+                try:
+                    image.load()
+                except (OSError, ValueError, SystemError):
+                    # A Pillow that decodes tiles differently; fall back to decoding every row
+                    if position is not None:
+                        source.seek(position)
+                    image = MultiLayerLSB._open(source)
+        mode = MultiLayerLSB._native_mode(image)
+        if image.mode != mode:
+            image = image.convert(mode)
+        array = np.array(image)
+        # Big-endian 16-bit TIFFs decode byte-swapped
+        return array if array.dtype.isnative else array.astype(array.dtype.newbyteorder('='))
+
+    @staticmethod
+    def _native_mode(image):
+        """Mode load_image decodes a PIL image in; one of NATIVE_MODES."""
+        if image.mode in MultiLayerLSB.NATIVE_MODES:
+            return image.mode
+        if image.mode == 'P':
+            return 'RGBA' if 'transparency' in image.info else 'RGB'
+        return MultiLayerLSB.CONVERTED_MODES.get(image.mode, 'RGB')
+
+    @staticmethod
+    def image_mode(image):
+        """
+        Decoded layout of an image, without decoding paths or buffers.
+        Args:
+            image (str, file-like, bytes-like, PIL.Image or array-like): The image.
+        Returns:
+            dict: 'mode' (as decoded, e.g. 'RGBA' or 'I;16'), 'channels' and 'bit_depth' (8 or 16).
+        """
+        if MultiLayerLSB._is_array(image):
+            image = np.asarray(image)
+            channels = image.shape[-1] if image.ndim in (3, 4) else 1
+            mode = {1: 'I;16' if image.dtype == np.uint16 else 'L', 2: 'LA', 3: 'RGB', 4: 'RGBA'}[channels]
+            return {'mode': mode, 'channels': channels, 'bit_depth': image.dtype.itemsize * 8}
+        img = image if isinstance(image, Image.Image) else MultiLayerLSB._open(image)
+        mode = MultiLayerLSB._native_mode(img)
+        channels, dtype = MultiLayerLSB.NATIVE_MODES[mode]
+        return {'mode': mode, 'channels': channels, 'bit_depth': np.dtype(dtype).itemsize * 8}
+
+    @staticmethod
+    def decodes_partially(image):
+        """
+        Whether load_image(image, samples=...) decodes only the leading rows rather than the whole image.
+        Args:
+            image (str, file-like, bytes-like, PIL.Image or array-like): The image; paths and buffers aren't decoded.
+        Returns:
+            bool: True for non-interlaced, single-frame PNGs.
+        """
+        if MultiLayerLSB._is_array(image):
+            return False
+        position = image.tell() if hasattr(image, 'read') else None
+        try:
+            opened = MultiLayerLSB.open_image(image)
+            return MultiLayerLSB._can_limit_rows(opened) and getattr(opened, 'n_frames', 1) == 1
+        finally:
+            if position is not None:
+                image.seek(position)
+
+    @staticmethod
+    def _can_limit_rows(image):
+        # PNG rows are decoded in order, so a shorter tile stops inflating after those rows.
+        # Interlaced PNGs spread every row over seven passes and need the full decode.
+        return image.format == 'PNG' and not image.info.get('interlace') and len(image.tile) == 1
+
+    @staticmethod
+    def _limit_rows(image, samples):
+        """
+        Restrict a freshly opened, not yet decoded PNG to the rows holding the first `samples` samples.
+        This rewrites Pillow internals (the tile list and `_size`); if they don't take the rewrite
+        the image is left as opened.
+        Returns:
+            bool: Whether the image was restricted; load_image then falls back to a full decode if it fails.
+        """
+        if not MultiLayerLSB._can_limit_rows(image):
+            return False
+        width, height = image.size
+        # Palette images expand after decoding, so their one band overestimates the rows needed
+        channels = len(image.getbands())
+        rows = max(1, -(-samples // (width * channels)))
+        if rows >= height:
+            return False
+        tile = image.tile[0]
+        try:
+            image.tile = [type(tile)(tile[0], (0, 0, width, rows), *tile[2:])]
+            image._size = (width, rows)
+        except (AttributeError, TypeError, ValueError):
+            image.tile = [tile]
+            return False
+        if image.size != (width, rows):
+            image.tile = [tile]
+            return False
+        return True
+
+    @staticmethod
+    def _is_array(source):
+        """True for decoded pixels: ndarrays and array-likes such as SharedImage."""
+        return isinstance(source, np.ndarray) or (hasattr(source, '__array__') and not isinstance(source, Image.Image))
+
+    @staticmethod
+    def save_image(image_array, target):
+        """Encode a pixel array as PNG to a path or a writable file-like object; uint16 arrays stay 16-bit."""
+        Image.fromarray(MultiLayerLSB._pixel_array(image_array)).save(target, format='PNG')
+
+    @staticmethod
+    def _pixel_array(image_array):
+        """An array Image.fromarray takes: uint16 grayscale kept, anything else as uint8."""
+        image_array = np.asarray(image_array)
+        if image_array.dtype == np.uint16 and image_array.ndim == 2:
+            return image_array
+        return image_array.astype(np.uint8, copy=False)
+
+    @staticmethod
+    def open_image(source):
+        """
+        Open an image without decoding its pixels. load_image, load_frames and frame_count take
+        the result, so a caller can decode the first frame and then the frames after it without
+        decoding the first one again.
+        """
+        return source if isinstance(source, Image.Image) else MultiLayerLSB._open(source)
+
+    @staticmethod
+    def _open(source):
+        if isinstance(source, (str, os.PathLike)) or hasattr(source, 'read'):
+            return Image.open(source)
+        return Image.open(io.BytesIO(source))
+
+    @staticmethod
+    def frame_count(image):
+        """
+        Number of frames in an image without decoding it: animated GIF/PNG/WebP frames or TIFF pages.
+        Arrays of shape (F, H, W, C) are frame stacks; other arrays count as one frame.
+        """
+        if MultiLayerLSB._is_array(image):
+            return np.shape(image)[0] if np.ndim(image) == 4 else 1
+        if isinstance(image, Image.Image):
+            return getattr(image, 'n_frames', 1)
+        position = image.tell() if hasattr(image, 'read') else None
+        try:
+            return getattr(MultiLayerLSB._open(image), 'n_frames', 1)
+        finally:
+            if position is not None:
+                image.seek(position)
+
+    @staticmethod
+    def load_frames(source, count=None):
+        """
+        Decodes the frames of a multi-frame image into one stack.
+        Every frame is decoded in the layout load_image uses for the first; all must have the same size.
+        Args:
+            source (str, file-like, bytes-like, PIL.Image or array-like): Image to load. Arrays are
+                returned as a (F, H, W, C) view; a single image becomes a stack of one.
+            count (int, optional): Decode only the first `count` frames.
+        Returns:
+            np.ndarray: Frames of shape (F, H, W, C), dtype uint8 or uint16.
+        """
+        if MultiLayerLSB._is_array(source):
+            stack = np.asarray(source)
+            if stack.ndim == 2:
+                stack = stack[..., np.newaxis]
+            if stack.ndim == 3:
+                stack = stack[np.newaxis]
+            return stack[:count]
+        image = source if isinstance(source, Image.Image) else MultiLayerLSB._open(source)
+        total = getattr(image, 'n_frames', 1)
+        count = total if count is None else min(count, total)
+        mode = MultiLayerLSB._native_mode(image)
+        channels, dtype = MultiLayerLSB.NATIVE_MODES[mode]
+        width, height = image.size
+        stack = np.empty((count, height, width, channels), dtype=dtype)
+        for i in range(count):
+            image.seek(i)
+            if image.size != (width, height):
+                raise ValueError("All frames of a multi-frame cover must have the same size")
+            frame = image if image.mode == mode else image.convert(mode)
+            stack[i] = np.asarray(frame).reshape(height, width, channels)
+        return stack
+
+    @staticmethod
+    def save_frames(frames, target, format=None):
+        """
+        Encode a (F, H, W, C) frame stack losslessly as an animated PNG, or a multi-page TIFF when
+        `format` is 'TIFF' or the target path ends in .tif/.tiff.
+        """
+        frames = np.asarray(frames)
+        images = [Image.fromarray(MultiLayerLSB._pixel_array(frame[..., 0] if frame.shape[-1] == 1 else frame))
+                  for frame in frames]
+        if format is None:
+            is_tiff = isinstance(target, (str, os.PathLike)) and \
+                os.fspath(target).lower().endswith(('.tif', '.tiff'))
+            format = 'TIFF' if is_tiff else 'PNG'
+        if format == 'TIFF':
+            images[0].save(target, format='TIFF', save_all=True, append_images=images[1:],
+                           compression='tiff_deflate')
+        else:
+            # No frame durations: the APNG writer would merge identical consecutive frames
+            images[0].save(target, format='PNG', save_all=True, append_images=images[1:])
+
+    @staticmethod
+    def _resolve_workers(workers):
+        """Thread count for a `workers` argument: an int, or 'auto' for one per CPU."""
+        if workers == 'auto':
+            return os.cpu_count() or 1
+        if not isinstance(workers, int) or workers < 1:
+            raise ValueError("Number of workers must be a positive integer or 'auto'")
+        return workers
+
+    @staticmethod
+    def _tile_pool():
+        with MultiLayerLSB._tile_pool_lock:
+            if MultiLayerLSB._tile_executor is None:
+                MultiLayerLSB._tile_executor = ThreadPoolExecutor(
+                    max_workers=os.cpu_count() or 1, thread_name_prefix='mlsb-tile')
+            return MultiLayerLSB._tile_executor
+
+    @staticmethod
+    def _tiles(start, stop, workers, progress=None):
+        """
+        Split samples [start, stop) into contiguous ranges of at least MIN_TILE_SAMPLES: one per worker,
+        or PROGRESS_STEPS when progress is reported.
+        """
+        wanted = max(workers, MultiLayerLSB.PROGRESS_STEPS) if progress else workers
+        count = max(1, min(wanted, (stop - start) // MultiLayerLSB.MIN_TILE_SAMPLES))
+        bounds = [start + (stop - start) * i // count for i in range(count + 1)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    @staticmethod
+    def _run_tiles(process, tiles, workers=1, report=None):
+        """Call process(a, b) for every tile, on the shared pool when workers > 1, then report(a, b) in order."""
+        if workers == 1 or len(tiles) == 1:
+            for a, b in tiles:
+                process(a, b)
+                if report:
+                    report(a, b)
+            return
+        # Tiles cover disjoint samples, so they need no locking; NumPy releases the GIL in the ufuncs
+        pool = MultiLayerLSB._tile_pool()
+        for a, b, future in [(a, b, pool.submit(process, a, b)) for a, b in tiles]:
+            future.result()
+            if report:
+                report(a, b)
+
+    @staticmethod
+    def _plane_runs(n, start, count):
+        """
+        Split `count` plane-major bits from bit position `start` at plane boundaries.
+        Yields:
+            tuple: (plane, first sample, sample count, position of the first bit in the bit array)
+        """
+        pos = 0
+        while pos < count:
+            plane, offset = divmod(start + pos, n)
+            take = min(count - pos, n - offset)
+            yield plane, offset, take, pos
+            pos += take
+
+    @staticmethod
+    def _write_bits(flat, bits, start=0, workers=1, progress=None):
+        """
+        Write bits in plane-major order: plane 0 of every sample, then plane 1, and so on.
+        Each plane is split into tiles; `progress(bits, plane)` is called as each one is written.
+        """
+        full = np.iinfo(flat.dtype).max
+
+        def write(plane, shift, a, b):
+            target = flat[a:b]
+            target &= flat.dtype.type(~(1 << plane) & full)
+            target |= bits[a + shift:b + shift] << np.uint8(plane)
+
+        for plane, offset, take, pos in MultiLayerLSB._plane_runs(flat.size, start, len(bits)):
+            # A sample's bit sits `pos - offset` places further into `bits` on this plane
+            MultiLayerLSB._run_tiles(functools.partial(write, plane, pos - offset),
+                                     MultiLayerLSB._tiles(offset, offset + take, workers, progress), workers,
+                                     progress and (lambda a, b, plane=plane: progress(b - a, plane)))
+
+    @staticmethod
+    def _read_bits(flat, start, count, workers=1, progress=None):
+        """Read `count` bits starting at bit position `start` in plane-major order."""
+        bits = np.empty(count, dtype=np.uint8)
+
+        def read(plane, shift, a, b):
+            target = bits[a + shift:b + shift]
+            np.right_shift(flat[a:b], plane, out=target)
+            target &= 1
+
+        for plane, offset, take, pos in MultiLayerLSB._plane_runs(flat.size, start, count):
+            MultiLayerLSB._run_tiles(functools.partial(read, plane, pos - offset),
+                                     MultiLayerLSB._tiles(offset, offset + take, workers, progress), workers,
+                                     progress and (lambda a, b, plane=plane: progress(b - a, plane)))
+        return bits
+
+    @staticmethod
+    def _write_pixel_bits(flat, bits, start, rounds, workers=1, progress=None):
+        """Write bits in pixel-major order from sample `start`: `rounds` bits per sample, lowest plane first."""
+        planes = np.arange(rounds, dtype=np.uint8)
+        full = np.iinfo(flat.dtype).max
+
+        def write(a, b):
+            # Each tile starts on a sample boundary, so only the last one can end part-way through a sample
+            tile_bits = bits[(a - start) * rounds:(b - start) * rounds]
+            count, remainder = divmod(len(tile_bits), rounds)
+            target = flat[a:a + count]
+            target &= flat.dtype.type(full << rounds & full)
+            target |= (tile_bits[:count * rounds].reshape(count, rounds) << planes).sum(axis=1, dtype=np.uint8)
+            if remainder:
+                # The last sample only gives up the planes it needs
+                last = flat[a + count:a + count + 1]
+                last &= flat.dtype.type(full << remainder & full)
+                last |= (tile_bits[count * rounds:] << planes[:remainder]).sum(dtype=np.uint8)
+
+        def report(a, b):
+            progress(min((b - start) * rounds, len(bits)) - (a - start) * rounds, rounds - 1)
+
+        if len(bits):
+            MultiLayerLSB._run_tiles(write, MultiLayerLSB._tiles(start, start + -(-len(bits) // rounds), workers,
+                                                                 progress), workers, progress and report)
+
+    @staticmethod
+    def _read_pixel_bits(flat, start, count, rounds, workers=1, progress=None):
+        """Read `count` bits written by _write_pixel_bits (fewer if `flat` ends first)."""
+        samples = flat[start:start + -(-count // rounds)]
+        bits = np.empty((samples.size, rounds), dtype=np.uint8)
+        planes = np.arange(rounds, dtype=np.uint8)
+
+        def read(a, b):
+            target = bits[a:b]
+            np.right_shift(samples[a:b, np.newaxis], planes, out=target)
+            target &= 1
+
+        def report(a, b):
+            progress(min(b * rounds, count) - a * rounds, rounds - 1)
+
+        if samples.size:
+            MultiLayerLSB._run_tiles(read, MultiLayerLSB._tiles(0, samples.size, workers, progress), workers,
+                                     progress and report)
+        return bits.reshape(-1)[:count]
+
+    @staticmethod
+    def _bit_counter(progress, stage, total):
+        """Adapt a progress(stage, done, total, plane) callback to the bit writers' progress(bits, plane)."""
+        if progress is None:
+            return None
+        done = [0]
+
+        def counter(bits, plane):
+            done[0] += bits
+            progress(stage, done[0], total, plane)
+        return counter
+
+    @staticmethod
+    def _read_header(flat):
+        """
+        Reads and parses the header at the start of a flattened stego image (the first frame of a stack).
+        Returns:
+            tuple: (message_type, codec, header_length, message_length, layout, rounds, frames);
+                rounds is None for the plane layout, frames is None unless the payload is striped across frames.
+        """
+        def to_str(bits):
+            return ''.join(str(b) for b in bits)
+
+        preamble = to_str(MultiLayerLSB._read_bits(flat, 0, min(MultiLayerLSB.PREAMBLE_BITS, flat.size * 8)))
+        layout = MultiLayerLSB.parse_layout(preamble)
+        if layout is None:
+            raise ValueError("Could not extract message metadata")
+        layout, rounds = layout
+        if layout == 'pixel':
+            # The frame count and length fields follow the preamble in the payload's own layout
+            header = preamble + to_str(MultiLayerLSB._read_pixel_bits(flat, MultiLayerLSB.PREAMBLE_BITS, 48, rounds))
+        else:
+            # Legacy headers are 35 bits, extended ones 43 and frame-striped ones 59; parse_header uses what it needs
+            header = to_str(MultiLayerLSB._read_bits(flat, 0, min(59, flat.size * 8)))
+        parsed = MultiLayerLSB.parse_header(header)
+        if parsed is None:
+            raise ValueError("Could not extract message metadata")
+        return parsed + (layout, rounds, MultiLayerLSB.parse_frames(header))
+
+    @staticmethod
+    def embed_data(cover, message, rounds=8, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, compression='none', message_type='text', file_extension=None, out=None, layout='plane', workers=1, progress=None):
+        """
+        In-memory counterpart of embed_message.
+        Args:
+            cover (str, file-like, bytes-like or array-like): Cover image. Arrays are copied, not modified.
+            message (bytes-like): Message payload, e.g. bytes or a memoryview over an upload.
+            rounds (int or str, optional): Number of LSB layers to use (1-8), or 'auto' for the fewest
+                layers the message needs (see minimum_rounds). Default is 8.
             termination_sequence (bytes, optional): Sequence to mark end of message. Default is b'<<END_OF_MESSAGE>>'.
             is_encrypted (bool, optional): Whether to encrypt the message with AES. Default is True.
+            compression (str, optional): Codec applied before encryption. Default is 'none'.
+            message_type (str, optional): 'text', 'audio' or 'image'. Default is 'text'.
+            file_extension (str, optional): Extension of the original message file, used by 'auto' compression.
+            out (array-like, optional): Writable buffer with the cover's shape (e.g. a SharedImage) that
+                receives the stego pixels instead of a new array. May be the cover itself to embed in place.
+            layout (str, optional): 'plane' fills bit 0 of every sample before bit 1; 'pixel' packs `rounds`
+                bits into each sample, so only the first rows are touched. Recorded in the header. Default is 'plane'.
+            workers (int or str, optional): Threads writing disjoint tiles of the image, or 'auto' for one per
+                CPU. The stego pixels are identical for any value. Default is 1.
+            progress (callable, optional): Called as progress(stage, done, total, plane) when each stage starts
+                ('compress', 'encrypt', 'decode', 'embed') and as each tile of bits is written; for 'embed',
+                `done` and `total` count payload bits and `plane` is the bit plane just written.
+        Multi-frame covers (files with several frames, or (F, H, W, C) arrays) have the payload striped
+        across as few frames as `rounds` allows, embedded in parallel; the header records the count.
         Returns:
-            tuple: (stego_image_path (str), key (bytes or None), iv (bytes or None))
+            tuple: (stego (np.ndarray, or `out` if given; (F, H, W, C) for multi-frame covers), key (bytes or None),
+                iv (bytes or None))
         """
-        if not 1 <= rounds <= 8:
+        if rounds != 'auto' and not 1 <= rounds <= 8:
             raise ValueError("Number of rounds must be between 1 and 8")
+        workers = MultiLayerLSB._resolve_workers(workers)
+        if layout not in MultiLayerLSB.LAYOUTS:
+            raise ValueError(f"Unsupported layout: {layout}")
 
-        with open(file_path, 'rb') as f:
-            message_data = f.read()
-        message_with_term = message_data + termination_sequence
+        codec, payload, key, iv = MultiLayerLSB._seal_payload(message, termination_sequence, is_encrypted,
+                                                              compression, file_extension, progress)
+        payload_bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
 
-        # Get the original file extension
-        _, original_ext = os.path.splitext(file_path)
+        if progress:
+            progress('decode', 0, 0, None)
+        if MultiLayerLSB.frame_count(cover) > 1 or (MultiLayerLSB._is_array(cover) and np.ndim(cover) == 4):
+            stego_array = MultiLayerLSB._embed_frames(cover, payload_bits, rounds, codec, message_type, out,
+                                                      layout, workers, progress)
+            return stego_array, key, iv
+        cover_array = MultiLayerLSB.load_image(cover)
+        if out is not None:
+            stego_array = np.asarray(out)
+            if (stego_array.shape != cover_array.shape or stego_array.dtype != cover_array.dtype
+                    or not stego_array.flags.c_contiguous):
+                raise ValueError("Output buffer must be contiguous and match the cover image shape and dtype")
+            if not np.shares_memory(stego_array, cover_array):
+                stego_array[...] = cover_array
+        elif MultiLayerLSB._is_array(cover):
+            stego_array = cover_array.copy()
+        else:
+            stego_array = cover_array
+        if rounds == 'auto':
+            header_length = len(MultiLayerLSB.build_header(message_type, 0, codec, layout))
+            rounds = MultiLayerLSB.minimum_rounds(stego_array, header_length + len(payload_bits), layout)
+        header = MultiLayerLSB.build_header(message_type, len(payload_bits), codec, layout, rounds)
+        header_bits = np.frombuffer(header.encode('ascii'), dtype=np.uint8) - ord('0')
+
+        counted = len(header_bits) - MultiLayerLSB.PREAMBLE_BITS if layout == 'pixel' else 0
+        counter = MultiLayerLSB._bit_counter(progress, 'embed', counted + len(payload_bits))
+        MultiLayerLSB._embed_flat(stego_array.reshape(-1), header_bits, payload_bits, layout, rounds, workers,
+                                  counter)
+        return (stego_array if out is None else out), key, iv
+
+    @staticmethod
+    def _seal_payload(message, termination_sequence, is_encrypted, compression, file_extension, progress):
+        """
+        Terminate, compress and optionally encrypt a message for embedding; counterpart of _open_payload.
+        Returns:
+            tuple: (codec (str), payload (bytes), key (bytes or None), iv (bytes or None))
+        """
+        message_with_term = b''.join((message, termination_sequence))
+
+        # Compress first: ciphertext doesn't compress
+        if progress:
+            progress('compress', 0, len(message_with_term), None)
+        codec, payload = MultiLayerLSB.compress_payload(message_with_term, compression, file_extension)
 
         if is_encrypted:
-            encrypted_data, key, iv = MultiLayerLSB.aes_encrypt(message_with_term)
-            temp_enc_file = f"temp_encrypted_payload{original_ext}"
-            with open(temp_enc_file, 'wb') as f:
-                f.write(encrypted_data)
-            binary_message = MultiLayerLSB.message_to_binary(temp_enc_file)
-            os.remove(temp_enc_file)
+            if progress:
+                progress('encrypt', 0, len(payload), None)
+            payload, key, iv = MultiLayerLSB.aes_encrypt(payload)
         else:
             key = None
             iv = None
-            temp_plain_file = f"temp_plain_payload{original_ext}"
-            with open(temp_plain_file, 'wb') as f:
-                f.write(message_with_term)
-            binary_message = MultiLayerLSB.message_to_binary(temp_plain_file)
-            os.remove(temp_plain_file)
-
-        cover = Image.open(cover_image_path)
-        is_rgb = cover.mode == 'RGB'
-        if not is_rgb:
-            cover = cover.convert('L')
-        cover_array = np.array(cover)
-
-        channels = 3 if is_rgb else 1
-        max_bits = cover_array.size * rounds * channels
-        if len(binary_message) > max_bits:
-            raise ValueError("Message too long for cover image capacity")
+        return codec, payload, key, iv
 
-        bit_index = 0
-        for round_num in range(rounds):
-            if is_rgb:
-                height, width, _ = cover_array.shape
-                for y in range(height):
-                    for x in range(width):
-                        for channel in range(3):
-                            if bit_index >= len(binary_message):
-                                break
-                            pixel = int(cover_array[y, x, channel])
-                            mask = ~(1 << round_num)
-                            pixel = pixel & mask
-                            if bit_index < len(binary_message):
-                                message_bit = int(binary_message[bit_index])
-                                pixel = pixel | (message_bit << round_num)
-                                cover_array[y, x, channel] = pixel
-                                bit_index += 1
-                        if bit_index >= len(binary_message):
-                            break
-                    if bit_index >= len(binary_message):
-                        break
-            else:
-                height, width = cover_array.shape
-                for y in range(height):
-                    for x in range(width):
-                        if bit_index >= len(binary_message):
-                            break
-                        pixel = int(cover_array[y, x])
-                        mask = ~(1 << round_num)
-                        pixel = pixel & mask
-                        if bit_index < len(binary_message):
-                            message_bit = int(binary_message[bit_index])
-                            pixel = pixel | (message_bit << round_num)
-                            cover_array[y, x] = pixel
-                            bit_index += 1
-                    if bit_index >= len(binary_message):
-                        break
-
-        stego_image = Image.fromarray(cover_array.astype(np.uint8))
-        stego_image.save(stego_image_path, format='PNG')
+    @staticmethod
+    def _embed_flat(flat, header_bits, payload_bits, layout, rounds, workers=1, progress=None):
+        """
+        Write header and payload bits into one flattened image or frame. `header_bits` is empty for the
+        frames after the first of a striped payload, whose bits then start at the first sample.
+        """
+        if layout == 'pixel':
+            preamble = min(MultiLayerLSB.PREAMBLE_BITS, len(header_bits))
+            body_bits = np.concatenate((header_bits[preamble:], payload_bits))
+            if flat.size < preamble or preamble + -(-len(body_bits) // rounds) > flat.size:
+                raise ValueError("Message too long for cover image capacity")
+            if progress:
+                progress(0, 0)
+            MultiLayerLSB._write_bits(flat, header_bits[:preamble])
+            MultiLayerLSB._write_pixel_bits(flat, body_bits, preamble, rounds, workers, progress)
+        else:
+            if len(header_bits) + len(payload_bits) > flat.size * rounds:
+                raise ValueError("Message too long for cover image capacity")
+            if progress:
+                progress(0, 0)
+            MultiLayerLSB._write_bits(flat, header_bits)
+            MultiLayerLSB._write_bits(flat, payload_bits, start=len(header_bits), workers=workers, progress=progress)
+
+    @staticmethod
+    def _stripe_capacity(samples, header_length, rounds, layout):
+        """Payload bits each frame of `samples` samples can hold when the first also holds the header."""
+        if layout == 'pixel':
+            preamble = MultiLayerLSB.PREAMBLE_BITS
+            return max(0, (samples - preamble) * rounds - (header_length - preamble))
+        return max(0, samples * rounds - header_length)
+
+    @staticmethod
+    def _frame_plan(frame_count, samples, header_length, bit_length, rounds, layout):
+        """
+        Rounds and number of frames for a striped payload: the given rounds, or the fewest that fit
+        for 'auto', over as few frames as those rounds allow.
+        Returns:
+            tuple: (rounds, frames)
+        """
+        limit = min(frame_count, (1 << 16) - 1)
+        for candidate in (range(1, 9) if rounds == 'auto' else (rounds,)):
+            capacity = MultiLayerLSB._stripe_capacity(samples, header_length, candidate, layout)
+            if capacity:
+                frames = max(1, -(-bit_length // capacity))
+                if frames <= limit:
+                    return candidate, frames
+        raise ValueError("Message too long for cover image capacity")
+
+    @staticmethod
+    def _embed_frames(cover, payload_bits, rounds, codec, message_type, out, layout, workers, progress):
+        """
+        embed_data for a multi-frame cover: the payload is split into equal stripes over the first
+        frames, and the header in the first frame records how many. Frames are embedded in parallel.
+        Returns:
+            np.ndarray: Stego frames of shape (F, H, W, C), or `out` if given.
+        """
+        if out is not None and MultiLayerLSB._is_array(cover) and np.shares_memory(np.asarray(out), np.asarray(cover)):
+            stack = np.asarray(out)
+        else:
+            stack = MultiLayerLSB.load_frames(cover)
+            if out is not None:
+                target = np.asarray(out)
+                if target.shape != stack.shape or target.dtype != stack.dtype or not target.flags.c_contiguous:
+                    raise ValueError("Output buffer must be contiguous and match the cover frames' shape and dtype")
+                target[...] = stack
+                stack = target
+            elif MultiLayerLSB._is_array(cover):
+                stack = stack.copy()
+        samples = stack[0].size
+        header_length = len(MultiLayerLSB.build_header(message_type, 0, codec, layout, frames=1))
+        rounds, frames = MultiLayerLSB._frame_plan(len(stack), samples, header_length, len(payload_bits),
+                                                   rounds, layout)
+        header = MultiLayerLSB.build_header(message_type, len(payload_bits), codec, layout, rounds, frames)
+        header_bits = np.frombuffer(header.encode('ascii'), dtype=np.uint8) - ord('0')
+        stripe = -(-len(payload_bits) // frames)
+
+        counted = header_length - MultiLayerLSB.PREAMBLE_BITS if layout == 'pixel' else 0
+        counter = MultiLayerLSB._bit_counter(progress, 'embed', counted + len(payload_bits))
+        # Frames run in parallel, each on one thread; a lone frame is tiled instead
+        parallel = workers > 1 and frames > 1
+        if counter and parallel:
+            counter(0, 0)
+
+        def embed(i, _):
+            MultiLayerLSB._embed_flat(stack[i].reshape(-1), header_bits if i == 0 else header_bits[:0],
+                                      payload_bits[i * stripe:(i + 1) * stripe], layout, rounds,
+                                      1 if parallel else workers, None if parallel else counter)
+
+        def report(i, _):
+            counter(len(payload_bits[i * stripe:(i + 1) * stripe]) + (counted if i == 0 else 0), None)
+
+        MultiLayerLSB._run_tiles(embed, [(i, i + 1) for i in range(frames)], workers,
+                                 counter and parallel and report)
+        return stack if out is None else out
+
+    @staticmethod
+    def embed_message(cover_image_path, stego_image_path, file_path, rounds=8, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, compression='none', layout='plane', workers=1, progress=None):
+        """
+        Embeds a message into an image using multi-layer LSB, with optional compression and AES encryption.
+        Args:
+            cover_image_path (str): Path to the cover image.
+            stego_image_path (str): Path to save the stego image.
+            file_path (str): Path to the message file.
+            rounds (int or str, optional): Number of LSB layers to use (1-8), or 'auto'. Default is 8.
+            termination_sequence (bytes, optional): Sequence to mark end of message. Default is b'<<END_OF_MESSAGE>>'.
+            is_encrypted (bool, optional): Whether to encrypt the message with AES. Default is True.
+            compression (str, optional): Codec applied before encryption ('none', 'auto', 'zlib', 'lzma', 'bz2').
+                The chosen codec is recorded in the header. Default is 'none'.
+            layout (str, optional): 'plane' or 'pixel' bit layout, recorded in the header. Default is 'plane'.
+            workers (int or str, optional): Threads embedding tiles of the cover in parallel, or 'auto'. Default is 1.
+            progress (callable, optional): progress(stage, done, total, plane) callback; see embed_data.
+        Returns:
+            tuple: (stego_image_path (str), key (bytes or None), iv (bytes or None))
+        """
+        with open(file_path, 'rb') as f:
+            message_data = f.read()
+        _, original_ext = os.path.splitext(file_path)
+
+        stego_array, key, iv = MultiLayerLSB.embed_data(
+            cover_image_path, message_data, rounds=rounds, termination_sequence=termination_sequence,
+            is_encrypted=is_encrypted, compression=compression,
+            message_type=MultiLayerLSB.get_message_type(file_path), file_extension=original_ext, layout=layout,
+            workers=workers, progress=progress)
+        if stego_array.ndim == 4:
+            MultiLayerLSB.save_frames(stego_array, stego_image_path)
+        else:
+            MultiLayerLSB.save_image(stego_array, stego_image_path)
         return stego_image_path, key, iv
 
     @staticmethod
-    def extract_message(stego_image_path, output_path=None, rounds=8, key=None, iv=None, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True):
+    def extract_data(stego, rounds=8, key=None, iv=None, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, workers=1, progress=None, max_length=None):
         """
-        Extracts a message from a stego image, with optional AES decryption.
+        In-memory counterpart of extract_message.
         Args:
-            stego_image_path (str): Path to the stego image.
-            output_path (str, optional): Path to save the extracted message.
-            rounds (int, optional): Number of LSB layers used. Default is 8.
+            stego (str, file-like, bytes-like or np.ndarray): Stego image.
+            rounds (int or str, optional): Number of LSB layers used. 'auto' reads as many as the header
+                says were written. Pixel-major headers record their own rounds. Default is 8.
             key (bytes): AES key for decryption (if encrypted).
             iv (bytes): Initialization vector for decryption (if encrypted).
             termination_sequence (bytes, optional): Sequence marking end of message. Default is b'<<END_OF_MESSAGE>>'.
             is_encrypted (bool, optional): Whether the embedded message is encrypted. Default is True.
+            workers (int or str, optional): Threads reading tiles of the image in parallel, or 'auto'. Default is 1.
+            progress (callable, optional): Called as progress(stage, done, total, plane) when each stage starts
+                ('decode', 'extract', 'decrypt', 'decompress') and as each tile of bits is read; for 'extract',
+                `done` and `total` count payload bits.
+            max_length (int, optional): Largest decompressed payload accepted, in bytes. Whatever it is, a
+                compressed payload may expand to at most MAX_EXPANSION times the image's capacity.
         Returns:
             tuple: (message (bytes), media_type (str))
+        Raises:
+            ValueError: If the header is invalid, or the payload can't be decrypted or decompresses past the limit.
         """
-        stego_image = Image.open(stego_image_path)
-        stego_array = np.array(stego_image)
-        is_rgb = stego_image.mode == 'RGB'
-        if not is_rgb:
-            stego_array = stego_array[..., np.newaxis]
-
-        binary_message = ""
-        message_type = None
-        message_length = None
-
-        for round_num in range(rounds):
-            bits = ((stego_array >> round_num) & 1).flatten()
-            binary_message += ''.join(str(b) for b in bits)
-            if message_type is None and len(binary_message) >= 3:
-                message_type_binary = binary_message[:3]
-                binary_message = binary_message[3:]
-                type_map = {'001': 'text', '010': 'audio', '011': 'image'}
-                message_type = type_map.get(message_type_binary, None)
-                if not message_type:
-                    raise ValueError("Unsupported message type in extracted data.")
-            if message_type is not None and message_length is None and len(binary_message) >= 32:
-                message_length = int(binary_message[:32], 2)
-                binary_message = binary_message[32:]
-            if message_length is not None and len(binary_message) >= message_length:
-                binary_message = binary_message[:message_length]
-                break
-        if message_type is None or message_length is None:
-            raise ValueError("Could not extract message metadata")
-        if message_type == 'text':
-            # For encrypted text, keep as bytes
-            if is_encrypted:
-                message = bytes(int(binary_message[i:i+8], 2) for i in range(0, len(binary_message), 8))
+        workers = MultiLayerLSB._resolve_workers(workers)
+        if MultiLayerLSB._is_array(stego) and np.ndim(stego) == 4:
+            stack = np.asarray(stego)
+            header = MultiLayerLSB._read_header(stack[0].reshape(-1))
+            if header[-1] is None:
+                return MultiLayerLSB.extract_data(stack[0], rounds, key, iv, termination_sequence, is_encrypted,
+                                                  workers, progress, max_length)
+            return MultiLayerLSB._extract_frames(stack, header, key, iv, termination_sequence, is_encrypted,
+                                                 workers, progress, max_length)
+        # Decode only the rows holding the header first: a pixel-major payload is a prefix
+        # of rows too, so the rest of the image never needs decoding
+        position = None
+        partial = not MultiLayerLSB._is_array(stego) and not isinstance(stego, Image.Image)
+        if partial and hasattr(stego, 'read'):
+            partial = stego.seekable()
+            position = stego.tell() if partial else None
+        total_samples = None
+        if partial:
+            total_samples = MultiLayerLSB.sample_count(stego)
+            if position is not None:
+                stego.seek(position)
+        preamble = MultiLayerLSB.PREAMBLE_BITS
+        if progress:
+            progress('decode', 0, 0, None)
+        flat = MultiLayerLSB.load_image(stego, samples=preamble + 48 if partial else None).reshape(-1)
+
+        header = MultiLayerLSB._read_header(flat)
+        message_type, codec, header_length, message_length, layout, layout_rounds, frames = header
+        if frames is not None:
+            # Striped across frames: decode only the frames that hold payload
+            if MultiLayerLSB._is_array(stego):
+                stack = np.asarray(stego)[np.newaxis]
             else:
-                message = ''.join(chr(int(binary_message[i:i+8], 2)) for i in range(0, len(binary_message), 8))
-        elif message_type in ['audio', 'image']:
-            message = bytes(int(binary_message[i:i+8], 2) for i in range(0, len(binary_message), 8))
+                if position is not None:
+                    stego.seek(position)
+                stack = MultiLayerLSB.load_frames(stego, count=frames)
+            return MultiLayerLSB._extract_frames(stack, header, key, iv, termination_sequence, is_encrypted,
+                                                 workers, progress, max_length)
+        if layout == 'pixel':
+            needed = preamble + -(-(header_length - preamble + message_length) // layout_rounds)
         else:
-            raise ValueError("Invalid message type")
+            needed = total_samples
+        if partial and flat.size < min(needed, total_samples):
+            if position is not None:
+                stego.seek(position)
+            flat = MultiLayerLSB.load_image(stego, samples=needed).reshape(-1)
 
+        if layout == 'pixel':
+            # The header records the rounds; the payload follows the length field
+            counter = MultiLayerLSB._bit_counter(progress, 'extract', header_length - preamble + message_length)
+        else:
+            if rounds == 'auto':
+                # Layers fill from the bottom up, so the header's length is all that's needed
+                rounds = 8
+            max_bits = flat.size * rounds
+            message_length = max(0, min(message_length, max_bits - header_length))
+            counter = MultiLayerLSB._bit_counter(progress, 'extract', message_length)
+        payload_bits = MultiLayerLSB._extract_flat(flat, header_length, message_length, layout, layout_rounds,
+                                                   workers, counter)
+        message = np.packbits(payload_bits).tobytes()
+        limit = MultiLayerLSB.decompression_limit(total_samples or flat.size, max_length)
+        return MultiLayerLSB._open_payload(message, message_type, codec, key, iv, termination_sequence,
+                                           is_encrypted, progress, limit)
+
+    @staticmethod
+    def _extract_flat(flat, header_length, count, layout, rounds, workers=1, progress=None):
+        """
+        Read `count` payload bits following a `header_length`-bit header from one flattened image or
+        frame; counterpart of _embed_flat.
+        """
+        if progress:
+            progress(0, 0)
+        if layout == 'pixel':
+            preamble = min(MultiLayerLSB.PREAMBLE_BITS, header_length)
+            body_bits = MultiLayerLSB._read_pixel_bits(flat, preamble, header_length - preamble + count, rounds,
+                                                       workers, progress)
+            return body_bits[header_length - preamble:]
+        return MultiLayerLSB._read_bits(flat, header_length, count, workers, progress)
+
+    @staticmethod
+    def _extract_frames(stack, header, key, iv, termination_sequence, is_encrypted, workers, progress, max_length=None):
+        """
+        extract_data for a payload striped across frames, given the frames that hold it and the parsed
+        header of the first. The frames are read in parallel.
+        """
+        message_type, codec, header_length, message_length, layout, rounds, frames = header
+        if len(stack) < frames:
+            raise ValueError(f"Payload is striped across {frames} frames but the image has {len(stack)}")
+        stripe = -(-message_length // frames)
+        payload_bits = np.empty(message_length, dtype=np.uint8)
+
+        counted = header_length - MultiLayerLSB.PREAMBLE_BITS if layout == 'pixel' else 0
+        counter = MultiLayerLSB._bit_counter(progress, 'extract', counted + message_length)
+        parallel = workers > 1 and frames > 1
+        if counter and parallel:
+            counter(0, 0)
+
+        def extract(i, _):
+            count = len(payload_bits[i * stripe:(i + 1) * stripe])
+            payload_bits[i * stripe:i * stripe + count] = MultiLayerLSB._extract_flat(
+                stack[i].reshape(-1), header_length if i == 0 else 0, count, layout, rounds,
+                1 if parallel else workers, None if parallel else counter)
+
+        def report(i, _):
+            counter(len(payload_bits[i * stripe:(i + 1) * stripe]) + (counted if i == 0 else 0), None)
+
+        MultiLayerLSB._run_tiles(extract, [(i, i + 1) for i in range(frames)], workers,
+                                 counter and parallel and report)
+        message = np.packbits(payload_bits).tobytes()
+        limit = MultiLayerLSB.decompression_limit(stack[:frames].size, max_length)
+        return MultiLayerLSB._open_payload(message, message_type, codec, key, iv, termination_sequence,
+                                           is_encrypted, progress, limit)
+
+    @staticmethod
+    def _open_payload(message, message_type, codec, key, iv, termination_sequence, is_encrypted, progress,
+                      max_length=None):
+        """
+        Decrypt and decompress extracted payload bytes, decompressing to at most `max_length` bytes.
+        Returns (message, media_type).
+        """
         if is_encrypted:
             if key is None or iv is None:
                 raise ValueError("AES key and IV must be provided for decryption.")
+            if progress:
+                progress('decrypt', 0, len(message), None)
             decrypted_data = MultiLayerLSB.aes_decrypt(message, key, iv)
+            if progress and codec != 'none':
+                progress('decompress', 0, len(decrypted_data), None)
+            decrypted_data = MultiLayerLSB.decompress_payload(decrypted_data, codec, max_length)
             idx = decrypted_data.find(termination_sequence)
             if idx == -1:
                 raise ValueError("Termination sequence not found in decrypted data!")
             original_message = decrypted_data[:idx]
         else:
-            if isinstance(message, str):
-                original_message = message.encode('utf-8')
-            else:
-                original_message = message
+            if progress and codec != 'none':
+                progress('decompress', 0, len(message), None)
+            original_message = MultiLayerLSB.decompress_payload(message, codec, max_length)
+        return original_message, message_type
+
+    @staticmethod
+    def extract_message(stego_image_path, output_path=None, rounds=8, key=None, iv=None, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, workers=1, progress=None):
+        """
+        Extracts a message from a stego image, with optional AES decryption.
+        Args:
+            stego_image_path (str): Path to the stego image.
+            output_path (str, optional): Path to save the extracted message.
+            rounds (int, optional): Number of LSB layers used. Default is 8.
+            key (bytes): AES key for decryption (if encrypted).
+            iv (bytes): Initialization vector for decryption (if encrypted).
+            termination_sequence (bytes, optional): Sequence marking end of message. Default is b'<<END_OF_MESSAGE>>'.
+            is_encrypted (bool, optional): Whether the embedded message is encrypted. Default is True.
+            workers (int or str, optional): Threads reading tiles of the image in parallel, or 'auto'. Default is 1.
+            progress (callable, optional): progress(stage, done, total, plane) callback; see extract_data.
+        Returns:
+            tuple: (message (bytes), media_type (str))
+        """
+        original_message, message_type = MultiLayerLSB.extract_data(
+            stego_image_path, rounds=rounds, key=key, iv=iv,
+            termination_sequence=termination_sequence, is_encrypted=is_encrypted, workers=workers,
+            progress=progress)
 
         if output_path:
             os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -392,6 +1420,42 @@ class MultiLayerLSB:
                 f.write(original_message)
         return original_message, message_type
 
+    @staticmethod
+    def _metric_arrays(original, stego):
+        """
+        Load both images for a metric in their own layout and depth. Decoded images whose layouts
+        differ, e.g. an RGB cover and a grayscale stego, are both compared in RGB.
+        """
+        if MultiLayerLSB._is_array(original) and MultiLayerLSB._is_array(stego):
+            original = np.asarray(original)
+            stego = np.asarray(stego)
+            if original.ndim != stego.ndim:
+                original = original if original.ndim == 3 else original[..., np.newaxis]
+                stego = stego if stego.ndim == 3 else stego[..., np.newaxis]
+            return original, stego
+        original = MultiLayerLSB.load_image(original)
+        stego = MultiLayerLSB.load_image(stego)
+        if original.shape != stego.shape:
+            original = np.array(Image.fromarray(MultiLayerLSB._pixel_array(original)).convert('RGB'))
+            stego = np.array(Image.fromarray(MultiLayerLSB._pixel_array(stego)).convert('RGB'))
+        return original, stego
+
+    @staticmethod
+    def _peak(*images):
+        """Largest sample value of the images' bit depth: 255 for 8-bit, 65535 for 16-bit."""
+        return float(max(np.iinfo(image.dtype).max if image.dtype.kind in 'ui' else 255 for image in images))
+
+    @staticmethod
+    def _mean_squared_error(original, stego):
+        """MSE of two loaded images, summed a block of rows at a time rather than over full float copies."""
+        total = 0
+        step = max(1, MultiLayerLSB.METRIC_BLOCK_SAMPLES // max(1, stego[0].size))
+        for i in range(0, len(stego), step):
+            diff = np.subtract(original[i:i + step], stego[i:i + step], dtype=np.int64)
+            np.square(diff, out=diff)
+            total += int(diff.sum())
+        return total / np.prod(np.broadcast_shapes(original.shape, stego.shape))
+
     @staticmethod
     def calculate_mse(original_path, stego_path):
         """Calculate the Mean Squared Error between original and stego images.
@@ -401,45 +1465,63 @@ class MultiLayerLSB:
         where:
         - I₁ and I₂ are the original and stego images
         - M, N are the image dimensions
+
+        Either argument may also be a decoded pixel array or an in-memory buffer.
         """
-        original = np.array(Image.open(original_path).convert('RGB'), dtype=np.float64)
-        stego = np.array(Image.open(stego_path).convert('RGB'), dtype=np.float64)
-        
+        original, stego = MultiLayerLSB._metric_arrays(original_path, stego_path)
+
         # Calculate MSE for all channels
-        mse = np.mean((original - stego) ** 2)
-        return mse
+        return MultiLayerLSB._mean_squared_error(original, stego)
     
     @staticmethod
     def calculate_ssim(original_path, stego_path):
         from skimage.metrics import structural_similarity as ssim
-        original = np.array(Image.open(original_path).convert('RGB'))
-        stego = np.array(Image.open(stego_path).convert('RGB'))
+        original, stego = MultiLayerLSB._metric_arrays(original_path, stego_path)
 
         # Set the window size and channel axis
         win_size = 7  # or any odd value <= min(original.shape[:2])
-        ssim_value, _ = ssim(original, stego, win_size=win_size, full=True, multichannel=True, channel_axis=-1)
+        data_range = MultiLayerLSB._peak(original, stego)
+        if original.ndim == 2:
+            ssim_value, _ = ssim(original, stego, win_size=win_size, full=True, data_range=data_range)
+        else:
+            ssim_value, _ = ssim(original, stego, win_size=win_size, full=True, channel_axis=-1,
+                                 data_range=data_range)
         return ssim_value
 
     @staticmethod
     def calculate_psnr(original_path, stego_path):
-        """Calculate PSNR between original and stego images."""
-        mse = MultiLayerLSB.calculate_mse(original_path, stego_path)
+        """Calculate PSNR between original and stego images, against the peak value of their bit depth."""
+        original, stego = MultiLayerLSB._metric_arrays(original_path, stego_path)
+        mse = MultiLayerLSB._mean_squared_error(original, stego)
         if mse == 0:
             return float('inf')  # No difference between images
         
-        max_pixel = 255.0
+        max_pixel = MultiLayerLSB._peak(original, stego)
         psnr = 20 * np.log10(max_pixel / np.sqrt(mse))
         return psnr
 
+    @staticmethod
+    def _image_geometry(image):
+        """
+        Return (total_pixels, channels) without decoding pixel data when given a path or buffer.
+        Pixels of every frame are counted for multi-frame images and (F, H, W, C) stacks.
+        """
+        if MultiLayerLSB._is_array(image):
+            image = np.asarray(image)
+            if image.ndim == 4:
+                return image.shape[0] * image.shape[1] * image.shape[2], image.shape[3]
+            return image.shape[0] * image.shape[1], (image.shape[2] if image.ndim == 3 else 1)
+        img = MultiLayerLSB._open(image)
+        channels, _ = MultiLayerLSB.NATIVE_MODES[MultiLayerLSB._native_mode(img)]
+        return img.size[0] * img.size[1] * getattr(img, 'n_frames', 1), channels
+
     @staticmethod
     def calculate_capacity(image_path, rounds=8):
-        """Calculate maximum capacity in bytes based on image size, channels, and embedding rounds."""
-        img = Image.open(image_path)
-        is_rgb = img.mode == 'RGB'
-        if not is_rgb:
-            img = img.convert('L')  # Convert to grayscale if not RGB
-        channels = 3 if is_rgb else 1
-        total_pixels = img.size[0] * img.size[1]  # width * height
+        """
+        Calculate maximum capacity in bytes based on image size, channels, and embedding rounds.
+        Channels are counted as decoded (see image_mode), so RGBA covers count their alpha too.
+        """
+        total_pixels, channels = MultiLayerLSB._image_geometry(image_path)
         
         # Calculate total bits available
         total_bits_available = total_pixels * rounds * channels
@@ -453,46 +1535,308 @@ class MultiLayerLSB:
         return max_bytes
 
     @staticmethod
-    def calculate_bpp(message_file, image_path, rounds=8):
-        """Calculate bits per pixel (BPP) for the embedding."""
-        binary_message = MultiLayerLSB.message_to_binary(message_file)
-        img = Image.open(image_path)
-        is_rgb = img.mode == 'RGB'
-        if not is_rgb:
-            img = img.convert('L')  # Convert to grayscale if not RGB
+    def calculate_bpp(message_file, image_path, rounds=8, compression='none', file_extension=None, bit_length=None):
+        """Calculate bits per pixel (BPP) for the embedding.
+
+        message_file may also be a bytes-like payload, in which case file_extension
+        is used for 'auto' compression. Given the embedded bit_length, the message
+        is ignored.
+        """
+        if bit_length is not None:
+            total_pixels, _ = MultiLayerLSB._image_geometry(image_path)
+            return bit_length / total_pixels
+        if isinstance(message_file, (str, os.PathLike)):
+            with open(message_file, 'rb') as f:
+                message_data = f.read()
+            _, file_extension = os.path.splitext(message_file)
+        else:
+            message_data = message_file
+        codec, payload = MultiLayerLSB.compress_payload(message_data, compression, file_extension)
+        binary_length = len(MultiLayerLSB.build_header('text', 0, codec)) + len(payload) * 8
+
+        total_pixels, _ = MultiLayerLSB._image_geometry(image_path)
 
-        total_pixels = img.size[0] * img.size[1]  # width * height
-        channels = 3 if is_rgb else 1
-        
-        # Calculate total bits available (including metadata)
-        total_bits_available = total_pixels * rounds * channels
-        
         # Calculate BPP (total message bits / total pixels)
-        bpp = len(binary_message) / total_pixels
+        bpp = binary_length / total_pixels
         return bpp
 
+    @staticmethod
+    def embedded_bit_length(message, termination_sequence=b'<<END_OF_MESSAGE>>', is_encrypted=True, compression='none', message_type='text', file_extension=None, layout='plane'):
+        """
+        Number of bits embed_data writes for a message, header included, without encrypting or embedding it.
+        Args:
+            message (bytes-like): Message payload.
+            termination_sequence (bytes, optional): Sequence to mark end of message.
+            is_encrypted (bool, optional): Whether the message will be encrypted. Default is True.
+            compression (str, optional): Codec applied before encryption. Default is 'none'.
+            message_type (str, optional): 'text', 'audio' or 'image'. Default is 'text'.
+            file_extension (str, optional): Extension of the original message file, used by 'auto' compression.
+            layout (str, optional): 'plane' or 'pixel'. Default is 'plane'.
+        Returns:
+            int: Embedded length in bits.
+        """
+        codec, payload = MultiLayerLSB.compress_payload(b''.join((message, termination_sequence)),
+                                                        compression, file_extension)
+        payload_bytes = len(payload)
+        if is_encrypted:
+            # PKCS7 always pads to the next full 16-byte block
+            payload_bytes = (payload_bytes // 16 + 1) * 16
+        return len(MultiLayerLSB.build_header(message_type, 0, codec, layout)) + payload_bytes * 8
+
+    @staticmethod
+    def sample_count(image):
+        """Number of samples (pixels x channels) in an image, without decoding paths or buffers."""
+        total_pixels, channels = MultiLayerLSB._image_geometry(image)
+        return total_pixels * channels
+
+    @staticmethod
+    def minimum_rounds(cover, bit_length, layout='plane'):
+        """
+        Fewest LSB layers that hold `bit_length` embedded bits in the cover.
+        Args:
+            cover (str, file-like, bytes-like or array-like): Cover image.
+            bit_length (int): Embedded length in bits (see embedded_bit_length).
+            layout (str, optional): 'plane' or 'pixel'. Default is 'plane'.
+        Returns:
+            int: Rounds between 1 and 8.
+        """
+        return MultiLayerLSB._minimum_rounds(MultiLayerLSB.sample_count(cover), bit_length, layout)
+
+    @staticmethod
+    def _minimum_rounds(samples, bit_length, layout):
+        """minimum_rounds for a cover of `samples` samples."""
+        if layout == 'pixel':
+            # The preamble takes one bit from each of the first samples
+            samples -= MultiLayerLSB.PREAMBLE_BITS
+            bit_length -= MultiLayerLSB.PREAMBLE_BITS
+        rounds = max(1, -(-bit_length // samples)) if samples > 0 else 9
+        if rounds > 8:
+            raise ValueError("Message too long for cover image capacity")
+        return rounds
+
+    @staticmethod
+    def read_header(stego):
+        """
+        Parse a stego image's header without reading its payload. Non-interlaced PNGs decode only
+        the rows holding the header; animated images are read from their first frame.
+        Args:
+            stego (str, file-like, bytes-like or array-like): Stego image.
+        Returns:
+            tuple: (message_type, codec, header_length, message_length, layout, rounds, frames); message_length
+                is in bits, rounds is None for the plane layout and frames None unless the payload is striped.
+        Raises:
+            ValueError: If the image holds no valid header.
+        """
+        image = MultiLayerLSB.load_image(stego, samples=MultiLayerLSB.PREAMBLE_BITS + 48)
+        return MultiLayerLSB._read_header((image[0] if image.ndim == 4 else image).reshape(-1))
+
+    @staticmethod
+    def rounds_used(stego):
+        """
+        Number of LSB layers a stego image's payload actually occupies, read from its header.
+        Args:
+            stego (str, file-like, bytes-like or array-like): Stego image.
+        Returns:
+            int: Rounds between 1 and 8.
+        """
+        image = MultiLayerLSB.load_image(stego)
+        flat = (image[0] if image.ndim == 4 else image).reshape(-1)
+        _, _, header_length, message_length, layout, rounds, frames = MultiLayerLSB._read_header(flat)
+        if layout == 'pixel':
+            return rounds
+        if frames is not None:
+            # The first frame holds the header and the largest stripe
+            message_length = -(-message_length // frames)
+        return min(max(1, -(-(header_length + message_length) // flat.size)), 8)
+
+    @staticmethod
+    def stego_delta(cover, stego):
+        """
+        Encode a stego image as a delta against its cover: for every bit plane the embed changed, the
+        stego's bits up to the last sample where that plane differs. A plane-major payload is a long
+        prefix of bit 0 and shorter ones above it, a pixel-major one the same prefix of each plane, so
+        the delta is about the size of the payload whatever the size of the cover.
+        Args:
+            cover (array-like): Decoded cover, e.g. from load_image or load_frames.
+            stego (array-like): The stego embed_data made from it; same shape and dtype.
+        Returns:
+            bytes: The delta, for apply_delta.
+        """
+        cover = np.ascontiguousarray(cover)
+        stego = np.ascontiguousarray(stego)
+        if cover.shape != stego.shape or cover.dtype != stego.dtype:
+            raise ValueError("Cover and stego must have the same shape and dtype")
+        codes = {dtype: code for code, dtype in MultiLayerLSB.DELTA_DTYPES.items()}
+        dtype = stego.dtype.newbyteorder('<') if stego.dtype.itemsize > 1 else stego.dtype
+        if dtype not in codes:
+            raise ValueError(f"Unsupported sample type: {stego.dtype}")
+        flat = stego.reshape(-1)
+        diff = np.bitwise_xor(cover.reshape(-1), flat)
+        planes = int(np.bitwise_or.reduce(diff)).bit_length() if diff.size else 0
+        lengths, packed = [], []
+        for plane in range(planes):
+            changed = (diff >> plane) & 1
+            length = changed.size - int(np.argmax(changed[::-1])) if changed.any() else 0
+            lengths.append(length)
+            packed.append(np.packbits(((flat[:length] >> plane) & 1).astype(np.uint8)).tobytes())
+        crc = zlib.crc32(flat.astype(dtype, copy=False))
+        head = struct.pack(f'<cB{stego.ndim}QBI{planes}Q', codes[dtype].encode(), stego.ndim, *stego.shape,
+                           planes, crc, *lengths)
+        return MultiLayerLSB.DELTA_MAGIC + head + zlib.compress(b''.join(packed), 6)
+
+    @staticmethod
+    def apply_delta(cover, delta, out=None):
+        """
+        Rebuild a stego image from its cover and a stego_delta.
+        Args:
+            cover (array-like): The decoded cover the delta was made against.
+            delta (bytes-like): Output of stego_delta.
+            out (np.ndarray, optional): Array of the cover's shape and dtype to write the stego into.
+        Returns:
+            np.ndarray: The stego image.
+        Raises:
+            ValueError: If the delta is malformed or was made against a different cover.
+        """
+        delta = memoryview(delta).cast('B')
+        magic = MultiLayerLSB.DELTA_MAGIC
+        if bytes(delta[:len(magic)]) != magic:
+            raise ValueError("Not a stego delta")
+        offset = len(magic)
+        code, ndim = struct.unpack_from('<cB', delta, offset)
+        offset += 2
+        shape = struct.unpack_from(f'<{ndim}Q', delta, offset)
+        offset += 8 * ndim
+        planes, crc = struct.unpack_from('<BI', delta, offset)
+        offset += 5
+        lengths = struct.unpack_from(f'<{planes}Q', delta, offset)
+        offset += 8 * planes
+        dtype = MultiLayerLSB.DELTA_DTYPES.get(code.decode('latin-1'))
+        cover = np.asarray(cover)
+        if dtype is None or cover.shape != shape or cover.dtype.newbyteorder('=') != dtype.newbyteorder('='):
+            raise ValueError("Delta does not match the cover's shape or sample type")
+        if out is None:
+            out = cover.copy()
+        else:
+            np.copyto(out, cover)
+        flat = out.reshape(-1)
+        bits = zlib.decompress(delta[offset:])
+        position = 0
+        for plane, length in enumerate(lengths):
+            size = (length + 7) // 8
+            values = np.unpackbits(np.frombuffer(bits, np.uint8, size, position), count=length)
+            position += size
+            mask = flat.dtype.type(np.iinfo(flat.dtype).max ^ (1 << plane))
+            head = flat[:length]
+            np.bitwise_and(head, mask, out=head)
+            np.bitwise_or(head, values.astype(flat.dtype) << plane, out=head)
+        if zlib.crc32(flat.astype(dtype, copy=False)) != crc:
+            raise ValueError("Delta does not match the cover")
+        return out
+
+    @staticmethod
+    def _plane_error_table():
+        """
+        Expected squared error per sample value when its low r bits are replaced by random bits.
+
+        Row r, column x: E[(U - (x mod 2^r))^2] with U uniform on [0, 2^r), which is
+        (4^r - 1) / 12 + ((2^r - 1) / 2 - x mod 2^r)^2.
+        """
+        values = np.arange(256)
+        table = np.zeros((9, 256))
+        for r in range(1, 9):
+            size = 1 << r
+            low = values & (size - 1)
+            table[r] = (size * size - 1) / 12 + ((size - 1) / 2 - low) ** 2
+        return table
+
+    @staticmethod
+    def rounds_sweep(cover, bit_length=0, layout='plane'):
+        """
+        Predicts capacity and distortion for every rounds value (1-8) from the cover's
+        histogram, in one pass over the cover instead of eight embeddings.
+
+        Embedded bits are modelled as uniformly random, which holds for encrypted and
+        compressed payloads and is close for most others. In the plane layout, layers fill
+        from the bottom up, so every rounds value the payload fits in gives the same stego
+        image; the full-capacity figures show what allowing that many layers can cost. In
+        the pixel layout the payload covers ceil(bits / rounds) samples, so each value differs.
+        Args:
+            cover (str, file-like, bytes-like or array-like): Cover image.
+            bit_length (int, optional): Embedded length in bits (see embedded_bit_length).
+            layout (str, optional): 'plane' or 'pixel'. Default is 'plane'.
+        Returns:
+            list: One dict per rounds value with 'rounds', 'capacity' (bytes), 'fits', the predicted
+                'mse' and 'psnr' of this payload (None if it does not fit), and 'full_mse' and
+                'full_psnr' with every layer up to `rounds` filled.
+        """
+        image = MultiLayerLSB.load_image(cover)
+        flat = image.reshape(-1)
+        n = flat.size
+        errors = MultiLayerLSB._plane_error_table()
+        peak = MultiLayerLSB._peak(flat)
+        if flat.dtype != np.uint8:
+            # Replacing up to 8 low bits costs the same whatever the high byte holds
+            flat = (flat & 0xFF).astype(np.uint8)
+
+        if layout == 'pixel':
+            # Bit 0 of the preamble samples, then `rounds` bits in each of the next ceil(body / rounds)
+            preamble = min(MultiLayerLSB.PREAMBLE_BITS, n)
+            body = max(bit_length - preamble, 0)
+            ends = [preamble + -(-body // rounds) for rounds in range(1, 9)]
+            # Prefix histograms for every end point, from consecutive slices of the cover
+            prefix = {preamble: np.zeros(256, dtype=np.int64)}
+            start = preamble
+            for end in sorted(set(min(end, n) for end in ends)):
+                prefix[end] = prefix[start] + np.bincount(flat[start:end], minlength=256)
+                start = end
+            preamble_hist = np.bincount(flat[:preamble], minlength=256)
+            full = preamble_hist + prefix[start] + np.bincount(flat[start:], minlength=256)
+            payload_mse = [(errors[1] @ preamble_hist + errors[rounds] @ prefix[min(end, n)]) / n
+                           for rounds, end in zip(range(1, 9), ends)]
+            fits = [end <= n for end in ends]
+        else:
+            full_planes, partial = divmod(bit_length, n)
+            # Samples before `partial` carry one more layer than the rest
+            head = np.bincount(flat[:partial], minlength=256)
+            tail = np.bincount(flat[partial:], minlength=256)
+            full = head + tail
+            mse = (errors[min(full_planes, 8)] @ tail + errors[min(full_planes + 1, 8)] @ head) / n
+            payload_mse = [mse] * 8
+            fits = [bit_length <= n * rounds for rounds in range(1, 9)]
+        full_mse = errors @ full / n
+
+        def psnr(mse):
+            return float('inf') if mse == 0 else 20 * np.log10(peak / np.sqrt(mse))
+
+        sweep = []
+        for rounds in range(1, 9):
+            fit = fits[rounds - 1]
+            mse = payload_mse[rounds - 1]
+            sweep.append({
+                'rounds': rounds,
+                'capacity': MultiLayerLSB.calculate_capacity(image, rounds),
+                'fits': fit,
+                'mse': float(mse) if fit else None,
+                'psnr': float(psnr(mse)) if fit else None,
+                'full_mse': float(full_mse[rounds]),
+                'full_psnr': float(psnr(full_mse[rounds]))
+            })
+        return sweep
+
     @staticmethod
     def get_media_type(stego_image_path):
         """
         Extracts the media type from the stego image's metadata.
         Args:
-            stego_image_path (str): Path to the stego image.
+            stego_image_path (str, file-like, bytes-like or np.ndarray): The stego image.
         Returns:
             str: The media type ('text', 'image', or 'audio').
         """
-        stego_image = Image.open(stego_image_path)
-        stego_array = np.array(stego_image)
-        is_rgb = stego_image.mode == 'RGB'
-        if not is_rgb:
-            stego_array = stego_array[..., np.newaxis]
+        flat = MultiLayerLSB.load_image(stego_image_path).reshape(-1)
 
         # Extract the first 3 bits which contain the media type
-        message_type_bits = ((stego_array >> 0) & 1).flatten()[:3]
+        message_type_bits = MultiLayerLSB._read_bits(flat, 0, 3)
         message_type_binary = ''.join(str(b) for b in message_type_bits)
         
         # Map binary to media type
-        type_map = {'001': 'text', '010': 'audio', '011': 'image'}
-        return type_map.get(message_type_binary, 'text')  # default to text if unknown type
-
-
-
+        return MultiLayerLSB.TYPE_NAMES.get(message_type_binary, 'text')  # default to text if unknown type
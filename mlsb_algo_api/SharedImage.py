@@ -0,0 +1,133 @@
+import multiprocessing
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from PIL import Image
+
+
+class SharedImage:
+    """
+    SharedImage is a decoded image whose pixels live in a multiprocessing.shared_memory segment.
+
+    Pickling a SharedImage only sends the segment name, shape and dtype, so
+    passing one to a ProcessPoolExecutor task lets the worker attach to the same
+    pixels instead of receiving a copy. It can be passed anywhere MultiLayerLSB
+    accepts a decoded array, and as the `out` argument of embed_data.
+
+    The creating process owns the segment and unlinks it on close(), when the
+    `with` block exits (also on errors) or when the object is garbage collected.
+    Attached copies in workers only unmap it.
+
+    Example:
+        with SharedImage.load('cover.png') as cover, SharedImage.empty_like(cover) as stego:
+            pool.submit(MultiLayerLSB.embed_data, cover, message, out=stego).result()
+            MultiLayerLSB.save_image(stego.array, 'stego.png')
+
+    Methods:
+        empty(shape, dtype=np.uint8):
+            Creates an uninitialised shared image.
+        empty_like(other):
+            Creates an uninitialised shared image with the shape and dtype of another image.
+        from_array(array):
+            Copies an array into a new shared image.
+        load(source):
+            Decodes an image (path, file-like or buffer) into a new shared image.
+        attach(name, shape, dtype):
+            Attaches to an existing segment without taking ownership.
+        close():
+            Unmaps the segment, and unlinks it if this object owns it.
+    """
+
+    def __init__(self, shm, shape, dtype, owner):
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+        self._array = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+        self._finalizer = weakref.finalize(self, SharedImage._cleanup, shm, owner)
+
+    @staticmethod
+    def empty(shape, dtype=np.uint8):
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        return SharedImage(shm, shape, dtype, owner=True)
+
+    @staticmethod
+    def empty_like(other):
+        other = np.asarray(other)
+        return SharedImage.empty(other.shape, other.dtype)
+
+    @staticmethod
+    def from_array(array):
+        array = np.asarray(array)
+        image = SharedImage.empty(array.shape, array.dtype)
+        image.array[...] = array
+        return image
+
+    @staticmethod
+    def load(source):
+        # Imported here: MultiLayerLSB may be imported as a package module or a script
+        try:
+            from .MultiLayerLSB import MultiLayerLSB
+        except ImportError:
+            from MultiLayerLSB import MultiLayerLSB
+        return SharedImage.from_array(MultiLayerLSB.load_image(source))
+
+    @staticmethod
+    def attach(name, shape, dtype):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13 registers every attach with the resource tracker.
+            # multiprocessing children share the owner's tracker, so that is
+            # harmless; an unrelated process has its own tracker, which would
+            # unlink the owner's segment when this process exits.
+            shm = shared_memory.SharedMemory(name=name)
+            if multiprocessing.parent_process() is None:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+        return SharedImage(shm, shape, dtype, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def array(self):
+        if self._array is None:
+            raise ValueError("SharedImage is closed")
+        return self._array
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is not None and np.dtype(dtype) != self.dtype:
+            return self.array.astype(dtype)
+        return self.array
+
+    def __reduce__(self):
+        return SharedImage.attach, (self.name, self.shape, self.dtype.str)
+
+    def to_image(self):
+        return Image.fromarray(self.array)
+
+    def close(self):
+        self._array = None
+        self._finalizer()
+
+    @staticmethod
+    def _cleanup(shm, owner):
+        try:
+            shm.close()
+        except BufferError:
+            # Someone still holds a view of .array; the mapping goes away with it
+            pass
+        if owner:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,369 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .MultiLayerLSB import MultiLayerLSB
+except ImportError:
+    from MultiLayerLSB import MultiLayerLSB
+
+
+class StegScanner:
+    """
+    StegScanner looks for LSB payloads in images, both in this project's format and generic LSB embedding.
+
+    Every test works on whole arrays at once; a batch is spread over a process pool.
+
+    Methods:
+        chi_square(flat):
+            Westfeld-Pfitzmann chi-square attack on the pairs of values (2k, 2k+1).
+            Args:
+                flat (np.ndarray): Samples in embedding order.
+            Returns:
+                float: Probability of embedding (0-1), the highest over a few growing prefixes
+                    so sequential embedding in the first samples is caught too.
+
+        rs_analysis(image):
+            Fridrich's RS analysis with 1x4 groups and the mask [0, 1, 1, 0].
+            Args:
+                image (np.ndarray): Pixel array (H, W) or (H, W, C).
+            Returns:
+                float: Estimated fraction of samples carrying payload bits (0-1).
+
+        sample_pair_analysis(image):
+            Dumitrescu-Wu-Wang sample pair analysis on horizontally adjacent samples.
+            Args:
+                image (np.ndarray): Pixel array (H, W) or (H, W, C).
+            Returns:
+                float: Estimated fraction of samples carrying payload bits (0-1).
+
+        find_header(flat):
+            Looks for a MultiLayerLSB header starting in each bit plane 0-7.
+            Args:
+                flat (np.ndarray): Samples in embedding order.
+            Returns:
+                dict or None: Plane and header fields of the first plausible header.
+
+        scan_image(source):
+            Runs every test on one image.
+            Args:
+                source (str, file-like, bytes-like or array-like): Image to scan.
+            Returns:
+                dict: Test results, the tests that fired ('reasons') and a 'suspicious' verdict.
+                    Chi-square only counts when another test fired too.
+
+        scan_batch(sources, workers=None, executor=None):
+            Scans many images across a process pool.
+            Args:
+                sources (list): Paths, buffers or (name, source) pairs.
+                workers (int, optional): Pool size. Default is the CPU count; 0 scans in this process.
+                executor (Executor, optional): Existing pool to use instead of creating one.
+            Returns:
+                dict: 'results', 'images', 'seconds' and 'images_per_second'.
+
+        scan_directory(directory, workers=None, recursive=False):
+            Scans every image file in a directory with scan_batch.
+
+    Command line:
+        python -m mlsb_algo_api.StegScanner <files or directories> [--workers N] [--recursive] [--json out.json]
+    """
+    IMAGE_EXTENSIONS = {'.png', '.bmp', '.tif', '.tiff', '.gif', '.webp', '.ppm', '.pgm'}
+    # Verdict thresholds. The LSB rate estimates of clean natural images are usually
+    # within ~0.1 of zero. Heavily textured regions (e.g. fur) can pass the chi-square
+    # test on their own, so it is only listed as a reason when the header, RS or SPA
+    # test fired too; otherwise its score is reported without affecting the verdict.
+    CHI_SQUARE_THRESHOLD = 0.99
+    RATE_THRESHOLD = 0.15
+    # Chi-square prefixes, as fractions of the samples
+    CHI_SQUARE_PREFIXES = (0.05, 0.25, 1.0)
+    # Only value pairs expected this often take part in the chi-square statistic
+    CHI_SQUARE_MIN_EXPECTED = 5
+    # Samples read by find_header: preamble plus pixel-major frame count and length fields at one bit per sample
+    HEADER_SAMPLES = MultiLayerLSB.PREAMBLE_BITS + 48
+
+    @staticmethod
+    def _chi_square_sf(statistic, dof):
+        """Upper-tail probability of the chi-square distribution (Wilson-Hilferty approximation)."""
+        if dof <= 0:
+            return 0.0
+        scale = 2 / (9 * dof)
+        z = ((statistic / dof) ** (1 / 3) - (1 - scale)) / math.sqrt(scale)
+        return 0.5 * math.erfc(z / math.sqrt(2))
+
+    @staticmethod
+    def chi_square(flat):
+        n = flat.size
+        cuts = sorted({max(1, int(n * fraction)) for fraction in StegScanner.CHI_SQUARE_PREFIXES})
+        histogram = np.zeros(256, dtype=np.int64)
+        start = 0
+        probability = 0.0
+        for cut in cuts:
+            histogram += np.bincount(flat[start:cut], minlength=256)
+            start = cut
+            pairs = histogram.reshape(128, 2)
+            expected = pairs.sum(axis=1) / 2
+            used = expected >= StegScanner.CHI_SQUARE_MIN_EXPECTED
+            if used.sum() < 2:
+                continue
+            statistic = float((((pairs[used, 0] - expected[used]) ** 2) / expected[used]).sum())
+            probability = max(probability, StegScanner._chi_square_sf(statistic, int(used.sum()) - 1))
+        return probability
+
+    @staticmethod
+    def _channels_first(image):
+        """(C, H, W) view of an image, as int16 so flipped values can leave 0-255."""
+        image = np.asarray(image)
+        if image.ndim == 2:
+            image = image[np.newaxis]
+        else:
+            image = np.moveaxis(image, -1, 0)
+        return image.astype(np.int16)
+
+    @staticmethod
+    def rs_analysis(image):
+        planes = StegScanner._channels_first(image)
+        width = planes.shape[2] - planes.shape[2] % 4
+        if width == 0:
+            return 0.0
+        # Groups of four horizontally adjacent samples, one array per position in the group
+        group = [planes[:, :, i:width:4].reshape(-1) for i in range(4)]
+        count = group[0].size
+
+        def flip_negative(x):
+            # F-1: -1 <-> 0, 1 <-> 2, ...
+            return x - 1 + 2 * (x & 1)
+
+        def regular_singular(a, b, c, d, flip):
+            # The mask [0, 1, 1, 0] flips the two middle samples
+            fb, fc = flip(b), flip(c)
+            before = np.abs(b - a) + np.abs(c - b) + np.abs(d - c)
+            after = np.abs(fb - a) + np.abs(fc - fb) + np.abs(d - fc)
+            return np.count_nonzero(after > before) / count, np.count_nonzero(after < before) / count
+
+        def flip_positive(x):
+            return x ^ 1
+
+        r_m, s_m = regular_singular(*group, flip_positive)
+        r_nm, s_nm = regular_singular(*group, flip_negative)
+        # The same statistics with every LSB flipped
+        inverted = [x ^ 1 for x in group]
+        r_m1, s_m1 = regular_singular(*inverted, flip_positive)
+        r_nm1, s_nm1 = regular_singular(*inverted, flip_negative)
+
+        d0, d1 = r_m - s_m, r_m1 - s_m1
+        dn0, dn1 = r_nm - s_nm, r_nm1 - s_nm1
+        a = 2 * (d1 + d0)
+        b = dn0 - dn1 - d1 - 3 * d0
+        c = d0 - dn0
+        if abs(a) < 1e-12:
+            if abs(b) < 1e-12:
+                return 0.0
+            z = -c / b
+        else:
+            discriminant = b * b - 4 * a * c
+            if discriminant < 0:
+                # Close to full embedding the roots turn complex; their real part is the estimate
+                z = -b / (2 * a)
+            else:
+                roots = ((-b + math.sqrt(discriminant)) / (2 * a), (-b - math.sqrt(discriminant)) / (2 * a))
+                z = min(roots, key=abs)
+        if abs(z - 0.5) < 1e-12:
+            return 1.0
+        rate = z / (z - 0.5)
+        return 0.0 if rate <= 0 else min(rate, 1.0)
+
+    @staticmethod
+    def sample_pair_analysis(image):
+        planes = StegScanner._channels_first(image)
+        u = planes[:, :, :-1].reshape(-1)
+        v = planes[:, :, 1:].reshape(-1)
+        if u.size == 0:
+            return 0.0
+        # Pairs whose values differ by an odd amount, split by the parity of the smaller value. In
+        # natural images both halves are about as large; flipping LSBs moves pairs between them
+        difference = np.abs(u - v)
+        odd = (difference & 1) == 1
+        lower_odd = (np.minimum(u, v) & 1) == 1
+        x = np.count_nonzero(odd & lower_odd)
+        y = np.count_nonzero(odd & ~lower_odd)
+        # Equal pairs, and pairs that differ at most in the LSB (the trace set C0)
+        d0 = np.count_nonzero(difference == 0)
+        c0 = np.count_nonzero((u >> 1) == (v >> 1))
+        # C0/2 p^2 - (D0 + Y - X) p + (Y - X) = 0, where p is the fraction of samples carrying payload
+        a = c0 / 2
+        b = -(d0 + y - x)
+        c = y - x
+        if a == 0:
+            if b == 0:
+                return StegScanner.rs_analysis(image)
+            rate = -c / b
+        else:
+            discriminant = b * b - 4 * a * c
+            if discriminant < 0:
+                # Only happens close to full embedding; the real part of the roots is the estimate
+                rate = -b / (2 * a)
+            else:
+                rate = (-b - math.sqrt(discriminant)) / (2 * a)
+        return min(max(rate, 0.0), 1.0)
+
+    @staticmethod
+    def find_header(flat):
+        n = flat.size
+        head = flat[:StegScanner.HEADER_SAMPLES]
+        for plane in range(8):
+            # Read the plane as if it were bit 0, so the normal header parser applies
+            try:
+                message_type, codec, header_length, message_length, layout, rounds, frames = \
+                    MultiLayerLSB._read_header(head >> plane)
+            except ValueError:
+                continue
+            if message_length == 0 or message_length % 8:
+                continue
+            # A striped payload only needs its first stripe to fit in this frame
+            stripe = message_length if frames is None else -(-message_length // frames)
+            if layout == 'pixel':
+                preamble = MultiLayerLSB.PREAMBLE_BITS
+                fits = preamble + -(-(header_length - preamble + stripe) // rounds) <= n
+            else:
+                fits = header_length + stripe <= n * (8 - plane)
+            if not fits:
+                continue
+            return {
+                'plane': plane,
+                'message_type': message_type,
+                'codec': codec,
+                'layout': layout,
+                'rounds': rounds,
+                'frames': frames,
+                'payload_bytes': message_length // 8,
+                'aes_block_aligned': message_length % 128 == 0
+            }
+        return None
+
+    @staticmethod
+    def scan_image(source):
+        name = None
+        if isinstance(source, tuple):
+            name, source = source
+        elif isinstance(source, (str, os.PathLike)):
+            name = os.fspath(source)
+        try:
+            image = MultiLayerLSB.load_image(source)
+        except Exception as e:
+            return {'source': name, 'error': str(e), 'suspicious': False}
+        if image.dtype != np.uint8:
+            # 16-bit covers carry the payload in their low byte, which the statistics below expect
+            image = (image & 0xFF).astype(np.uint8)
+        flat = image.reshape(-1)
+        chi_square = StegScanner.chi_square(flat)
+        rs = StegScanner.rs_analysis(image)
+        spa = StegScanner.sample_pair_analysis(image)
+        header = StegScanner.find_header(flat)
+        reasons = []
+        if header is not None:
+            reasons.append('header')
+        if rs >= StegScanner.RATE_THRESHOLD:
+            reasons.append('rs')
+        if spa >= StegScanner.RATE_THRESHOLD:
+            reasons.append('spa')
+        # Chi-square alone is not enough (see CHI_SQUARE_THRESHOLD); it only backs up another test
+        if reasons and chi_square >= StegScanner.CHI_SQUARE_THRESHOLD:
+            reasons.append('chi_square')
+        return {
+            'source': name,
+            'width': image.shape[1],
+            'height': image.shape[0],
+            'channels': image.shape[2] if image.ndim == 3 else 1,
+            'chi_square': chi_square,
+            'rs': rs,
+            'spa': spa,
+            'header': header,
+            'reasons': reasons,
+            'suspicious': bool(reasons)
+        }
+
+    @staticmethod
+    def scan_batch(sources, workers=None, executor=None):
+        sources = list(sources)
+        start = time.perf_counter()
+        if executor is not None:
+            results = list(executor.map(StegScanner.scan_image, sources))
+        elif workers == 0 or len(sources) < 2:
+            results = [StegScanner.scan_image(source) for source in sources]
+        else:
+            workers = min(workers or os.cpu_count() or 1, len(sources))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(StegScanner.scan_image, sources,
+                                        chunksize=max(1, len(sources) // (workers * 4))))
+        seconds = time.perf_counter() - start
+        return {
+            'results': results,
+            'images': len(results),
+            'seconds': seconds,
+            'images_per_second': len(results) / seconds if seconds > 0 else None
+        }
+
+    @staticmethod
+    def image_files(directory, recursive=False):
+        """Paths of the image files in a directory, sorted."""
+        paths = []
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            paths.extend(os.path.join(root, f) for f in sorted(files)
+                         if os.path.splitext(f)[1].lower() in StegScanner.IMAGE_EXTENSIONS)
+            if not recursive:
+                break
+        return paths
+
+    @staticmethod
+    def scan_directory(directory, workers=None, recursive=False):
+        return StegScanner.scan_batch(StegScanner.image_files(directory, recursive), workers=workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scan images for LSB payloads.')
+    parser.add_argument('paths', nargs='+', help='Image files or directories.')
+    parser.add_argument('--workers', type=int, default=None, help='Process pool size (0 = no pool).')
+    parser.add_argument('--recursive', action='store_true', help='Descend into subdirectories.')
+    parser.add_argument('--json', help='Write all results to this file.')
+    parser.add_argument('--suspicious-only', action='store_true', help='Only list suspicious images.')
+    args = parser.parse_args(argv)
+
+    sources = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            sources.extend(StegScanner.image_files(path, args.recursive))
+        else:
+            sources.append(path)
+
+    report = StegScanner.scan_batch(sources, workers=args.workers)
+    print(f"{'image':<40}{'chi2':>7}{'rs':>7}{'spa':>7}  header")
+    for result in report['results']:
+        if args.suspicious_only and not result['suspicious']:
+            continue
+        label = (result['source'] or '')[-40:]
+        if 'error' in result:
+            print(f"{label:<40}  ERROR {result['error']}")
+            continue
+        header = result['header']
+        found = f"plane {header['plane']} {header['message_type']} {header['payload_bytes']} B" if header else '-'
+        flag = '  SUSPICIOUS' if result['suspicious'] else ''
+        print(f"{label:<40}{result['chi_square']:>7.2f}{result['rs']:>7.2f}{result['spa']:>7.2f}  {found}{flag}")
+    suspicious = sum(result['suspicious'] for result in report['results'])
+    print(f"{report['images']} images, {suspicious} suspicious, {report['seconds']:.2f} s "
+          f"({report['images_per_second'] or 0:.1f} images/s)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 1 if suspicious else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def cover():
+    """A random 96x128 RGB cover; random pixels keep every LSB in play."""
+    return np.random.default_rng(0).integers(0, 256, (96, 128, 3), dtype=np.uint8)
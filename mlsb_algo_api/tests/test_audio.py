@@ -0,0 +1,79 @@
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from mlsb_algo_api.AudioLSB import AudioLSB
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB
+
+MESSAGE = b'hidden in the noise floor ' * 40
+
+
+@pytest.fixture
+def cover_wav(tmp_path):
+    """One second of 16-bit stereo noise."""
+    path = os.path.join(tmp_path, 'cover.wav')
+    samples = np.random.default_rng(0).integers(-2000, 2000, (8000, 2), dtype=np.int16)
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(samples.tobytes())
+    return path
+
+
+def test_wav_info_and_capacity(cover_wav):
+    info = AudioLSB.read_wav_info(cover_wav)
+    assert (info.channels, info.sample_rate, info.bits_per_sample, info.frames) == (2, 8000, 16, 8000)
+    assert AudioLSB.sample_count(cover_wav) == 16000
+    assert AudioLSB.max_rounds(cover_wav) == 4
+    assert AudioLSB.calculate_capacity(cover_wav, rounds=1) < AudioLSB.calculate_capacity(cover_wav)
+
+
+@pytest.mark.parametrize('compression', ['none', 'zlib'])
+@pytest.mark.parametrize('layout', ['plane', 'pixel'])
+@pytest.mark.parametrize('is_encrypted', [False, True])
+def test_embed_extract_round_trip(cover_wav, tmp_path, compression, layout, is_encrypted):
+    stego_wav = os.path.join(tmp_path, 'stego.wav')
+    key, iv = AudioLSB.embed_data(cover_wav, stego_wav, MESSAGE, is_encrypted=is_encrypted,
+                                  compression=compression, layout=layout)
+    assert os.path.getsize(stego_wav) == os.path.getsize(cover_wav)
+    message, _ = AudioLSB.extract_data(stego_wav, key=key, iv=iv, is_encrypted=is_encrypted)
+    assert message.startswith(MESSAGE)
+
+
+def test_only_low_bits_change(cover_wav, tmp_path):
+    stego_wav = os.path.join(tmp_path, 'stego.wav')
+    AudioLSB.embed_data(cover_wav, stego_wav, MESSAGE, rounds=2, is_encrypted=False)
+    with wave.open(cover_wav) as cover, wave.open(stego_wav) as stego:
+        before = np.frombuffer(cover.readframes(cover.getnframes()), dtype=np.int16)
+        after = np.frombuffer(stego.readframes(stego.getnframes()), dtype=np.int16)
+    assert np.all((before ^ after) & ~np.int16(0b11) == 0)
+    assert np.any(before != after)
+
+
+def test_rounds_are_capped_by_sample_width(cover_wav, tmp_path):
+    with pytest.raises(ValueError, match='at most 4 rounds'):
+        AudioLSB.embed_data(cover_wav, os.path.join(tmp_path, 'stego.wav'), MESSAGE, rounds=5)
+
+
+def test_oversized_message_is_refused(cover_wav, tmp_path):
+    with pytest.raises(ValueError, match='too long'):
+        AudioLSB.embed_data(cover_wav, os.path.join(tmp_path, 'stego.wav'), os.urandom(20000), is_encrypted=False)
+
+
+def test_decompression_limit(cover_wav, tmp_path):
+    stego_wav = os.path.join(tmp_path, 'stego.wav')
+    AudioLSB.embed_data(cover_wav, stego_wav, b'\0' * 100000, is_encrypted=False, compression='zlib')
+    with pytest.raises(ValueError, match='expands to more than'):
+        AudioLSB.extract_data(stego_wav, is_encrypted=False, max_length=1000)
+
+
+def test_header_matches_images(cover_wav, tmp_path):
+    stego_wav = os.path.join(tmp_path, 'stego.wav')
+    AudioLSB.embed_data(cover_wav, stego_wav, MESSAGE, rounds=3, is_encrypted=False, layout='pixel')
+    with wave.open(stego_wav) as stego:
+        samples = np.frombuffer(stego.readframes(stego.getnframes()), dtype=np.int16)
+    header = MultiLayerLSB._read_header((samples & 0xFF).astype(np.uint8))
+    assert header[0] == 'text' and header[4:6] == ('pixel', 3)
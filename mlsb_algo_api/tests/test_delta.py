@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB
+
+
+@pytest.mark.parametrize('layout, rounds', [('plane', 1), ('plane', 3), ('pixel', 2)])
+def test_delta_round_trip(cover, layout, rounds):
+    message = bytes(range(256)) * 4
+    stego, _, _ = MultiLayerLSB.embed_data(cover, message, rounds=rounds, is_encrypted=False, layout=layout)
+    delta = MultiLayerLSB.stego_delta(cover, stego)
+    assert len(delta) < len(message) * 2
+    np.testing.assert_array_equal(MultiLayerLSB.apply_delta(cover, delta), stego)
+    out = np.empty_like(cover)
+    assert MultiLayerLSB.apply_delta(cover, delta, out=out) is out
+    np.testing.assert_array_equal(out, stego)
+
+
+def test_frame_stack_delta_round_trip():
+    frames = np.random.default_rng(2).integers(0, 256, (3, 32, 32, 3), dtype=np.uint8)
+    stego, _, _ = MultiLayerLSB.embed_data(frames, b'f' * 600, rounds=1, is_encrypted=False)
+    np.testing.assert_array_equal(MultiLayerLSB.apply_delta(frames, MultiLayerLSB.stego_delta(frames, stego)), stego)
+
+
+def test_unchanged_stego_has_an_empty_delta(cover):
+    np.testing.assert_array_equal(MultiLayerLSB.apply_delta(cover, MultiLayerLSB.stego_delta(cover, cover)), cover)
+
+
+def test_delta_against_another_cover_is_refused(cover):
+    stego, _, _ = MultiLayerLSB.embed_data(cover, b'crc' * 100, rounds=1, is_encrypted=False)
+    delta = MultiLayerLSB.stego_delta(cover, stego)
+    changed = cover.copy()
+    changed[-1, -1, 0] ^= 0x80
+    with pytest.raises(ValueError):
+        MultiLayerLSB.apply_delta(changed, delta)
+    with pytest.raises(ValueError):
+        MultiLayerLSB.apply_delta(cover, b'not a delta')
+    with pytest.raises(ValueError):
+        MultiLayerLSB.stego_delta(cover, stego[:-1])
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB
+
+MESSAGE = b'The quick brown fox jumps over the lazy dog. ' * 8
+
+
+@pytest.mark.parametrize('codec', sorted(MultiLayerLSB.CODECS))
+@pytest.mark.parametrize('layout, rounds', [('plane', 1), ('plane', 3), ('pixel', 1), ('pixel', 4), ('pixel', 8)])
+def test_header_fields_round_trip(codec, layout, rounds):
+    header = MultiLayerLSB.build_header('image', 4096, codec, layout, rounds)
+    assert MultiLayerLSB.parse_header(header) == ('image', codec, len(header), 4096)
+    assert MultiLayerLSB.parse_layout(header) == (layout, rounds if layout == 'pixel' else None)
+    assert MultiLayerLSB.parse_frames(header) is None
+
+
+def test_uncompressed_plane_headers_keep_the_legacy_format():
+    header = MultiLayerLSB.build_header('text', 8)
+    assert len(header) == 35
+    assert header[0] == '0'
+    assert MultiLayerLSB.parse_header(header) == ('text', 'none', 35, 8)
+
+
+@pytest.mark.parametrize('layout', ['plane', 'pixel'])
+def test_frame_count_round_trips(layout):
+    header = MultiLayerLSB.build_header('audio', 800, 'zlib', layout, 2, frames=7)
+    assert MultiLayerLSB.parse_frames(header) == 7
+    assert MultiLayerLSB.parse_header(header) == ('audio', 'zlib', 59, 800)
+
+
+def test_frame_count_is_bounded():
+    with pytest.raises(ValueError):
+        MultiLayerLSB.build_header('text', 8, frames=1 << 16)
+
+
+def test_unknown_flags_are_rejected():
+    header = MultiLayerLSB.build_header('text', 8, 'zlib')
+    with pytest.raises(ValueError):
+        MultiLayerLSB.parse_header(header[:3] + '1' + header[4:])
+
+
+@pytest.mark.parametrize('codec', sorted(MultiLayerLSB.CODECS))
+@pytest.mark.parametrize('layout', ['plane', 'pixel'])
+@pytest.mark.parametrize('is_encrypted', [False, True])
+def test_embed_extract_round_trip(cover, codec, layout, is_encrypted):
+    stego, key, iv = MultiLayerLSB.embed_data(cover, MESSAGE, rounds=2, is_encrypted=is_encrypted,
+                                              compression=codec, layout=layout)
+    message_type, header_codec, _, _, header_layout, rounds, frames = MultiLayerLSB.read_header(stego)
+    assert (message_type, header_codec, header_layout, frames) == ('text', codec, layout, None)
+    assert rounds == (2 if layout == 'pixel' else None)
+    message, _ = MultiLayerLSB.extract_data(stego, key=key, iv=iv, is_encrypted=is_encrypted)
+    assert message.startswith(MESSAGE)
+
+
+def test_auto_rounds_use_the_fewest_layers(cover):
+    stego, _, _ = MultiLayerLSB.embed_data(cover, MESSAGE, rounds='auto', is_encrypted=False, layout='pixel')
+    assert MultiLayerLSB.read_header(stego)[5] == 1
+
+
+def test_payload_is_striped_across_frames():
+    frames = np.random.default_rng(1).integers(0, 256, (4, 32, 48, 3), dtype=np.uint8)
+    message = bytes(range(256)) * 5
+    stego, _, _ = MultiLayerLSB.embed_data(frames, message, rounds=1, is_encrypted=False, compression='none')
+    assert stego.shape == frames.shape
+    striped = MultiLayerLSB.read_header(stego)[-1]
+    assert 1 < striped <= len(frames)
+    extracted, _ = MultiLayerLSB.extract_data(stego, is_encrypted=False)
+    assert extracted.startswith(message)
+
+
+def test_decompression_limit_refuses_bombs(cover):
+    bomb = b'\0' * 200000
+    stego, _, _ = MultiLayerLSB.embed_data(cover, bomb, rounds=1, is_encrypted=False, compression='zlib')
+    with pytest.raises(ValueError, match='expands to more than'):
+        MultiLayerLSB.extract_data(stego, is_encrypted=False, max_length=1000)
+    message, _ = MultiLayerLSB.extract_data(stego, is_encrypted=False, max_length=len(bomb) + 100)
+    assert message.startswith(bomb)
+
+
+def test_decompress_payload_limits():
+    data = MultiLayerLSB._compress(b'x' * 5000, 'lzma')
+    assert MultiLayerLSB.decompress_payload(data, 'lzma', max_length=5000) == b'x' * 5000
+    with pytest.raises(ValueError):
+        MultiLayerLSB.decompress_payload(data, 'lzma', max_length=4999)
+    with pytest.raises(ValueError, match='truncated'):
+        MultiLayerLSB.decompress_payload(data[:-10], 'lzma')
+    assert MultiLayerLSB.decompression_limit(100) == 100 * MultiLayerLSB.MAX_EXPANSION
+    assert MultiLayerLSB.decompression_limit(100, max_length=7) == 7
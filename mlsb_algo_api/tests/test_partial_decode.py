@@ -0,0 +1,57 @@
+import io
+
+import numpy as np
+from PIL import Image, PngImagePlugin
+
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB
+
+
+def png_bytes(array):
+    buffer = io.BytesIO()
+    MultiLayerLSB.save_image(array, buffer)
+    return buffer.getvalue()
+
+
+def test_partial_decode_matches_full_decode(cover):
+    stego, _, _ = MultiLayerLSB.embed_data(cover, b'partial rows ' * 20, rounds=1, is_encrypted=False)
+    data = png_bytes(stego)
+    rows = MultiLayerLSB.load_image(data, samples=MultiLayerLSB.PREAMBLE_BITS + 48)
+    assert rows.shape[0] < cover.shape[0]
+    np.testing.assert_array_equal(rows, stego[:rows.shape[0]])
+    assert MultiLayerLSB.read_header(data) == MultiLayerLSB.read_header(stego)
+    message, _ = MultiLayerLSB.extract_data(MultiLayerLSB.load_image(data), is_encrypted=False)
+    assert message.startswith(b'partial rows ' * 20)
+
+
+def test_partial_decode_falls_back_to_full_decode(cover, monkeypatch):
+    # A Pillow whose decoder rejects the rewritten tile
+    load = PngImagePlugin.PngImageFile.load
+
+    def reject_short_tiles(self):
+        if self.tile and self.tile[0][1][3] < 96:
+            raise OSError('tile rewrite not supported')
+        return load(self)
+
+    monkeypatch.setattr(PngImagePlugin.PngImageFile, 'load', reject_short_tiles)
+    data = png_bytes(cover)
+    np.testing.assert_array_equal(MultiLayerLSB.load_image(io.BytesIO(data), samples=100), cover)
+    np.testing.assert_array_equal(MultiLayerLSB.load_image(data, samples=100), cover)
+
+
+def test_partial_decode_skipped_when_size_is_not_rewritten(cover, monkeypatch):
+    # A Pillow that no longer reads the size back from _size once the image is open
+    def keep_opened_size(self, value):
+        if getattr(self, '_opened_size', (0, 0)) == (0, 0):
+            self._opened_size = value
+
+    size = property(lambda self: self._opened_size, keep_opened_size)
+    monkeypatch.setattr(PngImagePlugin.PngImageFile, '_size', size, raising=False)
+    np.testing.assert_array_equal(MultiLayerLSB.load_image(png_bytes(cover), samples=100), cover)
+
+
+def test_interlaced_and_non_png_decode_fully(cover):
+    buffer = io.BytesIO()
+    Image.fromarray(cover).save(buffer, 'BMP')
+    assert not MultiLayerLSB.decodes_partially(io.BytesIO(buffer.getvalue()))
+    np.testing.assert_array_equal(MultiLayerLSB.load_image(buffer.getvalue(), samples=100), cover)
+    assert MultiLayerLSB.decodes_partially(io.BytesIO(png_bytes(cover)))
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB
+from mlsb_algo_api.StegScanner import StegScanner
+
+FIXTURES = os.path.dirname(os.path.abspath(__file__))
+COVER = os.path.join(FIXTURES, 'cover_image', 'lena.tiff')
+
+
+def randomize_lsbs(image, seed=0):
+    """Replace every LSB with a random bit, as a payload filling the first plane would."""
+    rng = np.random.default_rng(seed)
+    return (image & 0xFE) | rng.integers(0, 2, size=image.shape, dtype=image.dtype)
+
+
+def test_clean_cover_is_not_suspicious():
+    result = StegScanner.scan_image(COVER)
+    assert result['source'] == COVER
+    assert not result['suspicious']
+    assert result['header'] is None
+    assert result['rs'] < StegScanner.RATE_THRESHOLD
+
+
+def test_full_lsb_embedding_is_suspicious():
+    result = StegScanner.scan_image(randomize_lsbs(MultiLayerLSB.load_image(COVER)))
+    assert result['suspicious']
+    assert {'rs', 'spa'} <= set(result['reasons'])
+    assert result['rs'] > 0.8 and result['spa'] > 0.8
+
+
+def test_our_header_is_found():
+    cover = MultiLayerLSB.load_image(COVER)
+    message = b'x' * 1000
+    stego, _, _ = MultiLayerLSB.embed_data(cover, message, rounds=1, is_encrypted=True, compression='zlib')
+    header = StegScanner.scan_image(stego)['header']
+    assert header['plane'] == 0
+    assert header['codec'] == 'zlib'
+    assert header['layout'] == 'plane'
+    assert header['aes_block_aligned']
+
+
+def test_header_in_a_higher_plane_is_found():
+    cover = MultiLayerLSB.load_image(COVER)
+    stego, _, _ = MultiLayerLSB.embed_data(cover, b'plane two' * 20, rounds=1, is_encrypted=False)
+    # Move the embedded plane 0 up to plane 2
+    shifted = (cover & ~np.uint8(0b100)) | ((stego & 1) << 2)
+    assert StegScanner.find_header(shifted.reshape(-1))['plane'] == 2
+
+
+def test_batch_keeps_order_and_reports_errors():
+    report = StegScanner.scan_batch([COVER, ('broken.png', b'not an image')], workers=0)
+    assert report['images'] == 2
+    assert report['results'][0]['source'] == COVER
+    assert report['results'][1]['source'] == 'broken.png'
+    assert 'error' in report['results'][1] and not report['results'][1]['suspicious']
+
+
+def test_image_files_filters_by_extension():
+    files = StegScanner.image_files(os.path.join(FIXTURES, 'cover_image'))
+    assert files == sorted(files)
+    assert all(path.endswith('.tiff') for path in files)
+    assert StegScanner.image_files(os.path.join(FIXTURES, 'text_message')) == []
@@ -0,0 +1,50 @@
+import io
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from mlsb_algo_api.MultiLayerLSB import MultiLayerLSB
+from mlsb_algo_api.SharedImage import SharedImage
+
+
+def mark_corner(image):
+    image.array[0, 0] = 7
+    return image.owner
+
+
+def test_workers_attach_to_the_same_pixels(cover):
+    with SharedImage.from_array(cover) as shared, ProcessPoolExecutor(max_workers=1) as pool:
+        # Only the segment name crosses the process boundary
+        assert len(pickle.dumps(shared)) < 200
+        assert pool.submit(mark_corner, shared).result() is False
+        assert np.all(shared.array[0, 0] == 7)
+
+
+def test_load_decodes_into_shared_memory(cover):
+    buffer = io.BytesIO()
+    MultiLayerLSB.save_image(cover, buffer)
+    with SharedImage.load(buffer.getvalue()) as shared:
+        np.testing.assert_array_equal(np.asarray(shared), cover)
+        np.testing.assert_array_equal(np.asarray(shared.to_image()), cover)
+
+
+def test_embed_into_a_shared_output(cover):
+    with SharedImage.from_array(cover) as shared, SharedImage.empty_like(shared) as out:
+        result, _, _ = MultiLayerLSB.embed_data(shared, b'shared pixels' * 10, rounds=1, is_encrypted=False, out=out)
+        assert result is out
+        np.testing.assert_array_equal(shared.array, cover)
+        message, _ = MultiLayerLSB.extract_data(out, is_encrypted=False)
+    assert message.startswith(b'shared pixels' * 10)
+
+
+def test_close_unlinks_the_owned_segment(cover):
+    shared = SharedImage.from_array(cover)
+    name = shared.name
+    shared.close()
+    with pytest.raises(ValueError):
+        shared.array
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)